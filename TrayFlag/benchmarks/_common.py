@@ -0,0 +1,58 @@
+# File: benchmarks/_common.py
+
+import os
+import sys
+
+# The application modules use flat imports (from utils import ...), so put src/ on the path.
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+def summarize(values_ms):
+    """Returns mean/p50/p95/max (milliseconds) for a list of samples."""
+    if not values_ms:
+        return {"n": 0}
+    return {
+        "n": len(values_ms),
+        "mean_ms": round(sum(values_ms) / len(values_ms), 3),
+        "p50_ms": round(percentile(values_ms, 50), 3),
+        "p95_ms": round(percentile(values_ms, 95), 3),
+        "max_ms": round(max(values_ms), 3),
+    }
+
+def cpu_seconds():
+    """CPU time of this process plus finished child processes (children are 0 on Windows)."""
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+def thread_cpu_seconds(native_id):
+    """CPU time of one thread of this process (Linux /proc), or None elsewhere."""
+    try:
+        with open(f"/proc/self/task/{native_id}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, IndexError, ValueError):
+        return None
+
+def rss_kb():
+    """Current resident set size of this process in KiB (Linux /proc), or None elsewhere."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def os_thread_count():
+    """Threads of this process as the OS sees them (Qt and executor threads included), or None."""
+    try:
+        return len(os.listdir("/proc/self/task"))
+    except OSError:
+        return None
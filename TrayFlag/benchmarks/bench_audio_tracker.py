@@ -0,0 +1,65 @@
+# File: benchmarks/bench_audio_tracker.py
+"""
+Caller-side latency of "is audio playing?": a full session scan on every
+call versus AudioActivityTracker's cached snapshot, with a fake session
+source whose scan cost grows with the number of sessions.
+
+    python benchmarks/bench_audio_tracker.py --sessions 30 --scan-cost-ms 0.5 --seconds 3
+"""
+
+import argparse
+import json
+import time
+
+import _common
+from _common import summarize
+from idle_detector import FakeSessionSource, AudioActivityTracker
+
+def make_sessions(count):
+    # The last one is an active, audible session, so a scan has to look at all of them
+    sessions = [{'process': True, 'volume': 0.5, 'state': 0} for _ in range(count - 1)]
+    return sessions + [{'process': True, 'volume': 0.5, 'state': 1}]
+
+def bench_direct(source, calls):
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        source.is_active()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {**summarize(samples), "scans": source.scans}
+
+def bench_tracker(source, seconds, interval):
+    """Reads every `interval` seconds for `seconds`, like the idle monitor re-asking."""
+    tracker = AudioActivityTracker(source, min_interval=1.0, max_age=1.0)
+    samples, unknown = [], 0
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        start = time.perf_counter()
+        if tracker.is_playing() is None:
+            unknown += 1
+        samples.append((time.perf_counter() - start) * 1000)
+        time.sleep(interval)
+    tracker.stop()
+    return {**summarize(samples), "unknown_answers": unknown, **tracker.stats()}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=30)
+    parser.add_argument("--scan-cost-ms", type=float, default=0.5, help="cost per session of one scan")
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--read-interval", type=float, default=0.01)
+    args = parser.parse_args()
+
+    cost = args.scan_cost_ms / 1000
+    result = {
+        "benchmark": "audio_activity_tracker",
+        "sessions": args.sessions,
+        "direct_scan": bench_direct(FakeSessionSource(make_sessions(args.sessions), cost), args.calls),
+        "tracker": bench_tracker(FakeSessionSource(make_sessions(args.sessions), cost),
+                                 args.seconds, args.read_interval),
+    }
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
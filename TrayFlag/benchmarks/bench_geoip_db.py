@@ -0,0 +1,108 @@
+# File: benchmarks/bench_geoip_db.py
+"""
+Loader benchmark for the offline GeoIP range index: CSV compile time,
+open time, RSS after open and per-lookup latency, on a synthetic
+country-level database of realistic size.
+
+    python benchmarks/bench_geoip_db.py --v4 400000 --v6 150000
+"""
+
+import argparse
+import ipaddress
+import json
+import os
+import random
+import tempfile
+import time
+
+import _common
+from _common import summarize
+
+import geoip_db
+
+COUNTRIES = ["US", "DE", "NL", "FR", "GB", "RU", "JP", "BR", "IN", "CN", "SE", "PL", "UA", "KZ", "TR"]
+
+def rss_kb():
+    """Resident set size of this process in KB (Linux /proc, else peak RSS from resource)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except ImportError:
+        return None
+
+def write_csv(path, count_v4, count_v6):
+    rng = random.Random(42)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("start_ip,end_ip,country_code,asn,org\n")
+        step = (2 ** 32) // count_v4
+        for i in range(count_v4):
+            start = i * step
+            asn = 64500 + (i % 500)
+            f.write(f"{ipaddress.IPv4Address(start)},{ipaddress.IPv4Address(start + step - 1)},"
+                    f"{rng.choice(COUNTRIES)},{asn},Example Net {asn % 500}\n")
+        step6 = (2 ** 112) // count_v6 # spread over 2001::/16
+        base = int(ipaddress.IPv6Address("2001::"))
+        for i in range(count_v6):
+            start = base + i * step6
+            f.write(f"{ipaddress.IPv6Address(start)},{ipaddress.IPv6Address(start + step6 - 1)},"
+                    f"{rng.choice(COUNTRIES)},,\n")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--v4", type=int, default=400000)
+    parser.add_argument("--v6", type=int, default=150000)
+    parser.add_argument("--lookups", type=int, default=100000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "geo.csv")
+        index_path = os.path.join(tmp, "geo.idx")
+        write_csv(csv_path, args.v4, args.v6)
+
+        start = time.perf_counter()
+        geoip_db.build_index(csv_path, index_path)
+        build_s = time.perf_counter() - start
+
+        rss_before = rss_kb()
+        start = time.perf_counter()
+        db = geoip_db.RangeIndex(index_path)
+        open_ms = (time.perf_counter() - start) * 1000
+        rss_after_open = rss_kb()
+
+        rng = random.Random(1)
+        ips = [str(ipaddress.IPv4Address(rng.getrandbits(32))) for _ in range(args.lookups)]
+        start = time.perf_counter()
+        for ip in ips:
+            db.lookup(ip)
+        per_lookup_us = (time.perf_counter() - start) * 1e6 / len(ips)
+
+        samples = []
+        for ip in ips[:1000]:
+            t = time.perf_counter()
+            db.lookup(ip)
+            samples.append((time.perf_counter() - t) * 1000)
+        db.close()
+
+        result = {
+            "benchmark": "geoip_db",
+            "ranges_v4": args.v4,
+            "ranges_v6": args.v6,
+            "index_size_kb": os.path.getsize(index_path) // 1024,
+            "build_s": round(build_s, 3),
+            "open_ms": round(open_ms, 3),
+            "rss_kb_before_open": rss_before,
+            "rss_kb_after_open": rss_after_open,
+            "lookup_us_mean": round(per_lookup_us, 3),
+            "lookup": summarize(samples),
+        }
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# File: benchmarks/bench_headless.py
+"""
+Headless mode: one-shot run cost (wall time, peak RSS, Qt modules loaded)
+compared with the tray app doing the same work (start, one full check
+against the local stub servers, exit), and in-process throughput of the
+check -> JSON event pipeline, with the stub's IP changing after every event.
+The tray app runs from a temporary copy of src/ and assets/, so its
+portable-layout files stay out of the tree.
+
+    python benchmarks/bench_headless.py --seconds 5 --runs 3
+"""
+
+import time
+STARTED = time.perf_counter() # one-shot runs are timed from interpreter start to the exit code
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import _common
+from _common import summarize
+from stub_servers import StubServer, StubConfig
+
+INI = "[cache]\nenabled=false\n[history]\nenabled=false\n[network]\nwatch_events=false\nprecheck=false\n"
+# The same settings for the tray app, without its first-launch prompt and sounds
+GUI_INI = INI + "[main]\nshortcut_prompted=true\nautostart=false\nsound=false\nnotifications=false\n"
+
+def install_app(workdir):
+    """Copies the tray app into workdir/app with GUI_INI as its settings."""
+    app_dir = os.path.join(workdir, "app")
+    shutil.copytree(_common.SRC_DIR, app_dir, ignore=shutil.ignore_patterns("__pycache__", "*.ini", "*.db", "*.json"))
+    shutil.copytree(os.path.join(_common.SRC_DIR, "..", "assets"), os.path.join(app_dir, "assets"))
+    with open(os.path.join(app_dir, "TrayFlag.ini"), "w") as f:
+        f.write(GUI_INI)
+    return app_dir
+
+def use_stub_providers(server):
+    """Points the provider chain at the stub servers whenever the app (re)configures it."""
+    import ip_fetcher, ip_providers
+    configure = ip_fetcher.configure
+    def configure_with_stubs(config):
+        configure(config)
+        ip_fetcher.set_providers([ip_providers.IpifyProvider(base_url=server.url("ipify"))],
+                                 ip_providers.IpinfoProvider(base_url=server.url("ipinfo")))
+    ip_fetcher.configure = configure_with_stubs
+
+def child(mode, workdir, started):
+    """Runs inside the measured subprocess: one check in headless --once mode, or in the tray app."""
+    if mode == "gui":
+        sys.path.insert(0, os.path.join(workdir, "app"))
+    with StubServer() as server:
+        use_stub_providers(server)
+        if mode == "headless":
+            import headless
+            code = headless.main(["--once", "--config", os.path.join(workdir, "bench.ini"),
+                                  "--state-dir", workdir, "--output", os.devnull])
+        else:
+            os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+            from PySide6 import QtWidgets
+            qt_app = QtWidgets.QApplication([])
+            qt_app.setQuitOnLastWindowClosed(False)
+            from app import App
+            tray = App()
+            # Exits once the first check is painted, like --once (3 = no network)
+            tray.update_handler.poll_listeners.append(lambda success, ip_changed: qt_app.exit(0 if success else 3))
+            code = qt_app.exec()
+        run_ms = (time.perf_counter() - started) * 1000 # without the stub server's shutdown
+        qt = sorted(m.split(".")[-1] for m in sys.modules if m.startswith("PySide6.Qt"))
+    sys.__stdout__.write(json.dumps({"code": code, "run_ms": run_ms, "qt_modules": qt}) + "\n")
+
+def run_child(mode, workdir):
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    proc = subprocess.run([sys.executable, __file__, "--child", mode, "--workdir", workdir],
+                          capture_output=True, text=True)
+    report = json.loads(proc.stdout.strip().splitlines()[-1])
+    # ru_maxrss of children is the largest child so far; the runs go from smallest to largest mode
+    peak_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss if resource else None
+    return report["run_ms"], peak_kb, report
+
+def bench_one_shot(runs, workdir):
+    install_app(workdir)
+    result = {}
+    for mode in ("headless", "gui"):
+        samples, peak_kb, report = [], None, None
+        for _ in range(runs):
+            wall_ms, peak_kb, report = run_child(mode, workdir)
+            samples.append(wall_ms)
+        result[mode] = {**summarize(samples), "peak_rss_kb": peak_kb, "exit_code": report["code"],
+                        "qt_modules": report["qt_modules"]}
+    return result
+
+def bench_throughput(seconds, workdir):
+    """Changes the stub IP after every event and forces the next check right away."""
+    from PySide6 import QtCore
+    from config import ConfigManager
+    import headless
+
+    class CountingStream:
+        def __init__(self):
+            self.lines = 0
+        def write(self, text):
+            self.lines += text.count("\n")
+        def flush(self):
+            pass
+
+    stub = StubConfig()
+    with StubServer(stub) as server:
+        use_stub_providers(server)
+        qt_app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+        stream = CountingStream()
+        runner = headless.HeadlessApp(ConfigManager(os.path.join(workdir, "bench.ini")), headless.EventWriter(stream),
+                                      state_dir=workdir)
+        latencies, counter = [], [0]
+        started = [time.perf_counter()]
+        def next_cycle(*args):
+            latencies.append((time.perf_counter() - started[0]) * 1000)
+            counter[0] += 1
+            stub.ip = f"198.51.{counter[0] // 250 % 250}.{counter[0] % 250 + 1}"
+            started[0] = time.perf_counter()
+            runner.update_handler.update_location_icon(is_forced_by_user=True)
+        runner.update_handler.ipDataReceived.connect(next_cycle)
+        QtCore.QTimer.singleShot(int(seconds * 1000), qt_app.quit)
+        begin = time.perf_counter()
+        cpu_start = _common.cpu_seconds()
+        runner.start()
+        qt_app.exec()
+        elapsed = time.perf_counter() - begin
+        cpu = _common.cpu_seconds() - cpu_start
+        runner.stop()
+    return {**summarize(latencies[1:]), "events": stream.lines, "events_per_s": round(stream.lines / elapsed, 1),
+            "cpu_ms_per_event": round(cpu * 1000 / max(1, stream.lines), 3)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--runs", type=int, default=3, help="one-shot subprocess runs per mode")
+    parser.add_argument("--child", choices=["headless", "gui"], help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child, args.workdir, STARTED)
+        return 0
+
+    import runtime_check
+    problem = runtime_check.refcount_problem()
+    if problem:
+        # The throughput run emits far more signals than such a runtime survives (see src/runtime_check.py)
+        print(problem, file=sys.stderr)
+        return 1
+
+    with tempfile.TemporaryDirectory() as workdir:
+        with open(os.path.join(workdir, "bench.ini"), "w") as f:
+            f.write(INI)
+        result = {
+            "benchmark": "headless",
+            "one_shot": bench_one_shot(args.runs, workdir),
+        }
+        result["throughput"] = bench_throughput(args.seconds, workdir)
+    print(json.dumps(result, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+# File: benchmarks/bench_history_store.py
+"""
+HistoryStore at scale: bulk load and single-append cost, file size per
+transition, and the latency of the range queries the app and audits use
+(newest entries for the menu, last 24 h, time per country) on a synthetic
+history with millions of transitions.
+
+    python benchmarks/bench_history_store.py --transitions 1000000
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+import _common
+from _common import summarize
+
+from history_store import HistoryStore
+
+COUNTRIES = ["US", "DE", "NL", "FR", "GB", "SE", "JP", "CH", "CA", "PL"]
+
+def synthetic_rows(count, end, rng):
+    """`count` transitions ending at `end`, on average a few minutes apart (a VPN hopping a lot)."""
+    ts = end - count * 300
+    for i in range(count):
+        ts += rng.uniform(30, 570)
+        country = rng.choice(COUNTRIES)
+        yield (min(ts, end), f"10.{i % 251}.{(i // 251) % 251}.{rng.randrange(1, 255)}",
+               country, f"City {country}", f"AS{64500 + i % 500} Example Net")
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--transitions", type=int, default=1000000)
+    parser.add_argument("--appends", type=int, default=500, help="single record() calls to time")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    now = time.time()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "history.db")
+        store = HistoryStore(path, retention_days=100000, max_entries=args.transitions * 2)
+
+        start = time.perf_counter()
+        store.append_many(synthetic_rows(args.transitions, now - 3600, rng))
+        load_s = time.perf_counter() - start
+        store.compact()
+        file_bytes = os.path.getsize(path)
+
+        append = timed(lambda: store.record({'ip': f"192.0.2.{rng.randrange(1, 255)}", 'country_code': "NL",
+                                             'city': "Amsterdam", 'isp': "Example Net"}), args.appends)
+        day = 24 * 3600
+        result = {
+            "benchmark": "history_store",
+            "transitions": args.transitions,
+            "bulk_load_s": round(load_s, 3),
+            "bulk_load_rows_per_s": int(args.transitions / load_s),
+            "file_bytes": file_bytes,
+            "bytes_per_transition": round(file_bytes / args.transitions, 1),
+            "record": append,
+            "recent_4": timed(lambda: store.recent(4), args.repeat),
+            "ips_last_24h": timed(lambda: store.ips_since(day), args.repeat),
+            "ips_last_24h_count": len(store.ips_since(day)),
+            "time_per_country_24h": timed(lambda: store.time_per_country(now - day), args.repeat),
+            "time_per_country_all": timed(lambda: store.time_per_country(0), max(1, args.repeat // 10)),
+            "last_seen_ip": timed(lambda: store.last_seen("10.7.0.1"), args.repeat),
+        }
+        store.retention_days = 30
+        start = time.perf_counter()
+        result["rotate_removed"] = store.rotate()
+        result["rotate_s"] = round(time.perf_counter() - start, 3)
+        start = time.perf_counter()
+        store.compact()
+        result["compact_s"] = round(time.perf_counter() - start, 3)
+        result["file_bytes_after_rotation"] = os.path.getsize(path)
+        store.close()
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
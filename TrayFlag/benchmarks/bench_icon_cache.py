@@ -0,0 +1,79 @@
+# File: benchmarks/bench_icon_cache.py
+"""
+Icon-switch latency: the old per-update path (QPixmap from disk + smooth
+scale every time) versus IconCache, cold from single files, cold from the
+atlas, and warm.
+
+    python benchmarks/bench_icon_cache.py --switches 2000
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+import _common
+from _common import summarize
+
+from PySide6 import QtGui, QtCore, QtWidgets
+from icon_cache import IconCache, build_atlas
+
+FLAGS_DIR = os.path.join(_common.SRC_DIR, "..", "assets", "flags")
+
+def old_load_icon(code, size=20):
+    """Copy of the previous App._load_icon for flags."""
+    path = os.path.join(FLAGS_DIR, f"{code}.png")
+    if not os.path.isfile(path): return None
+    pixmap = QtGui.QPixmap(path)
+    return QtGui.QIcon(pixmap.scaled(size, size, QtCore.Qt.AspectRatioMode.KeepAspectRatio, QtCore.Qt.TransformationMode.SmoothTransformation))
+
+def measure(fn, codes):
+    samples = []
+    for code in codes:
+        start = time.perf_counter()
+        fn(code)
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--switches", type=int, default=2000)
+    parser.add_argument("--working-set", type=int, default=6, help="distinct countries a user bounces between")
+    args = parser.parse_args()
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    all_codes = sorted(name[:-4] for name in os.listdir(FLAGS_DIR) if name.endswith(".png"))
+    rng = random.Random(3)
+    working_set = rng.sample(all_codes, args.working_set)
+    switches = [rng.choice(working_set) for _ in range(args.switches)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        atlas_path = os.path.join(tmp, "flags_atlas.png")
+        start = time.perf_counter()
+        build_atlas(FLAGS_DIR, atlas_path)
+        atlas_build_ms = (time.perf_counter() - start) * 1000
+
+        files_cache = IconCache(FLAGS_DIR)
+        atlas_cache = IconCache(FLAGS_DIR, atlas_path)
+        start = time.perf_counter()
+        atlas_cache.get(all_codes[0])
+        atlas_first_ms = (time.perf_counter() - start) * 1000
+
+        result = {
+            "benchmark": "icon_cache",
+            "switches": args.switches,
+            "working_set": args.working_set,
+            "old_per_update_load": measure(old_load_icon, switches),
+            "cache_cold_files": measure(files_cache.get, all_codes),
+            "cache_cold_atlas": measure(atlas_cache.get, all_codes[1:]),
+            "cache_warm": measure(files_cache.get, switches),
+            "atlas_build_ms": round(atlas_build_ms, 1),
+            "atlas_first_load_ms": round(atlas_first_ms, 3),
+            "atlas_size_kb": os.path.getsize(atlas_path) // 1024,
+        }
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
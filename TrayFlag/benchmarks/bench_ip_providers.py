@@ -0,0 +1,72 @@
+# File: benchmarks/bench_ip_providers.py
+"""
+Per-poll latency and CPU of the native in-process providers versus the
+subprocess path (one process spawned per poll, like the getip_*.ps1 backend).
+
+The subprocess path runs PowerShell's Invoke-RestMethod when PowerShell is
+installed, otherwise a one-shot Python/urllib process, against the same
+local stub server, so only the spawning cost differs.
+
+    python benchmarks/bench_ip_providers.py --polls 50
+"""
+
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import time
+
+import _common
+from _common import summarize, cpu_seconds
+from stub_servers import StubServer
+
+import ip_providers
+
+def _subprocess_command(url):
+    shell = shutil.which("pwsh") or shutil.which("powershell")
+    if shell:
+        return [shell, "-NoProfile", "-Command", f"(Invoke-RestMethod -Uri '{url}' -UseBasicParsing).ip"]
+    code = f"import json,urllib.request;print(json.load(urllib.request.urlopen('{url}'))['ip'])"
+    return [sys.executable, "-c", code]
+
+def bench_native(server, polls):
+    provider = ip_providers.IpifyProvider(base_url=server.url("ipify"), retries=1)
+    provider.fetch_ip() # warm up the connection pool
+    samples = []
+    cpu_start = cpu_seconds()
+    for _ in range(polls):
+        start = time.perf_counter()
+        provider.fetch_ip()
+        samples.append((time.perf_counter() - start) * 1000)
+    cpu = cpu_seconds() - cpu_start
+    return {**summarize(samples), "cpu_ms_per_poll": round(cpu * 1000 / polls, 3)}
+
+def bench_subprocess(server, polls):
+    command = _subprocess_command(f"{server.url('ipify')}?format=json")
+    samples = []
+    cpu_start = cpu_seconds()
+    for _ in range(polls):
+        start = time.perf_counter()
+        subprocess.run(command, capture_output=True, text=True, timeout=30, check=True)
+        samples.append((time.perf_counter() - start) * 1000)
+    cpu = cpu_seconds() - cpu_start
+    return {**summarize(samples), "cpu_ms_per_poll": round(cpu * 1000 / polls, 3), "command": command[0]}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--polls", type=int, default=50)
+    args = parser.parse_args()
+
+    with StubServer() as server:
+        result = {
+            "benchmark": "ip_providers",
+            "polls": args.polls,
+            "native": bench_native(server, args.polls),
+            "subprocess": bench_subprocess(server, args.polls),
+        }
+    ip_providers.close_session()
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# File: benchmarks/bench_ip_race.py
+"""
+Time-to-IP of sequential versus race mode when the first provider is slow
+or failing, using two local stub servers.
+
+    python benchmarks/bench_ip_race.py --checks 20 --slow-latency 2.0
+"""
+
+import argparse
+import json
+import time
+
+import _common
+from _common import summarize
+from stub_servers import StubServer, StubConfig
+
+import ip_fetcher
+import ip_providers
+
+def run_mode(mode, quorum, slow, fast, checks):
+    providers = [
+        ip_providers.IpifyProvider(base_url=slow.url("ipify"), retries=1, timeout=10),
+        ip_providers.MyIpProvider(base_url=fast.url("myip"), retries=1, timeout=10),
+    ]
+    ip_fetcher.set_providers(providers, None, mode=mode, quorum=quorum)
+    ip_fetcher.provider_stats = ip_fetcher.ProviderStats()
+    samples = []
+    for _ in range(checks):
+        start = time.perf_counter()
+        ip_fetcher.get_ip_data()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {**summarize(samples), "providers": ip_fetcher.get_provider_stats()}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--checks", type=int, default=20)
+    parser.add_argument("--slow-latency", type=float, default=2.0)
+    args = parser.parse_args()
+
+    with StubServer(StubConfig(latency=args.slow_latency)) as slow, StubServer() as fast:
+        result = {
+            "benchmark": "ip_race",
+            "slow_latency_s": args.slow_latency,
+            "sequential": run_mode("sequential", 1, slow, fast, args.checks),
+            "race": run_mode("race", 1, slow, fast, args.checks),
+            "race_quorum2": run_mode("race", 2, slow, fast, args.checks),
+        }
+    ip_providers.close_session()
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+# File: benchmarks/bench_pipeline.py
+"""
+End-to-end IP update pipeline: UpdateHandler checks on a QCoreApplication
+against the local ipify/myip/ipinfo stand-ins, one check at a time, each
+cycle timed from the request to the end of the check on the Qt thread (after the
+state update in the ipDataReceived slot). Per scenario: cycle latency, CPU
+per cycle of the app's own threads, thread counts, and for the long run
+the memory growth over --cycles cycles. The failure storm also reports how
+far the polling policy has backed off when the providers come back.
+
+    python benchmarks/bench_pipeline.py --cycles 10000
+
+Provider retries are kept (2 attempts each) but --retry-delay replaces the
+1 s production delay, so a storm cycle takes ~0.1 s instead of ~4 s.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from PySide6 import QtCore
+
+import _common
+from _common import summarize, cpu_seconds, thread_cpu_seconds, rss_kb, os_thread_count
+from stub_servers import StubServer, StubConfig
+
+INI = ("[cache]\nenabled=false\n[history]\nenabled=false\n[idle]\nenabled=false\n"
+       "[network]\nwatch_events=false\nprecheck=false\n[logging]\nlevel=WARNING\nfile=false\n")
+APP_THREAD_PREFIXES = ("MainThread", "ip-") # the Qt thread, check workers and race executor
+
+def app_threads_cpu():
+    """CPU seconds of the app's threads, without the in-process stub server's."""
+    total = 0.0
+    for thread in threading.enumerate():
+        if thread.name.startswith(APP_THREAD_PREFIXES):
+            total += thread_cpu_seconds(thread.native_id) or 0.0
+    return total
+
+
+class PipelineRig(QtCore.QObject):
+    """
+    UpdateHandler wired like the app (state updated in the ipDataReceived slot),
+    driven one check at a time. A QObject, so its slots run on the Qt thread.
+    """
+    def __init__(self, server, workdir, retry_delay):
+        super().__init__()
+        import app_logging
+        import ip_fetcher, ip_providers
+        from config import ConfigManager
+        from state_manager import AppState
+        from scheduler import Scheduler
+        from update_handler import UpdateHandler
+
+        self.qt_app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+        ini_path = os.path.join(workdir, "bench.ini")
+        with open(ini_path, "w") as f:
+            f.write(INI)
+        config = ConfigManager(ini_path)
+        app_logging.configure(config, console=False)
+        self.state = AppState(snapshot_path=os.path.join(workdir, "state.json"))
+        self.scheduler = Scheduler()
+        self.handler = UpdateHandler(config, self.state, self.scheduler)
+        provider_args = {'timeout': 2, 'retries': 2, 'retry_delay': retry_delay}
+        ip_fetcher.set_providers([ip_providers.IpifyProvider(base_url=server.url("ipify"), **provider_args),
+                                  ip_providers.MyIpProvider(base_url=server.url("myip"), **provider_args)],
+                                 ip_providers.IpinfoProvider(base_url=server.url("ipinfo"), **provider_args),
+                                 mode="sequential")
+        self.handler.ipDataReceived.connect(self.on_ip_data_received)
+        self.handler.poll_listeners.append(self.on_poll_finished)
+        self._loop = None
+        self._finished = None
+
+    @QtCore.Slot(object, bool)
+    def on_ip_data_received(self, ip_data, is_forced):
+        if not ip_data or ip_data.get('ip') == "N/A":
+            self.state.clear_network_state()
+        else:
+            self.state.update_location(ip_data.get('full_data') or {})
+
+    def run(self, cycles, forced=False, before_cycle=None, rss_every=0):
+        """Runs `cycles` checks back to back and returns the measurements."""
+        latencies, failures, rss_samples = [], [0], []
+        threads = {'python_peak': threading.active_count(), 'os_peak': os_thread_count()}
+        done = [0]
+        started = [0.0]
+
+        def start_cycle():
+            if before_cycle:
+                before_cycle(done[0])
+            self.scheduler.cancel("ip_poll") # the next check is ours, not the policy's
+            started[0] = time.perf_counter()
+            self.handler.update_location_icon(is_forced_by_user=forced)
+
+        def finished(success, ip_changed):
+            latencies.append((time.perf_counter() - started[0]) * 1000)
+            failures[0] += not success
+            done[0] += 1
+            threads['python_peak'] = max(threads['python_peak'], threading.active_count())
+            if threads['os_peak'] is not None:
+                threads['os_peak'] = max(threads['os_peak'], os_thread_count())
+            if rss_every and done[0] % rss_every == 0:
+                rss_samples.append((done[0], rss_kb()))
+            if done[0] >= cycles:
+                self._loop.quit()
+            else:
+                start_cycle()
+
+        self._finished = finished
+        self._loop = QtCore.QEventLoop()
+        cpu_start, app_cpu_start = cpu_seconds(), app_threads_cpu()
+        begin = time.perf_counter()
+        QtCore.QTimer.singleShot(0, start_cycle)
+        self._loop.exec()
+        elapsed = time.perf_counter() - begin
+        result = {
+            **summarize(latencies),
+            "cycles_per_s": round(cycles / elapsed, 1),
+            "failed_cycles": failures[0],
+            "cpu_ms_per_cycle": round((app_threads_cpu() - app_cpu_start) * 1000 / cycles, 3),
+            "process_cpu_ms_per_cycle": round((cpu_seconds() - cpu_start) * 1000 / cycles, 3),
+            "python_threads_peak": threads['python_peak'],
+            "os_threads_peak": threads['os_peak'],
+        }
+        return result, rss_samples
+
+    def on_poll_finished(self, success, ip_changed):
+        self._finished(success, ip_changed)
+
+    def stop(self):
+        self.handler.stop()
+
+
+def memory_growth(samples):
+    """RSS growth after the first tenth of the run (warm-up: pools, caches, lazy imports)."""
+    samples = [(cycle, kb) for cycle, kb in samples if kb is not None]
+    if len(samples) < 2:
+        return {}
+    warm = samples[max(0, len(samples) // 10 - 1)]
+    last = samples[-1]
+    cycles = max(1, last[0] - warm[0])
+    return {"rss_start_kb": samples[0][1], "rss_warm_kb": warm[1], "rss_end_kb": last[1],
+            "rss_growth_kb": last[1] - warm[1],
+            "rss_growth_kb_per_1k_cycles": round((last[1] - warm[1]) * 1000 / cycles, 2)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cycles", type=int, default=10000, help="cycles of the long run (memory growth)")
+    parser.add_argument("--sample-cycles", type=int, default=300, help="cycles of each short scenario")
+    parser.add_argument("--storm-cycles", type=int, default=30)
+    parser.add_argument("--retry-delay", type=float, default=0.05)
+    parser.add_argument("--payload-bytes", type=int, default=600, help="filler in each answer (real ipinfo: ~300-800 B)")
+    args = parser.parse_args()
+
+    import runtime_check
+    problem = runtime_check.refcount_problem()
+    if problem:
+        # Thousands of checks would abort the interpreter midway (see src/runtime_check.py)
+        print(problem, file=sys.stderr)
+        return 1
+    stub = StubConfig(payload_bytes={"ipinfo": args.payload_bytes})
+    result = {"benchmark": "pipeline", "cycles": args.cycles, "retry_delay_s": args.retry_delay}
+    with tempfile.TemporaryDirectory() as workdir, StubServer(stub) as server:
+        threads_before = {'python': threading.active_count(), 'os': os_thread_count()}
+        rig = PipelineRig(server, workdir, args.retry_delay)
+        rig.run(20, forced=True) # warm-up: connection pool, worker threads, imports
+
+        def change_ip(i):
+            stub.ip = f"198.51.{i // 250 % 250}.{i % 250 + 1}"
+
+        scenarios = {}
+        stub.ip = "203.0.113.7"
+        scenarios["poll_unchanged"], _ = rig.run(args.sample_cycles)
+        scenarios["forced_unchanged"], _ = rig.run(args.sample_cycles, forced=True)
+        scenarios["ip_changes"], _ = rig.run(args.sample_cycles, before_cycle=change_ip)
+
+        stub.latency = {"ipify": 0.02, "ipinfo": 0.05}
+        scenarios["slow_providers"], _ = rig.run(max(10, args.sample_cycles // 10), before_cycle=change_ip)
+        stub.latency = 0.0
+
+        stub.failure_rate, stub.malformed_rate = 0.2, {"ipify": 0.1}
+        scenarios["flaky_providers"], _ = rig.run(args.sample_cycles, before_cycle=change_ip)
+        stub.failure_rate, stub.malformed_rate = 0.0, 0.0
+
+        # Failure storm: every provider down. Polls (not clicks), so the polling policy backs off.
+        stub.failure_rate = {"ipify": 1.0, "myip": 1.0}
+        storm, _ = rig.run(args.storm_cycles)
+        storm["backoff_after_storm_s"] = round(rig.scheduler.remaining("ip_poll") or 0.0, 1)
+        storm["state_after_storm"] = rig.state.last_known_external_ip
+        stub.failure_rate = 0.0
+        recovery_started = time.perf_counter()
+        rig.run(1)
+        storm["recovery_cycle_ms"] = round((time.perf_counter() - recovery_started) * 1000, 3)
+        storm["recovered_ip"] = rig.state.last_known_external_ip
+        scenarios["failure_storm"] = storm
+
+        rss_every = max(1, args.cycles // 50)
+        long_run, samples = rig.run(args.cycles, before_cycle=change_ip, rss_every=rss_every)
+        scenarios["long_run"] = {**long_run, **memory_growth(samples)}
+        result["scenarios"] = scenarios
+
+        rig.stop()
+        time.sleep(0.2) # let the workers go idle before the final count
+        result["threads"] = {"python_before": threads_before['python'], "os_before": threads_before['os'],
+                             "python_after": threading.active_count(), "os_after": os_thread_count(),
+                             "names_after": sorted({t.name.rstrip("0123456789") for t in threading.enumerate()})}
+        result["stub_requests"] = dict(stub.requests)
+    print(json.dumps(result, indent=2), flush=True)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+# File: benchmarks/bench_sound_engine.py
+"""
+Cue latency, threads, memory and volume-change cost of the PlaybackEngine
+(one long-lived, mixing output stream) versus the previous approach (a new
+thread with sd.play()/sd.wait(), i.e. a new stream, per cue).
+
+Without an audio device (or without sounddevice/PortAudio) both are run
+against FakeOutputStream, which pulls blocks on a thread at real-time pace;
+`--open-cost-ms` models the device open time of a new stream.
+
+    python benchmarks/bench_sound_engine.py --cues 6 --burst 3
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+import _common
+from _common import summarize
+
+import numpy as np
+import soundfile as sf
+
+from sound_manager import PlaybackEngine, SoundManager, VOLUME_GAINS
+
+SOUNDS_DIR = os.path.normpath(os.path.join(_common.SRC_DIR, "..", "assets", "sounds"))
+
+class FakeOutputStream:
+    """Minimal sounddevice.OutputStream stand-in: calls `callback` every block on its own thread."""
+    def __init__(self, samplerate, channels, dtype, callback, blocksize=480, open_cost=0.0, on_block=None):
+        time.sleep(open_cost)
+        self.samplerate = samplerate
+        self.channels = channels
+        self.callback = callback
+        self.blocksize = blocksize
+        self.on_block = on_block
+        self.active = False
+        self._thread = None
+
+    def start(self):
+        self.active = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.active = False
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def close(self):
+        self.stop()
+
+    def _run(self):
+        out = np.zeros((self.blocksize, self.channels), dtype=np.float32)
+        period = self.blocksize / self.samplerate
+        next_time = time.perf_counter()
+        while self.active:
+            try:
+                self.callback(out, self.blocksize, None, None)
+            except Exception: # CallbackStop or Abort
+                self.active = False
+                return
+            if self.on_block:
+                self.on_block(out)
+            next_time += period
+            time.sleep(max(0.0, next_time - time.perf_counter()))
+
+
+class _Config:
+    sound = True
+    volume_level = "medium"
+
+
+def bench_engine(manager, cues, burst, gap, open_cost):
+    """Latency from play() to the first audible block, via one shared engine."""
+    first_audible = []
+    def on_block(out):
+        if first_audible and first_audible[-1] is None and np.any(out):
+            first_audible[-1] = time.perf_counter()
+    engine = PlaybackEngine(stream_factory=lambda **kw: FakeOutputStream(open_cost=open_cost, on_block=on_block, **kw),
+                            callback_stop=StopIteration)
+    manager.engine = engine
+    samples, peak_threads = [], threading.active_count()
+    for _ in range(cues):
+        first_audible.append(None)
+        start = time.perf_counter()
+        for _ in range(burst):
+            manager.play_alert()
+        while first_audible[-1] is None:
+            time.sleep(0.0005)
+        samples.append((first_audible[-1] - start) * 1000)
+        peak_threads = max(peak_threads, threading.active_count())
+        time.sleep(gap)
+    engine.close()
+    return {**summarize(samples), "peak_threads": peak_threads, "played": engine.played, "dropped": engine.dropped}
+
+def bench_per_play_thread(samples_by_name, cues, burst, gap, open_cost):
+    """The previous SoundManager: one thread and one new stream per cue, played to the end."""
+    first_audible = []
+    samples, peak_threads = [], threading.active_count()
+    def play(data):
+        done = threading.Event()
+        pos = [0]
+        def on_block(out):
+            if first_audible and first_audible[-1] is None and np.any(out):
+                first_audible[-1] = time.perf_counter()
+        def callback(out, frames, time_info, status):
+            chunk = data[pos[0]:pos[0] + frames]
+            out.fill(0)
+            out[:len(chunk)] = chunk
+            pos[0] += frames
+            if pos[0] >= len(data):
+                done.set()
+                raise RuntimeError("complete")
+        stream = FakeOutputStream(48000, 2, "float32", callback, open_cost=open_cost, on_block=on_block)
+        stream.start()
+        done.wait()
+    for _ in range(cues):
+        first_audible.append(None)
+        start = time.perf_counter()
+        for _ in range(burst):
+            threading.Thread(target=play, args=(samples_by_name["alert"],), daemon=True).start()
+        while first_audible[-1] is None:
+            time.sleep(0.0005)
+        samples.append((first_audible[-1] - start) * 1000)
+        peak_threads = max(peak_threads, threading.active_count())
+        time.sleep(gap)
+    return {**summarize(samples), "peak_threads": peak_threads, "overlapping_streams_per_cue": burst}
+
+def memory_and_reload():
+    """Decoded sample memory and the cost of a volume change, old versus new."""
+    old_files = ["notification.wav", "alert.wav"] # the old code decoded one such pair per level
+    manager = SoundManager(_Config(), sounds_dir=SOUNDS_DIR)
+    manager.load() # imports the libraries outside the measurement
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    old = [sf.read(os.path.join(SOUNDS_DIR, name), dtype="float32")[0] for name in old_files]
+    old_reload_ms = (time.perf_counter() - start) * 1000
+    old_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    manager = SoundManager(_Config(), sounds_dir=SOUNDS_DIR)
+    manager.load()
+    new_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    start = time.perf_counter()
+    manager.config.volume_level = "high"
+    manager.reload_sounds()
+    new_reload_ms = (time.perf_counter() - start) * 1000
+
+    asset_bytes = sum(os.path.getsize(os.path.join(SOUNDS_DIR, name)) for name in old_files)
+    return manager, {
+        "decoded_bytes_old": old_bytes,
+        "decoded_bytes_new": new_bytes,
+        "asset_bytes_old": asset_bytes * len(VOLUME_GAINS), # three recordings per sound
+        "asset_bytes_new": asset_bytes,
+        "volume_change_ms_old": round(old_reload_ms, 3),
+        "volume_change_ms_new": round(new_reload_ms, 3),
+        "old_decoded_sample_count": sum(len(o) for o in old),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cues", type=int, default=6)
+    parser.add_argument("--burst", type=int, default=3, help="cues fired at once (e.g. alert storms)")
+    parser.add_argument("--gap", type=float, default=1.2, help="seconds between cue bursts (longer than the alert)")
+    parser.add_argument("--open-cost-ms", type=float, default=30.0, help="modelled cost of opening a stream")
+    args = parser.parse_args()
+
+    manager, memory = memory_and_reload()
+    open_cost = args.open_cost_ms / 1000
+    result = {
+        "benchmark": "sound_engine",
+        "stream": "fake",
+        "open_cost_ms": args.open_cost_ms,
+        "memory": memory,
+        "per_play_thread": bench_per_play_thread(manager.sounds, args.cues, args.burst, args.gap, open_cost),
+        "engine": bench_engine(manager, args.cues, args.burst, args.gap, open_cost),
+    }
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# File: benchmarks/bench_status_api.py
+"""
+Status API under scrape load: requests per second and latency with several
+keep-alive clients, CPU used by the server thread, and the cost of
+publish() on the Qt thread (the only work the API adds there).
+
+    python benchmarks/bench_status_api.py --clients 8 --seconds 3
+"""
+
+import argparse
+import http.client
+import json
+import threading
+import time
+
+import _common
+from _common import summarize, thread_cpu_seconds
+
+from status_server import StatusServer, render_metrics
+
+TOKEN = "bench-token"
+
+def sample_documents(providers=4, history=3):
+    status = {
+        'location': {'ip': "203.0.113.7", 'country_code': "NL", 'city': "Amsterdam", 'isp': "AS64500 Example Net"},
+        'external_ip': "203.0.113.7", 'stale': False, 'idle': False, 'last_update_time': time.time(),
+        'history': [{'ip': f"198.51.100.{i}", 'country_code': "DE", 'city': "Berlin", 'isp': "Example", 'time': 0}
+                    for i in range(history)],
+        'scheduler': {'wakeups': 1234, 'tasks': {"ip_poll": {'next_run_at': time.time() + 7, 'period_s': None}}},
+    }
+    metrics = [("trayflag_polls_total", "counter", "IP checks finished", 1000),
+               ("trayflag_poll_failures_total", "counter", "IP checks without an external IP", 12)]
+    for name in ("attempts", "successes", "wins"):
+        metrics.append((f"trayflag_provider_{name}_total", "counter", name,
+                        {(('provider', f"p{i}"),): 100 + i for i in range(providers)}))
+    return status, metrics
+
+def client(port, path, deadline, samples, errors):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    headers = {"Authorization": f"Bearer {TOKEN}"}
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(str(e))
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            continue
+        samples.append((time.perf_counter() - start) * 1000)
+    conn.close()
+
+def bench_scrapes(server, clients, seconds, path):
+    samples, errors = [], []
+    cpu_before = thread_cpu_seconds(server._thread.native_id)
+    deadline = time.perf_counter() + seconds
+    threads = [threading.Thread(target=client, args=(server.port, path, deadline, samples, errors))
+               for _ in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    cpu_after = thread_cpu_seconds(server._thread.native_id)
+    result = {**summarize(samples), "requests_per_s": round(len(samples) / seconds, 1), "errors": len(errors)}
+    if cpu_before is not None:
+        server_cpu = cpu_after - cpu_before
+        result["server_cpu_ms_per_request"] = round(server_cpu * 1000 / max(1, len(samples)), 4)
+        result["server_cpu_share"] = round(server_cpu / seconds, 3)
+    return result
+
+def bench_publish(repeat):
+    """publish() runs on the Qt thread after every check: JSON + metrics rendering."""
+    status, metrics = sample_documents()
+    server = StatusServer(TOKEN, port=0)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        server.publish(status, metrics)
+        samples.append((time.perf_counter() - start) * 1000)
+    return {**summarize(samples), "metrics_bytes": len(render_metrics(metrics))}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    server = StatusServer(TOKEN, port=0).start()
+    server.publish(*sample_documents())
+    result = {
+        "benchmark": "status_api",
+        "clients": args.clients,
+        "publish": bench_publish(1000),
+        "status": bench_scrapes(server, args.clients, args.seconds, "/status"),
+        "metrics": bench_scrapes(server, args.clients, args.seconds, "/metrics"),
+    }
+    server.stop()
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
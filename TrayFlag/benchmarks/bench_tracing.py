@@ -0,0 +1,96 @@
+# File: benchmarks/bench_tracing.py
+"""
+Cost of the tracing spans: nanoseconds per instrumented stage with tracing
+disabled (the default) and enabled, against the bare stage; cross-thread
+record(), summary() over a full ring buffer, and the Chrome trace export.
+
+    python benchmarks/bench_tracing.py --iterations 1000000
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import _common
+from _common import summarize
+
+import tracing
+
+def stage():
+    pass
+
+def per_call_ns(func, iterations):
+    start = time.perf_counter_ns()
+    func(iterations)
+    return (time.perf_counter_ns() - start) / iterations
+
+def bare(iterations):
+    for _ in range(iterations):
+        stage()
+
+def with_span(iterations):
+    for _ in range(iterations):
+        with tracing.span("bench.stage", task="poll"):
+            stage()
+
+def with_record(iterations):
+    for _ in range(iterations):
+        started = tracing.now()
+        stage()
+        tracing.record("bench.delivery", started)
+
+def bench_overhead(iterations, repeat=5):
+    """Best of `repeat` runs, so scheduling noise does not count as overhead."""
+    result = {}
+    base = min(per_call_ns(bare, iterations) for _ in range(repeat))
+    result["bare_ns"] = round(base, 1)
+    for enabled in (False, True):
+        tracing.enable() if enabled else tracing.disable()
+        label = "enabled" if enabled else "disabled"
+        span_ns = min(per_call_ns(with_span, iterations) for _ in range(repeat))
+        record_ns = min(per_call_ns(with_record, iterations) for _ in range(repeat))
+        result[f"span_{label}_overhead_ns"] = round(span_ns - base, 1)
+        result[f"record_{label}_overhead_ns"] = round(record_ns - base, 1)
+    tracing.disable()
+    return result
+
+def bench_reports(capacity, repeat):
+    tracing.enable(capacity)
+    tracing.clear()
+    names = ["scheduler.fire", "check", "ip.provider", "geo.lookup", "signal.delivery", "gui.icon", "gui.menu"]
+    for i in range(capacity):
+        with tracing.span(names[i % len(names)], n=i):
+            pass
+    summary_ms, export_ms = [], []
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "trace.json")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            tracing.summary()
+            summary_ms.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            tracing.export_chrome_trace(path)
+            export_ms.append((time.perf_counter() - start) * 1000)
+        size = os.path.getsize(path)
+    tracing.disable()
+    return {"spans": capacity, "summary": summarize(summary_ms), "export": summarize(export_ms),
+            "export_bytes": size}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=1000000)
+    parser.add_argument("--capacity", type=int, default=4096)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    result = {
+        "benchmark": "tracing",
+        "overhead": bench_overhead(args.iterations),
+        "reports": bench_reports(args.capacity, args.repeat),
+    }
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# File: benchmarks/bench_update_check.py
+"""
+Requests made by the version check against a local server that counts them.
+
+Three phases: a fresh cached answer (no request at all), an expired answer
+revalidated with If-None-Match (304), and a changed file (200). A restart
+in between reloads the ETag from the JSON state file.
+
+    python benchmarks/bench_update_check.py --checks 20
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import _common
+from _common import summarize
+from stub_servers import StubServer
+
+from update_checker import UpdateChecker
+
+def run_checks(checker, checks):
+    samples = []
+    for _ in range(checks):
+        start = time.perf_counter()
+        checker.check()
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--checks", type=int, default=20)
+    args = parser.parse_args()
+
+    results = {}
+    with StubServer() as server, tempfile.TemporaryDirectory() as tmp:
+        cfg = server.config
+        state_path = os.path.join(tmp, "update.json")
+        url = server.url("version")
+
+        checker = UpdateChecker(url, state_path)
+        results["fresh"] = run_checks(checker, args.checks)
+        results["fresh"]["server_requests"] = cfg.requests["version"]
+
+        # Restart with an expired answer: only cheap 304 revalidations
+        cfg.version_cache_control = "no-cache"
+        with open(state_path, encoding="utf-8") as f:
+            state = json.load(f)
+        state["max_age"] = 0
+        with open(state_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        before = cfg.requests["version"]
+        checker = UpdateChecker(url, state_path)
+        results["revalidate"] = run_checks(checker, args.checks)
+        results["revalidate"]["server_requests"] = cfg.requests["version"] - before
+        results["revalidate"]["not_modified"] = cfg.not_modified
+
+        # A new release: the first check downloads it, the next ones get 304 again
+        cfg.version_text = "VER:9.0.0\nLINK:https://example.invalid/TrayFlag-9.zip\n"
+        before = cfg.requests["version"]
+        results["changed"] = run_checks(checker, args.checks)
+        results["changed"]["server_requests"] = cfg.requests["version"] - before
+        results["changed"]["latest"] = checker.check()[0]
+        results["checker"] = checker.stats()
+
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
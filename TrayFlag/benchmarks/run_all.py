@@ -0,0 +1,175 @@
+# File: benchmarks/run_all.py
+"""
+Runs the benchmark suite and writes one JSON document with every result,
+the app version and the machine, so runs can be compared between versions:
+
+    python benchmarks/run_all.py --output results-1.16.0.json
+    python benchmarks/run_all.py --quick --compare results-1.15.0.json
+
+Each benchmark runs in its own process (some replace global state or exit
+without finalizing). --compare lists the metrics that moved by more than
+--threshold; --fail-on-regression makes the exit code report them.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import _common
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# name -> (full arguments, --quick arguments)
+SUITE = {
+    "bench_pipeline": ([], ["--cycles", "2000", "--sample-cycles", "100", "--storm-cycles", "10"]),
+    "bench_ip_providers": ([], ["--polls", "10"]),
+    "bench_ip_race": ([], ["--checks", "5", "--slow-latency", "0.5"]),
+    "bench_update_check": ([], ["--checks", "5"]),
+    "bench_headless": ([], ["--seconds", "2", "--runs", "1"]),
+    "bench_status_api": ([], ["--clients", "4", "--seconds", "1"]),
+    "bench_history_store": ([], ["--transitions", "100000", "--repeat", "5"]),
+    "bench_geoip_db": ([], ["--lookups", "20000"]),
+    "bench_icon_cache": ([], ["--switches", "500"]),
+    "bench_logging": ([], ["--iterations", "20000"]),
+    "bench_tracing": ([], ["--iterations", "200000", "--repeat", "5"]),
+    "bench_audio_tracker": ([], ["--seconds", "1"]),
+    "bench_sound_engine": ([], []),
+    "soak": ([], ["--cycles", "2000", "--sample-every", "500", "--reload-every", "100"]),
+    "sim_idle_wakeups": ([], []),
+    "sim_polling_policy": ([], []),
+}
+
+# Metric name suffixes and which direction is worse
+LOWER_IS_BETTER = ("_ms", "_us", "_ns", "_kb", "_bytes", "_s", "_share", "_per_1k_cycles")
+HIGHER_IS_BETTER = ("_per_s",)
+
+def benchmark_env():
+    env = dict(os.environ)
+    if sys.platform.startswith("linux") and not (env.get("DISPLAY") or env.get("WAYLAND_DISPLAY")):
+        env.setdefault("QT_QPA_PLATFORM", "offscreen") # GUI benchmarks on a headless runner
+    return env
+
+def run_benchmark(name, args, timeout):
+    start = time.perf_counter()
+    try:
+        proc = subprocess.run([sys.executable, os.path.join(HERE, f"{name}.py"), *args],
+                              capture_output=True, text=True, timeout=timeout, env=benchmark_env())
+    except subprocess.TimeoutExpired:
+        return {"error": f"timed out after {timeout}s"}
+    elapsed = round(time.perf_counter() - start, 1)
+    if proc.returncode != 0:
+        return {"error": f"exit code {proc.returncode}", "stderr": proc.stderr[-2000:], "wall_s": elapsed}
+    # Every benchmark ends with one JSON document on stdout, starting at the beginning of a line
+    lines = proc.stdout.splitlines()
+    start = next((i for i, line in enumerate(lines) if line.startswith("{")), len(lines))
+    try:
+        return {"result": json.loads("\n".join(lines[start:])), "wall_s": elapsed}
+    except ValueError as e:
+        return {"error": f"no JSON output ({e})", "stdout": proc.stdout[-2000:], "wall_s": elapsed}
+
+def environment():
+    from constants import __version__
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                                capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except OSError:
+        commit = None
+    try:
+        import PySide6
+        pyside = PySide6.__version__
+    except ImportError:
+        pyside = None
+    return {
+        "app_version": __version__,
+        "commit": commit,
+        "python": platform.python_version(),
+        "pyside6": pyside,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "started_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+    }
+
+def flatten(value, prefix=""):
+    """{'a': {'b_ms': 1}} -> {'a.b_ms': 1}, numbers only."""
+    if isinstance(value, dict):
+        items = {}
+        for key, child in value.items():
+            items.update(flatten(child, f"{prefix}.{key}" if prefix else str(key)))
+        return items
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix: value}
+    return {}
+
+def compare(current, baseline, threshold):
+    """Returns (regressions, improvements): lists of (metric, old, new, relative change)."""
+    old = {name: flatten(run.get("result")) for name, run in baseline["benchmarks"].items()}
+    regressions, improvements = [], []
+    for name, run in current["benchmarks"].items():
+        for metric, new_value in flatten(run.get("result")).items():
+            old_value = old.get(name, {}).get(metric)
+            if old_value is None or old_value == new_value:
+                continue
+            if metric.endswith(HIGHER_IS_BETTER):
+                worse = new_value < old_value
+            elif metric.endswith(LOWER_IS_BETTER):
+                worse = new_value > old_value
+            else:
+                continue # counts and settings, not costs
+            change = (new_value - old_value) / abs(old_value) if old_value else float("inf")
+            if abs(change) < threshold:
+                continue
+            (regressions if worse else improvements).append((f"{name}.{metric}", old_value, new_value, change))
+    return regressions, improvements
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--output", metavar="PATH", help="write the results here (default: stdout)")
+    parser.add_argument("--quick", action="store_true", help="smaller runs, for a fast check")
+    parser.add_argument("--only", nargs="+", choices=sorted(SUITE), metavar="NAME", help="run only these")
+    parser.add_argument("--timeout", type=float, default=1800, help="seconds per benchmark")
+    parser.add_argument("--compare", metavar="BASELINE", help="results of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative change worth reporting (default: 0.2)")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    report = {"suite": "trayflag", "quick": args.quick, "environment": environment(), "benchmarks": {}}
+    for name in args.only or SUITE:
+        full_args, quick_args = SUITE[name]
+        sys.stderr.write(f"{name} ... ")
+        sys.stderr.flush()
+        run = run_benchmark(name, quick_args if args.quick else full_args, args.timeout)
+        sys.stderr.write(f"{run.get('error', 'ok')} ({run.get('wall_s', '-')} s)\n")
+        report["benchmarks"][name] = run
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    failed = [name for name, run in report["benchmarks"].items() if "error" in run]
+    regressions = []
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions, improvements = compare(report, baseline, args.threshold)
+        base_env = baseline.get("environment", {})
+        sys.stderr.write(f"\nCompared with {base_env.get('app_version')} ({base_env.get('commit')}), "
+                         f"threshold {args.threshold:.0%}:\n")
+        for title, rows in (("Regressions", regressions), ("Improvements", improvements)):
+            sys.stderr.write(f"{title}: {len(rows)}\n")
+            for metric, old_value, new_value, change in sorted(rows, key=lambda row: -abs(row[3])):
+                sys.stderr.write(f"  {metric}: {old_value} -> {new_value} ({change:+.0%})\n")
+    if failed:
+        sys.stderr.write(f"Failed: {', '.join(failed)}\n")
+    return 1 if failed or (regressions and args.fail_on_regression) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
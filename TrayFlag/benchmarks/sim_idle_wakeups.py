@@ -0,0 +1,185 @@
+# File: benchmarks/sim_idle_wakeups.py
+"""
+Simulated-clock harness for idle detection. Replays a day of user activity
+(work sessions with input every few seconds, breaks, a night away) and
+counts timer wakeups per hour spent on idle detection, plus how late idle
+mode was entered and left.
+
+"pulse" is the previous design: a 1 s timer that runs forever, with the
+idle check done at every IP poll. "polling" and "push" use IdleMonitor
+with a polling and a push backend.
+
+    python benchmarks/sim_idle_wakeups.py --hours 24 --threshold-mins 15
+"""
+
+import argparse
+import bisect
+import json
+import random
+
+import _common
+from scheduler import TaskQueue
+from idle_detector import IdleBackend, IdleMonitor
+
+class SimulatedActivity:
+    """Input timestamps: sessions of `session` s with input every 1-10 s, separated by breaks."""
+    def __init__(self, duration, session=3600, seed=3):
+        rng = random.Random(seed)
+        self.inputs = []
+        t = 0.0
+        while t < duration:
+            end = min(duration, t + rng.uniform(0.5, 1.5) * session)
+            while t < end:
+                self.inputs.append(t)
+                t += rng.uniform(1, 10)
+            # Short breaks mostly, sometimes a long one
+            t += rng.choice([120, 300, 900, 1800, 3 * 3600])
+
+    def last_input(self, t):
+        i = bisect.bisect_right(self.inputs, t)
+        return self.inputs[i - 1] if i else float("-inf")
+
+    def next_input(self, t):
+        i = bisect.bisect_right(self.inputs, t)
+        return self.inputs[i] if i < len(self.inputs) else None
+
+
+class SimScheduler:
+    """Scheduler API on a virtual clock; one wakeup per distinct due time."""
+    def __init__(self):
+        self.now = 0.0
+        self.queue = TaskQueue(random.Random(1))
+        self.wakeups = 0
+
+    def add_periodic(self, name, period, callback, jitter=0.0, first_delay=None):
+        delay = period if first_delay is None else first_delay
+        self.queue.add(name, callback, delay, period, jitter, self.now)
+
+    def schedule_once(self, name, delay, callback):
+        self.queue.add(name, callback, delay, None, 0.0, self.now)
+
+    def cancel(self, name):
+        self.queue.cancel(name)
+
+    def run_until(self, t):
+        while True:
+            deadline = self.queue.next_deadline()
+            if deadline is None or deadline > t:
+                break
+            self.now = deadline
+            self.wakeups += 1
+            for task in self.queue.pop_due(self.now):
+                task.callback()
+        self.now = t
+
+
+class SimBackend(IdleBackend):
+    available = True
+
+    def __init__(self, activity, clock, push):
+        self.activity = activity
+        self.clock = clock
+        self.push = push
+        self.name = "push" if push else "polling"
+
+    def idle_seconds(self):
+        return self.clock() - self.activity.last_input(self.clock())
+
+
+def _latencies(activity, threshold, entered, left):
+    """Delay of entering idle mode after the threshold was reached, and of leaving it after input."""
+    enter_delays = []
+    for t in entered:
+        enter_delays.append(t - (activity.last_input(t) + threshold))
+    wake_delays = []
+    for t in left:
+        wake_delays.append(t - activity.last_input(t))
+    def avg(values):
+        return round(sum(values) / len(values), 1) if values else None
+    return {
+        "idle_periods": len(entered),
+        "enter_delay_avg_s": avg(enter_delays),
+        "enter_delay_max_s": round(max(enter_delays), 1) if enter_delays else None,
+        "wake_delay_avg_s": avg(wake_delays),
+        "wake_delay_max_s": round(max(wake_delays), 1) if wake_delays else None,
+    }
+
+def simulate_pulse(activity, duration, threshold, poll_interval):
+    """The previous design: 1 s pulse forever, idle entered at the first IP poll past the threshold."""
+    sched = SimScheduler()
+    state = {"idle": False, "pulses": 0}
+    entered, left = [], []
+    idle_seconds = lambda: sched.now - activity.last_input(sched.now)
+
+    def pulse():
+        state["pulses"] += 1
+        if state["idle"] and idle_seconds() < threshold:
+            state["idle"] = False
+            left.append(sched.now)
+            sched.schedule_once("ip_poll", poll_interval, poll)
+
+    def poll():
+        if not state["idle"] and idle_seconds() >= threshold:
+            state["idle"] = True
+            entered.append(sched.now)
+        sched.schedule_once("ip_poll", poll_interval, poll)
+
+    sched.add_periodic("idle_wake_check", 1.0, pulse)
+    sched.schedule_once("ip_poll", poll_interval, poll)
+    sched.run_until(duration)
+    # IP polls are not idle detection; count the pulse alone
+    return {"wakeups_per_hour": round(state["pulses"] / (duration / 3600), 1),
+            **_latencies(activity, threshold, entered, left)}
+
+def simulate_monitor(activity, duration, threshold, push):
+    sched = SimScheduler()
+    entered, left = [], []
+    backend = SimBackend(activity, lambda: sched.now, push)
+    monitor = IdleMonitor(sched, backend, on_idle=None, on_wake=None)
+
+    def on_idle():
+        entered.append(sched.now)
+        monitor.watch_for_wakeup()
+
+    def on_wake():
+        left.append(sched.now)
+        monitor.watch_for_idle()
+
+    monitor.on_idle, monitor.on_wake = on_idle, on_wake
+    monitor.start(True, threshold)
+    t = 0.0
+    while t < duration:
+        next_input = activity.next_input(t)
+        if next_input is None or next_input > duration:
+            sched.run_until(duration)
+            break
+        sched.run_until(next_input)
+        t = next_input
+        if push:
+            monitor._backend_activity() # the input event, delivered without a timer
+    hours = duration / 3600
+    return {"wakeups_per_hour": round(sched.wakeups / hours, 1),
+            **_latencies(activity, threshold, entered, left)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hours", type=float, default=24)
+    parser.add_argument("--threshold-mins", type=float, default=15)
+    parser.add_argument("--poll", type=float, default=7, help="IP poll interval of the pulse design, seconds")
+    args = parser.parse_args()
+
+    duration = args.hours * 3600
+    threshold = args.threshold_mins * 60
+    activity = SimulatedActivity(duration)
+    result = {
+        "benchmark": "idle_wakeups_simulation",
+        "hours": args.hours,
+        "threshold_s": threshold,
+        "pulse": simulate_pulse(activity, duration, threshold, args.poll),
+        "polling": simulate_monitor(activity, duration, threshold, push=False),
+        "push": simulate_monitor(activity, duration, threshold, push=True),
+    }
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# File: benchmarks/sim_polling_policy.py
+"""
+Simulated-clock harness for the polling policies. Replays a day with IP
+changes and network outages without sleeping, and reports the number of
+checks, checks wasted during outages and how long changes took to notice.
+Exits with 1 when a policy no longer makes the trade-off it is meant to
+make (see check()).
+
+    python benchmarks/sim_polling_policy.py --hours 24 --base 7
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+
+import _common
+from polling_policy import FixedPolicy, AdaptivePolicy, create_policy
+
+class SimulatedNetwork:
+    """IP changes every `change_every` seconds on average; outages of `outage_len` seconds."""
+    def __init__(self, duration, change_every, outage_every, outage_len, seed=7):
+        rng = random.Random(seed)
+        self.changes = sorted(rng.uniform(0, duration) for _ in range(int(duration / change_every)))
+        self.outages = []
+        for _ in range(int(duration / outage_every)):
+            start = rng.uniform(0, duration)
+            self.outages.append((start, start + outage_len))
+
+    def is_down(self, t):
+        return any(start <= t < end for start, end in self.outages)
+
+    def ip_at(self, t):
+        return sum(1 for c in self.changes if c <= t)
+
+def simulate(policy, network, duration, base, check_cost=0.2, failure_cost=20.0):
+    """Runs the check loop on a virtual clock. A failed check blocks for `failure_cost` seconds (the timeout)."""
+    t, checks, failed, last_ip = 0.0, 0, 0, None
+    detection_delays = []
+    while t < duration:
+        checks += 1
+        if network.is_down(t):
+            failed += 1
+            t += failure_cost
+            policy.on_failure()
+        else:
+            ip = network.ip_at(t)
+            changed = ip != last_ip
+            if changed and last_ip is not None:
+                change_time = network.changes[ip - 1]
+                detection_delays.append(t - change_time)
+            last_ip = ip
+            t += check_cost
+            policy.on_success(changed)
+        t += policy.next_interval(base)
+    delays = sorted(detection_delays)
+    return {
+        "checks": checks,
+        "failed_checks": failed,
+        "changes_detected": len(delays),
+        "detect_delay_avg_s": round(sum(delays) / len(delays), 1) if delays else None,
+        "detect_delay_max_s": round(delays[-1], 1) if delays else None,
+    }
+
+def default_policy(rng):
+    """The policy a fresh install uses."""
+    from config import ConfigManager
+    with tempfile.TemporaryDirectory() as workdir:
+        config = ConfigManager(os.path.join(workdir, "sim.ini"))
+    return create_policy(config, rng=rng)
+
+def check(result):
+    """Returns the expectations that do not hold."""
+    fixed, adaptive, default = result["fixed"], result["adaptive"], result["default"]
+    problems = []
+    for name in ("fixed", "adaptive", "default"):
+        if result[name]["changes_detected"] < 0.9 * fixed["changes_detected"]:
+            problems.append(f"{name}: misses more than 10% of the changes fixed polling sees")
+    if adaptive["failed_checks"] > 0.5 * fixed["failed_checks"]:
+        problems.append("adaptive: backoff no longer halves the checks wasted during outages")
+    if adaptive["checks"] >= fixed["checks"]:
+        problems.append("adaptive: does not check less often than fixed polling")
+    # Noticing a change quickly is the point of the app: the default must not trade it for fewer checks
+    if default["detect_delay_avg_s"] > 1.1 * fixed["detect_delay_avg_s"]:
+        problems.append(f"default ({result['default_policy']}): notices changes slower than fixed polling")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hours", type=float, default=24)
+    parser.add_argument("--base", type=float, default=7)
+    parser.add_argument("--change-every", type=float, default=1800, help="mean seconds between IP changes")
+    parser.add_argument("--outage-every", type=float, default=7200, help="mean seconds between outages")
+    parser.add_argument("--outage-len", type=float, default=600)
+    args = parser.parse_args()
+
+    duration = args.hours * 3600
+    network = SimulatedNetwork(duration, args.change_every, args.outage_every, args.outage_len)
+    result = {
+        "benchmark": "polling_policy_simulation",
+        "hours": args.hours,
+        "base_interval_s": args.base,
+        "fixed": simulate(FixedPolicy(rng=random.Random(1)), network, duration, args.base),
+        "adaptive": simulate(AdaptivePolicy(rng=random.Random(1)), network, duration, args.base),
+    }
+    policy = default_policy(random.Random(1))
+    result["default_policy"] = policy.name
+    result["default"] = simulate(policy, network, duration, args.base)
+    result["problems"] = check(result)
+    print(json.dumps(result, indent=2))
+    return 1 if result["problems"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
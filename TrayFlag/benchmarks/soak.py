@@ -0,0 +1,203 @@
+# File: benchmarks/soak.py
+"""
+Soak test of the tray app: the real App (offscreen) against the local
+stand-ins, driven much faster than real time. Every cycle is a forced check
+(new flag, tooltip, menu texts, status API publish); the IP changes every
+--change-every cycles and the language every --reload-every cycles (which
+rebuilds the menu and starts an update check). resource_monitor samples
+every --sample-every cycles, after a gc.collect().
+
+Reports the growth after warm-up of live QObjects (total and by class),
+Python and OS threads and RSS, plus the source lines whose allocations grew
+the most (tracemalloc). Exits with 1 when QObjects or threads kept growing,
+or right away when the Python/PySide6 pair loses references (see
+src/runtime_check.py): such a runtime cannot survive a soak.
+
+    python benchmarks/soak.py --cycles 20000
+
+The app runs from a temporary copy of src/ and assets/ (the portable layout:
+its ini, state and history files land next to the modules, not in the tree).
+"""
+
+import argparse
+import gc
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import _common
+from stub_servers import StubServer, StubConfig
+
+INI = """[main]
+language={language}
+shortcut_prompted=true
+autostart=false
+notifications=true
+sound=false
+[idle]
+enabled=false
+[network]
+watch_events=false
+precheck=false
+[updates]
+url={version_url}
+[api]
+enabled=true
+port=0
+[logging]
+level=WARNING
+[debug]
+resource_sample_mins=0
+"""
+
+def install_app(workdir, server, language):
+    """Copies the app into workdir and puts it first on the import path."""
+    app_dir = os.path.join(workdir, "app")
+    shutil.copytree(_common.SRC_DIR, app_dir, ignore=shutil.ignore_patterns("__pycache__", "*.ini", "*.db", "*.json"))
+    shutil.copytree(os.path.join(_common.SRC_DIR, "..", "assets"), os.path.join(app_dir, "assets"))
+    with open(os.path.join(app_dir, "TrayFlag.ini"), "w") as f:
+        f.write(INI.format(language=language, version_url=server.url("version")))
+    sys.path.insert(0, app_dir)
+
+def use_stub_providers(server):
+    """Points the provider chain at the stub servers whenever the app (re)configures it."""
+    import ip_fetcher, ip_providers
+    configure = ip_fetcher.configure
+    def configure_with_stubs(config):
+        configure(config)
+        ip_fetcher.set_providers([ip_providers.IpifyProvider(base_url=server.url("ipify")),
+                                  ip_providers.MyIpProvider(base_url=server.url("myip"))],
+                                 ip_providers.IpinfoProvider(base_url=server.url("ipinfo")))
+    ip_fetcher.configure = configure_with_stubs
+
+def growth(first, last):
+    keys = ("qobjects", "widgets", "python_threads", "os_threads", "rss_kb")
+    result = {f"{key}_growth": (last[key] - first[key]) if None not in (first[key], last[key]) else None
+              for key in keys}
+    classes = set(first['qobjects_by_class']) | set(last['qobjects_by_class'])
+    result["qobjects_growth_by_class"] = {
+        name: last['qobjects_by_class'].get(name, 0) - first['qobjects_by_class'].get(name, 0)
+        for name in sorted(classes)
+        if last['qobjects_by_class'].get(name, 0) != first['qobjects_by_class'].get(name, 0)}
+    threads = set(first['threads_by_name']) | set(last['threads_by_name'])
+    result["threads_growth_by_name"] = {
+        name: last['threads_by_name'].get(name, 0) - first['threads_by_name'].get(name, 0)
+        for name in sorted(threads)
+        if last['threads_by_name'].get(name, 0) != first['threads_by_name'].get(name, 0)}
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cycles", type=int, default=20000)
+    parser.add_argument("--change-every", type=int, default=2, help="cycles between IP changes")
+    parser.add_argument("--reload-every", type=int, default=500, help="cycles between language switches (0 = never)")
+    parser.add_argument("--sample-every", type=int, default=1000)
+    parser.add_argument("--tracemalloc", action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument("--max-qobject-growth", type=int, default=20, help="after warm-up, before it counts as a leak")
+    parser.add_argument("--max-thread-growth", type=int, default=2)
+    args = parser.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    stub = StubConfig()
+    with tempfile.TemporaryDirectory() as workdir, StubServer(stub) as server:
+        install_app(workdir, server, "en")
+        use_stub_providers(server)
+        from PySide6 import QtCore, QtWidgets
+        import resource_monitor
+        import runtime_check
+        from app import App
+
+        problem = runtime_check.refcount_problem()
+        if problem:
+            print(json.dumps({"benchmark": "soak", "cycles": 0, "leaks": ["runtime"], "runtime_problem": problem},
+                             indent=2), flush=True)
+            print(problem, file=sys.stderr) # run_all keeps only stderr of a failed benchmark
+            return 1
+
+        qt_app = QtWidgets.QApplication([])
+        qt_app.setQuitOnLastWindowClosed(False)
+        if args.tracemalloc:
+            resource_monitor.start_tracemalloc()
+        app = App()
+        languages = list(app.tr.available_languages) or ["en"]
+        warm_cycle = max(args.sample_every, args.cycles // 10)
+
+        class Driver(QtCore.QObject):
+            """Starts the next forced check when the previous one is done, on the Qt thread."""
+            def __init__(self):
+                super().__init__()
+                self.cycles = 0
+                self.reloads = 0
+                self.failed = 0
+                self.warm = None
+                self.last = None
+                self.memory_diff = None
+                self.samples = []
+
+            def on_poll_finished(self, success, ip_changed):
+                self.cycles += 1
+                self.failed += not success
+                if self.cycles % args.sample_every == 0 or self.cycles in (warm_cycle, args.cycles):
+                    gc.collect()
+                    entry = self.last = resource_monitor.sample()
+                    self.samples.append({'cycle': self.cycles, 'qobjects': entry['qobjects'], 'widgets': entry['widgets'],
+                                         'python_threads': entry['python_threads'],
+                                         'os_threads': entry['os_threads'], 'rss_kb': entry['rss_kb']})
+                    if self.cycles == warm_cycle:
+                        self.warm = entry
+                        resource_monitor.memory_diff() # baseline for the final diff
+                if self.cycles >= args.cycles:
+                    self.memory_diff = resource_monitor.memory_diff(10)
+                    qt_app.quit() # aboutToQuit runs App.shutdown()
+                    return
+                if self.cycles % args.change_every == 0:
+                    stub.ip = f"198.51.{self.cycles // 250 % 250}.{self.cycles % 250 + 1}"
+                if args.reload_every and self.cycles % args.reload_every == 0:
+                    app.config.language = languages[self.reloads % len(languages)]
+                    self.reloads += 1
+                    app.reload_ui_texts()
+                # Queued, so the menu and the status API are updated before the next check starts
+                QtCore.QTimer.singleShot(0, self.next_check)
+
+            @QtCore.Slot()
+            def next_check(self):
+                app.update_handler.update_location_icon(is_forced_by_user=True)
+
+        driver = Driver()
+        app.update_handler.poll_listeners.append(driver.on_poll_finished)
+        begin = time.perf_counter()
+        qt_app.exec()
+        elapsed = time.perf_counter() - begin
+
+        last = driver.last
+        result = {
+            "benchmark": "soak",
+            "cycles": driver.cycles,
+            "failed_cycles": driver.failed,
+            "language_reloads": driver.reloads,
+            "elapsed_s": round(elapsed, 1),
+            "cycles_per_s": round(driver.cycles / elapsed, 1),
+            "warm_cycle": warm_cycle,
+            "end": {key: last[key] for key in ("qobjects", "widgets", "python_threads", "os_threads", "rss_kb")},
+            **growth(driver.warm or last, last),
+            "samples": driver.samples,
+            "tracemalloc_top": driver.memory_diff,
+            "stub_requests": dict(stub.requests),
+        }
+        leaks = []
+        for key in ("qobjects", "widgets"):
+            if (result[f"{key}_growth"] or 0) > args.max_qobject_growth:
+                leaks.append(key)
+        if result["python_threads_growth"] > args.max_thread_growth:
+            leaks.append("python_threads")
+        if (result["os_threads_growth"] or 0) > args.max_thread_growth:
+            leaks.append("os_threads")
+        result["leaks"] = leaks
+    print(json.dumps(result, indent=2), flush=True)
+    return 1 if leaks else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
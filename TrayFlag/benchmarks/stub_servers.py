@@ -0,0 +1,141 @@
+# File: benchmarks/stub_servers.py
+
+import json
+import hashlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class StubConfig:
+    """Behaviour of the local ipify/myip/ipinfo stand-ins. Can be changed while running."""
+    def __init__(self, ip="203.0.113.7", country="NL", city="Amsterdam", org="AS64500 Example Net",
+                 latency=0.0, failure_rate=0.0, malformed_rate=0.0, payload_bytes=0):
+        self.ip = ip
+        self.country = country
+        self.city = city
+        self.org = org
+        # Per-service overrides: {"ipify": 0.2, ...}; a plain number applies to all services
+        self.latency = latency
+        self.failure_rate = failure_rate
+        # 200 responses whose body is not JSON (captive portals, broken proxies)
+        self.malformed_rate = malformed_rate
+        # Extra filler in every JSON answer, like the loc/postal/timezone/readme fields of the real ipinfo
+        self.payload_bytes = payload_bytes
+        self.requests = {"ipify": 0, "myip": 0, "ipinfo": 0, "version": 0}
+        # /version serves the update file with an ETag and answers conditional requests with 304
+        self.version_text = "VER:1.16.0\nLINK:https://example.invalid/TrayFlag.zip\n"
+        self.version_cache_control = "max-age=300"
+        self.not_modified = 0
+        self.lock = threading.Lock()
+
+    def _get(self, value, service):
+        return value.get(service, 0.0) if isinstance(value, dict) else value
+
+    def latency_for(self, service):
+        return self._get(self.latency, service)
+
+    def failure_rate_for(self, service):
+        return self._get(self.failure_rate, service)
+
+    def malformed_rate_for(self, service):
+        return self._get(self.malformed_rate, service)
+
+    def payload_bytes_for(self, service):
+        return int(self._get(self.payload_bytes, service))
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # keep-alive, like the real services
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        cfg = self.server.stub_config
+        path = self.path.split("?", 1)[0].strip("/")
+        parts = path.split("/")
+        service = parts[0]
+        if service not in cfg.requests:
+            return self._send(404, {"error": "not found"})
+        with cfg.lock:
+            cfg.requests[service] += 1
+
+        delay = cfg.latency_for(service)
+        if delay:
+            time.sleep(delay)
+        if random.random() < cfg.failure_rate_for(service):
+            return self._send(503, {"error": "stub failure"})
+        if service == "version":
+            return self._send_version(cfg)
+        if random.random() < cfg.malformed_rate_for(service):
+            return self._send_raw(200, b"<html>login required</html>", "text/html")
+
+        if service == "ipify":
+            body = {"ip": cfg.ip}
+        elif service == "myip":
+            body = {"ip": cfg.ip, "country": cfg.country, "cc": cfg.country}
+        else:
+            ip = parts[1] if len(parts) > 1 else cfg.ip
+            body = {"ip": ip, "country": cfg.country, "city": cfg.city, "org": cfg.org}
+        padding = cfg.payload_bytes_for(service)
+        if padding:
+            body["readme"] = "x" * padding
+        self._send(200, body)
+
+    def _send_version(self, cfg):
+        payload = cfg.version_text.encode("utf-8")
+        etag = f'"{hashlib.sha1(payload).hexdigest()[:16]}"'
+        if self.headers.get("If-None-Match") == etag:
+            with cfg.lock:
+                cfg.not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", cfg.version_cache_control)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", cfg.version_cache_control)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send(self, status, body):
+        self._send_raw(status, json.dumps(body).encode("utf-8"), "application/json")
+
+    def _send_raw(self, status, payload, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class StubServer:
+    """Serves /ipify, /myip, /ipinfo/<ip>/json and /version on 127.0.0.1 from a background thread."""
+    def __init__(self, config=None):
+        self.config = config or StubConfig()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.stub_config = self.config
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, service):
+        return f"{self.base_url}/{service}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
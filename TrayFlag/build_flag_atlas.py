@@ -0,0 +1,15 @@
+# File: build_flag_atlas.py
+# Packs assets/flags/*.png into assets/flags_atlas.png (called from build_python.bat)
+
+import os
+import sys
+from PySide6 import QtGui
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+from icon_cache import build_atlas, ATLAS_FILENAME
+
+if __name__ == "__main__":
+    base = os.path.dirname(os.path.abspath(__file__))
+    app = QtGui.QGuiApplication(sys.argv)
+    count = build_atlas(os.path.join(base, "assets", "flags"), os.path.join(base, "assets", ATLAS_FILENAME))
+    print(f"Flag atlas built: {count} flags -> assets/{ATLAS_FILENAME}")
@@ -9,6 +9,16 @@ echo Cleaning up old build folders...
 if exist "TrayFlag" rmdir /s /q TrayFlag
 if exist "build" rmdir /s /q build
 
+echo.
+echo Building flag atlas...
+python build_flag_atlas.py
+if %errorlevel% neq 0 (
+    echo.
+    echo ERROR: Flag atlas build failed.
+    pause
+    exit /b 1
+)
+
 echo.
 echo Compiling with Nuitka...
 
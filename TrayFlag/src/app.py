@@ -4,18 +4,30 @@ import os
 import webbrowser
 import time
 import threading
-import requests
+import logging
 from PySide6 import QtWidgets, QtGui, QtCore
 
 from utils import resource_path, create_no_internet_icon, set_autostart_shortcut, truncate_text, clean_isp_name, create_desktop_shortcut, run_updater_script
 from config import ConfigManager, SETTINGS_FILE_PATH
 from constants import __version__, RELEASE_DATE
 from translator import Translator, get_initial_language_code
-from dialogs import AboutDialog, SettingsDialog, CustomQuestionDialog
 from tray_menu import TrayMenuManager
 from sound_manager import SoundManager
 from state_manager import AppState
+from history_store import HistoryStore
 from update_handler import UpdateHandler
+from icon_cache import IconCache, ATLAS_FILENAME
+from scheduler import Scheduler
+from update_checker import UpdateChecker, is_newer
+import startup_profile
+import tracing
+import app_logging
+import resource_monitor
+
+log = logging.getLogger(__name__)
+
+UPDATE_CHECK_INTERVAL = 72 * 60 * 60 # seconds
+STATE_SNAPSHOT_DELAY = 2 # seconds; location changes within this window share one snapshot write
 
 class App(QtWidgets.QSystemTrayIcon):
 
@@ -25,14 +37,36 @@ class App(QtWidgets.QSystemTrayIcon):
         super().__init__()
 
         self.update_checked = False
+        # At most one of each background job at a time, however often it is requested
+        self._update_check_thread = None
+        self._update_check_future = None # the same on the async core
+        self._maintenance_thread = None
 
         self.updateAvailable.connect(self.on_update_available)
 
         # --- 1. Initialization of Managers ---
         self.config = ConfigManager()
-        self.state = AppState()
+        app_logging.configure(self.config)
+        if self.config.tracing:
+            tracing.enable(self.config.trace_capacity)
+        self.history_store = None
+        if self.config.history_enabled:
+            try:
+                self.history_store = HistoryStore(retention_days=self.config.history_retention_days,
+                                                  max_entries=self.config.history_max_entries)
+            except Exception as e:
+                log.warning("IP history disabled: %s", e)
+        self.state = AppState(history=self.history_store)
         self.tr = Translator(resource_path("assets/i18n"))
+        # Sounds are decoded in the background once the icon is shown (see step 5)
         self.sound_manager = SoundManager(self.config)
+        # Optional asyncio core: one loop thread plus a small fixed executor for all background work
+        self.async_core = None
+        if self.config.asyncio_engine:
+            from async_core import AsyncCore
+            self.async_core = AsyncCore().start()
+        self.update_checker = UpdateChecker(self.config.update_url,
+                                            default_max_age=self.config.update_default_max_age_mins * 60)
         
         self.settings_dialog = None
         self.about_dialog = None
@@ -41,17 +75,25 @@ class App(QtWidgets.QSystemTrayIcon):
 
         self.new_version_str = ""
         self.new_version_link = ""
+        # IP painted from the fast path and still waiting for its full geo-data
+        self.pending_full_data_ip = None
 
         # --- 2. Create and Configure UpdateHandler ---
-        self.update_handler = UpdateHandler(self.config, self.state)
+        # One scheduler owns every periodic task: IP polls, idle checks, update checks, cache expiry
+        self.scheduler = Scheduler()
+        self.update_handler = UpdateHandler(self.config, self.state, self.scheduler, self.async_core)
         self.update_handler.ipDataReceived.connect(self.on_ip_data_received)
+        self.update_handler.ipChanged.connect(self.on_ip_changed_early)
         self.update_handler.enteredIdleMode.connect(self.on_entered_idle_mode)
+        self.state.on_change = self._schedule_state_snapshot
         
         # --- 3. Load Settings and Resources ---
         self.load_app_settings()
         self.app_icon = self._load_icon("logo.ico")
         self.moon_icon = self._load_icon("moon.png")
         self.no_internet_icon = create_no_internet_icon()
+        self.flag_icons = IconCache(resource_path(os.path.join("assets", "flags")),
+                                    resource_path(os.path.join("assets", ATLAS_FILENAME)))
         self.about_logo_pixmap = self._load_pixmap("about_logo.png", 96)
         
         # --- 4. Create GUI ---
@@ -61,21 +103,44 @@ class App(QtWidgets.QSystemTrayIcon):
         # --- 5. Final Setup and Launch ---
         self.setIcon(self.app_icon or self.no_internet_icon)
         self.show()
+        startup_profile.mark("tray icon shown")
         self.setToolTip(self.tr.get("initializing_tooltip"))
+        # Show the last known location right away (marked as stale) while the first check runs
+        if self.state.restore_snapshot() or self.update_handler.prewarm_state():
+            self.update_gui_with_new_data(notify=False)
         
         self.activated.connect(self.on_activated)
+        QtWidgets.QApplication.instance().aboutToQuit.connect(self.shutdown)
         
         QtCore.QTimer.singleShot(100, self._handle_first_launch_tasks)
         self.update_handler.start()
-
-        # Run the first update check 10 seconds after startup
-        QtCore.QTimer.singleShot(10000, self.try_check_updates)
-
-        # Запуск таймера для проверки каждые 72 часа
-        threading.Thread(target=self._update_timer_thread, daemon=True).start()
+        # Everything below is not needed for the first paint: load it off the main thread
+        self.sound_manager.load_in_background()
+        self.status_server = None
+        if self.config.api_enabled:
+            self._start_status_server()
+
+        # Run the first update check 10 seconds after startup, then every 72 hours
+        self.scheduler.schedule_once("update_check_startup", 10, self.try_check_updates)
+        self.scheduler.add_periodic("update_check", UPDATE_CHECK_INTERVAL, lambda: self.try_check_updates(force=True))
+        self.scheduler.add_periodic("scheduler_stats", 3600, self.scheduler.log_stats)
+        if tracing.is_enabled():
+            self.scheduler.add_periodic("trace_summary", 3600, tracing.log_summary)
+        if self.history_store:
+            # Rotation and VACUUM can take a while on a large history: keep them off the GUI thread
+            self.scheduler.add_periodic("history_maintenance", 24 * 3600, self._start_history_maintenance, first_delay=60)
+        resource_monitor.install(self.config, self.scheduler)
+
+    def _start_history_maintenance(self):
+        if self._maintenance_thread and self._maintenance_thread.is_alive():
+            log.warning("History maintenance is still running; skipped")
+            return
+        self._maintenance_thread = threading.Thread(target=self.history_store.maintain, name="history-maintenance", daemon=True)
+        self._maintenance_thread.start()
 
     def _handle_first_launch_tasks(self):
         if self.config.shortcut_prompted: return
+        from dialogs import CustomQuestionDialog
         dialog = CustomQuestionDialog(
             self.tr.get("shortcut_dialog_title"),
             self.tr.get("shortcut_dialog_text"),
@@ -91,8 +156,23 @@ class App(QtWidgets.QSystemTrayIcon):
         cfg.language = lang_code
         self.tr.load_language(lang_code)
 
+    @QtCore.Slot(object, bool)
+    def on_ip_changed_early(self, ip_data, is_forced):
+        """First stage of an IP change: paint the flag from a cached/local country right away."""
+        if self.state.is_in_idle_mode or not ip_data or not ip_data.get('full_data'):
+            return
+        current_ip = ip_data.get('ip')
+        if current_ip == self.state.last_known_external_ip:
+            return
+        log.info("IP changed to %s, painting preliminary flag while details load...", current_ip)
+        self.state.update_location(ip_data['full_data'])
+        self.pending_full_data_ip = current_ip
+        self.update_gui_with_new_data(notify=False)
+        self.update_handler.report_paint(current_ip, "first")
+
     @QtCore.Slot(object, bool)
     def on_ip_data_received(self, ip_data, is_forced):
+        tracing.record("signal.delivery", self.update_handler.emitted_at, signal="ipDataReceived")
         # If the check has not been performed yet (for example, there was no network at startup),
         # run it now when the IP has been successfully obtained.
         if not self.update_checked:
@@ -104,17 +184,18 @@ class App(QtWidgets.QSystemTrayIcon):
             # 1. Log the error if this is the first error OR a manual launch
             if self.state.last_known_external_ip != "N/A" or is_forced:
                 error_message = ip_data.get('full_data', {}).get('error', 'No external IP detected') if ip_data else 'No data received'
-                print(f"[ERROR] Failed to get IP data. Reason: {error_message}")
+                log.error("Failed to get IP data. Reason: %s", error_message)
             
             # 2. Play the sound and show a notification if this is the FIRST error
             if self.state.last_known_external_ip != "N/A":
                 if self.config.notifications:
-                    self.showMessage(
-                        self.tr.get("network_lost_title"),
-                        self.tr.get("network_lost_message"),
-                        QtWidgets.QSystemTrayIcon.MessageIcon.Warning,
-                        5000
-                    )
+                    with tracing.span("gui.notification"):
+                        self.showMessage(
+                            self.tr.get("network_lost_title"),
+                            self.tr.get("network_lost_message"),
+                            QtWidgets.QSystemTrayIcon.MessageIcon.Warning,
+                            5000
+                        )
                 self.sound_manager.play_alert()
             
             # 3. OR play the sound if this is a manual click (repeated error)
@@ -125,6 +206,8 @@ class App(QtWidgets.QSystemTrayIcon):
             self.state.clear_network_state()
             self.setIcon(self.no_internet_icon)
             self.setToolTip(self.tr.get("tooltip_error_get_ip"))
+            startup_profile.mark("first check painted (no network)")
+            startup_profile.report()
             
             return
 
@@ -132,21 +215,31 @@ class App(QtWidgets.QSystemTrayIcon):
         current_ip = ip_data.get('ip')
         full_data = ip_data.get('full_data', {})
         ip_has_changed = (current_ip != self.state.last_known_external_ip)
+        # The flag for this IP was already painted early; this is the second stage with full details
+        completes_early_paint = (current_ip == self.pending_full_data_ip)
+        self.pending_full_data_ip = None
 
         # Main condition: update everything if the IP has changed OR this is a manual launch
-        if ip_has_changed or is_forced:
+        if ip_has_changed or is_forced or completes_early_paint:
             # Log only if the IP has actually changed
             if ip_has_changed:
-                print(f"[SUCCESS] IP address has changed: {self.state.last_known_external_ip} -> {current_ip}")
+                log.info("IP address has changed: %s -> %s", self.state.last_known_external_ip, current_ip)
             
             # Update the state
             if full_data:
                 self.state.update_location(full_data)
-            else:
+            elif not completes_early_paint: # otherwise keep the preliminary country
                 self.state.update_location({'ip': current_ip, 'country_code': '??', 'city': 'N/A', 'isp': 'N/A'})
             
             # And immediately update the GUI
             self.update_gui_with_new_data()
+            self.update_handler.report_paint(current_ip, "full")
+        elif self.state.is_stale:
+            # The location restored at startup is confirmed: repaint it as fresh, without a notification
+            self.state.update_location(full_data or self.state.current_location_data)
+            self.update_gui_with_new_data(notify=False)
+        startup_profile.mark("first full data painted")
+        startup_profile.report()
             
     @QtCore.Slot()
     def on_entered_idle_mode(self):
@@ -154,34 +247,46 @@ class App(QtWidgets.QSystemTrayIcon):
         self.setIcon(self.moon_icon or self.app_icon)
         self.setToolTip(self.tr.get("idle_mode_tooltip"))
 
-    def update_gui_with_new_data(self):
+    def update_gui_with_new_data(self, notify=True):
         if self.state.is_in_idle_mode:
             return
         data = self.state.current_location_data
         country_code = data.get('country_code', '')
-        icon = self._load_icon(f"{country_code}.png", "flags")
-        self.setIcon(icon or self.app_icon)
+        with tracing.span("gui.icon", country=country_code):
+            icon = self.flag_icons.get(country_code, 20, self._device_pixel_ratio())
+            self.setIcon(icon or self.app_icon)
+        startup_profile.mark("first IP painted")
         
-        update_time_str = time.strftime("%H:%M:%S")
+        if self.state.is_stale:
+            seen_str = time.strftime("%d.%m %H:%M", time.localtime(self.state.last_update_time))
+            status_line = self.tr.get('tooltip_stale', time=seen_str)
+        else:
+            status_line = self.tr.get('tooltip_updated_at', time=time.strftime("%H:%M:%S"))
         tooltip_text = (f"{data.get('ip', 'N/A')}\n"
                         f"{country_code.upper()}\n"
                         f"{truncate_text(data.get('city', 'N/A'), 17)}\n"
                         f"{truncate_text(clean_isp_name(data.get('isp', 'N/A')), 17)}\n"
-                        f"{self.tr.get('tooltip_updated_at', time=update_time_str)}")
+                        f"{status_line}")
         self.setToolTip(tooltip_text)
         
-        self.menu_manager.update_menu_content()
+        with tracing.span("gui.menu"):
+            self.menu_manager.update_menu_content()
         
+        if not notify:
+            return
+
         if self.config.notifications:
-            self.showMessage(self.tr.get("location_updated_title"), 
-                             self.tr.get("location_updated_message", ip=data.get('ip'), city=data.get('city'), country_code=country_code.upper()), 
-                             QtWidgets.QSystemTrayIcon.MessageIcon.Information, 5000)
+            with tracing.span("gui.notification"):
+                self.showMessage(self.tr.get("location_updated_title"), 
+                                 self.tr.get("location_updated_message", ip=data.get('ip'), city=data.get('city'), country_code=country_code.upper()), 
+                                 QtWidgets.QSystemTrayIcon.MessageIcon.Information, 5000)
 
         self.sound_manager.play_notification()
         
     def open_settings_dialog(self):
         if self.settings_dialog:
             self.settings_dialog.raise_(); self.settings_dialog.activateWindow(); return
+        from dialogs import SettingsDialog
         self.settings_dialog = SettingsDialog(self.app_icon, self.tr, self.tr.available_languages, self.config, None)
         self.settings_dialog.accepted.connect(self.on_settings_accepted)
         self.settings_dialog.rejected.connect(self.on_settings_rejected)
@@ -204,11 +309,11 @@ class App(QtWidgets.QSystemTrayIcon):
         new_settings = self.settings_dialog.get_settings()
         
         # --- 3. Compare and print ONLY changed values ---
-        print("--- Settings 'OK' clicked. Checking for changes... ---")
+        log.info("Settings 'OK' clicked. Checking for changes...")
         if old_interval != new_settings['update_interval']:
-            print(f"[INFO] Update interval changed: {old_interval}s -> {new_settings['update_interval']}s")
+            log.info("Update interval changed: %ss -> %ss", old_interval, new_settings['update_interval'])
         if old_lang != new_settings['language']:
-            print(f"[INFO] Language changed: {old_lang} -> {new_settings['language']}")
+            log.info("Language changed: %s -> %s", old_lang, new_settings['language'])
 
         # --- 4. Your existing code stays the same ---
         self.config.save_settings(new_settings)
@@ -219,18 +324,21 @@ class App(QtWidgets.QSystemTrayIcon):
         
         if old_notifications != new_settings['notifications']:
             status = "Enabled" if new_settings['notifications'] else "Disabled"
-            print(f"[INFO] Notifications changed: {status}")
+            log.info("Notifications changed: %s", status)
 
         if old_sound != new_settings['sound']:
             status = "Enabled" if new_settings['sound'] else "Disabled"
-            print(f"[INFO] Sound changed: {status}")
+            log.info("Sound changed: %s", status)
 
         if old_idle_enabled != new_settings['idle_enabled']:
             status = "Enabled" if new_settings['idle_enabled'] else "Disabled"
-            print(f"[INFO] Idle Mode changed: {status}")
+            log.info("Idle Mode changed: %s", status)
 
         if old_idle_threshold != new_settings['idle_threshold_mins']:
-            print(f"[INFO] Idle threshold changed: {old_idle_threshold} min -> {new_settings['idle_threshold_mins']} min")
+            log.info("Idle threshold changed: %s min -> %s min", old_idle_threshold, new_settings['idle_threshold_mins'])
+
+        if old_idle_enabled != new_settings['idle_enabled'] or old_idle_threshold != new_settings['idle_threshold_mins']:
+            self.update_handler.apply_idle_settings()
 
         if old_lang != self.config.language:
             self.reload_ui_texts()
@@ -244,8 +352,10 @@ class App(QtWidgets.QSystemTrayIcon):
         self.tr = Translator(resource_path("assets/i18n"))
         lang_code = get_initial_language_code(self.config.language)
         self.tr.load_language(lang_code, is_reload=True)
+        old_menu_manager = self.menu_manager
         self.menu_manager = TrayMenuManager(self)
         self.setContextMenu(self.menu_manager.menu)
+        old_menu_manager.dispose()
         if self.state.current_location_data: self.menu_manager.update_menu_content()
         # --- НАЧАЛО ИЗМЕНЕНИЙ ---
         if self.state.is_in_idle_mode:
@@ -268,75 +378,105 @@ class App(QtWidgets.QSystemTrayIcon):
         Runs the update check in a background thread.
         """
         if not force:
-            print("[DEBUG] Update check triggered (force=False)")
+            log.debug("Update check triggered (force=False)")
         else:
-            print("[DEBUG] Update check triggered (force=True)")
+            log.debug("Update check triggered (force=True)")
 
         if self.update_checked and not force:
             return
 
         self.update_checked = True
-        print("[DEBUG] Starting background task for update check...")
-        threading.Thread(
+        if ((self._update_check_thread and self._update_check_thread.is_alive()) or
+                (self._update_check_future and not self._update_check_future.done())):
+            log.debug("Update check already running")
+            return
+        log.debug("Starting background task for update check...")
+        if self.async_core:
+            self._update_check_future = self.async_core.submit(
+                self.async_core.run_blocking(self._check_updates_worker), timeout=30, name="update check")
+            return
+        self._update_check_thread = threading.Thread(
             target=self._check_updates_worker,
+            name="update-check",
             daemon=True
-        ).start()
-
-    def _update_timer_thread(self):
-        """Фоновый поток, проверяющий обновления каждые 72 часа."""
-        interval_sec = 72 * 60 * 60  # 72 часа
-        while True:
-            # Запускаем проверку
-            self.try_check_updates(force=True)
-            # Ждём interval_sec секунд
-            for _ in range(int(interval_sec)):
-                time.sleep(1)
-                # Можно прервать поток по условию, если понадобится
-
+        )
+        self._update_check_thread.start()
 
+    def _start_status_server(self):
+        """Opt-in local status/metrics endpoint ([api] in the ini), refreshed after every check."""
+        from status_server import StatusServer
+        try:
+            self.status_server = StatusServer(self.config.api_token, self.config.api_port,
+                                              history=self.history_store, core=self.async_core).start()
+        except Exception as e:
+            log.warning("Status API disabled: %s", e)
+            self.status_server = None
+            return
+        self.update_handler.poll_listeners.append(self.publish_status)
+        self.update_handler.enteredIdleMode.connect(self.publish_status)
+        self.publish_status()
+
+    def publish_status(self, *args):
+        from status_server import collect_status
+        checker = self.update_checker.stats()
+        status, metrics = collect_status(self.state, self.update_handler, self.scheduler, extra=[
+            ("trayflag_update_checks_total", "counter", "Requests for the version file", checker['requests']),
+            ("trayflag_update_not_modified_total", "counter", "Version checks answered with 304", checker['not_modified']),
+        ])
+        status['version'] = __version__
+        self.status_server.publish(status, metrics)
+
+    def _schedule_state_snapshot(self):
+        """
+        Called on every location change. Writes are debounced: the first change
+        schedules one write and later changes before it runs are folded into it.
+        """
+        if not self.scheduler.is_scheduled("state_snapshot"):
+            self.scheduler.schedule_once("state_snapshot", STATE_SNAPSHOT_DELAY, self.state.save_snapshot)
+
+    def shutdown(self):
+        """Stops background work before the application exits."""
+        self.update_handler.stop()
+        if self.status_server:
+            self.status_server.stop()
+        if self.scheduler.is_scheduled("state_snapshot"):
+            self.scheduler.cancel("state_snapshot")
+            self.state.save_snapshot()
+        if self.history_store:
+            if self._maintenance_thread and self._maintenance_thread.is_alive():
+                log.info("Waiting for history maintenance to finish...")
+                self._maintenance_thread.join()
+            self.history_store.close()
+        self.sound_manager.close()
+        if self.async_core:
+            self.async_core.shutdown()
+        if tracing.is_enabled():
+            tracing.log_summary()
+            if self.config.trace_file:
+                try:
+                    tracing.export_chrome_trace(self.config.trace_file)
+                except OSError as e:
+                    log.error("Could not write the trace file: %s", e)
 
     def _check_updates_worker(self):
         """
-        Runs in a background thread. Downloads, parses, and compares versions.
+        Runs in a background thread. Asks the update checker (which skips the
+        network while its cached answer is fresh) and compares versions.
         """
         try:
-            url = "https://raw.githubusercontent.com/Ridbowt/TrayFlag/main/TrayFlagLastVersion.txt"
-            response = requests.get(url, timeout=15)
-            response.raise_for_status() # Will raise an error if the status is not 200 OK
-            
-            content = response.text
-            
-            # Parse the file
-            latest_version = None
-            download_link = None
-            for line in content.splitlines():
-                if line.startswith("VER:"):
-                    latest_version = line.replace("VER:", "").strip()
-                elif line.startswith("LINK:"):
-                    download_link = line.replace("LINK:", "").strip()
-
-            if not latest_version or not download_link:
-                print("[DEBUG] Update check: Failed to parse version file.")
-                return
-
-            # Compare versions
-            # Simple function to compare "1.10.0" > "1.9.0"
-            def parse_ver(v_str):
-                return tuple(map(int, (v_str.split("."))))
-
-            if parse_ver(latest_version) > parse_ver(__version__):
-                print(f"[DEBUG] New version found: {latest_version}")
+            latest_version, download_link = self.update_checker.check()
+            if latest_version and is_newer(latest_version, __version__):
+                log.debug("New version found: %s", latest_version)
                 self.updateAvailable.emit(latest_version, download_link)
-
         except Exception as e:
-            print(f"[DEBUG] Update check failed: {e}")
+            log.debug("Update check failed: %s", e)
 
     @QtCore.Slot(str, str)
     def on_update_available(self, version, link):
         """
         Called when a new version is found. Updates the menu item.
         """
-        print(f"[DEBUG] New version {version} found. Updating menu item.")
+        log.debug("New version %s found. Updating menu item.", version)
         
         # Save information about the new version
         self.new_version_str = version
@@ -351,6 +491,7 @@ class App(QtWidgets.QSystemTrayIcon):
     def open_about_dialog(self):
         if self.about_dialog and self.about_dialog.isVisible():
             self.about_dialog.raise_(); self.about_dialog.activateWindow(); return
+        from dialogs import AboutDialog
         self.about_dialog = AboutDialog(self, self.app_icon, self.tr, __version__, RELEASE_DATE, self.about_logo_pixmap, None)
         self.about_dialog.exec()
 
@@ -358,7 +499,7 @@ class App(QtWidgets.QSystemTrayIcon):
         if self.state.is_in_idle_mode:
             self.update_handler.exit_idle_mode()
         elif reason == self.ActivationReason.Trigger:
-            print("[INFO] Tray icon clicked. Forcing IP update...")
+            log.info("Tray icon clicked. Forcing IP update...")
             self.update_handler.update_location_icon(is_forced_by_user=True)
 
     def _load_icon(self, filename, subfolder="icons", size=20):
@@ -368,7 +509,11 @@ class App(QtWidgets.QSystemTrayIcon):
             pixmap = QtGui.QPixmap(path)
             return QtGui.QIcon(pixmap.scaled(size, size, QtCore.Qt.AspectRatioMode.KeepAspectRatio, QtCore.Qt.TransformationMode.SmoothTransformation))
         except Exception as e:
-            print(f"Error loading icon {filename}: {e}"); return None
+            log.warning("Error loading icon %s: %s", filename, e); return None
+
+    def _device_pixel_ratio(self):
+        screen = QtGui.QGuiApplication.primaryScreen()
+        return screen.devicePixelRatio() if screen else 1.0
 
     def _load_pixmap(self, filename, size):
         try:
@@ -377,18 +522,18 @@ class App(QtWidgets.QSystemTrayIcon):
             pixmap = QtGui.QPixmap(path)
             return pixmap.scaled(size, size, QtCore.Qt.AspectRatioMode.KeepAspectRatio, QtCore.Qt.TransformationMode.SmoothTransformation)
         except Exception as e:
-            print(f"Error loading pixmap {filename}: {e}"); return None
+            log.warning("Error loading pixmap %s: %s", filename, e); return None
 
     def copy_ip_to_clipboard(self):
         if self.state.current_location_data and 'ip' in self.state.current_location_data:
             self.copy_text_to_clipboard(self.state.current_location_data['ip'])
 
     def copy_historical_ip(self, ip_to_copy):
-        print(f"[ACTION] Copied historical IP to clipboard: '{ip_to_copy}'")
+        log.info("Copied historical IP to clipboard: '%s'", ip_to_copy)
         self.copy_text_to_clipboard(ip_to_copy)
     
     def copy_text_to_clipboard(self, text):
-        print(f"[ACTION] Copied to clipboard: '{text}'")
+        log.info("Copied to clipboard: '%s'", text)
         QtWidgets.QApplication.clipboard().setText(text)
         if self.config.notifications:
             self.showMessage(self.tr.get("copied_title"), self.tr.get("copied_message_simple", text=text), self.icon(), 2000)
@@ -396,21 +541,21 @@ class App(QtWidgets.QSystemTrayIcon):
     def open_weblink(self):
         if self.state.current_location_data and 'ip' in self.state.current_location_data:
             url = f"https://www.ip-tracker.org/lookup.php?ip={self.state.current_location_data['ip']}"
-            print(f"[ACTION] Opening URL in browser: {url}")
+            log.info("Opening URL in browser: %s", url)
             webbrowser.open(url)
 
     def open_speedtest_website(self):
         url = 'https://www.speedtest.net'
-        print(f"[ACTION] Opening URL in browser: {url}")
+        log.info("Opening URL in browser: %s", url)
         webbrowser.open(url)
 
     def open_dns_leak_test_website(self):
         url = 'https://ipleak.net/'
-        print(f"[ACTION] Opening URL in browser: {url}")
+        log.info("Opening URL in browser: %s", url)
         webbrowser.open(url)
 
 
     def run_updater(self):
         """Simply calls the launcher function from utils."""
-        print("[ACTION] 'Check for Updates' clicked. Running updater script...")
+        log.info("'Check for Updates' clicked. Running updater script...")
         run_updater_script()
\ No newline at end of file
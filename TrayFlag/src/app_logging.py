@@ -0,0 +1,171 @@
+# File: src/app_logging.py
+
+"""
+Logging for the whole application. Modules log through
+`logging.getLogger(__name__)`; this module owns the handlers:
+
+- The root logger has a single QueueHandler. A log call only formats the
+  message and puts it on a bounded queue (dropping it when the queue is
+  full), so file and console I/O never run on the GUI or worker threads.
+- A QueueListener thread writes the records to a size-rotated file and to
+  stderr (when there is one: the windowed build has no console).
+- A message repeated within `dedup_seconds` is written once; the next copy
+  after the window carries the number of suppressed repeats.
+
+install() runs first thing in main.py and buffers records in the queue
+until configure() has read the [logging] section and started the listener.
+"""
+
+import sys
+import time
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+FILE_FORMAT = "%(asctime)s %(levelname)-7s %(threadName)s %(name)s: %(message)s"
+CONSOLE_FORMAT = "[%(levelname)s] %(name)s: %(message)s"
+QUEUE_SIZE = 10000
+# Libraries that log every request at DEBUG; kept at WARNING unless [logging] modules names them
+QUIET_LIBRARIES = ("urllib3", "asyncio")
+MAX_TRACKED_MESSAGES = 1000
+
+_handler = None
+_listener = None
+_repeat_filter = None
+
+
+class RepeatFilter(logging.Filter):
+    """Lets one copy of a message through per `window` seconds and counts the rest."""
+    def __init__(self, window=60):
+        super().__init__()
+        self.window = window
+        self.suppressed = 0
+        self._seen = {} # (logger, level, message) -> [first seen, repeats suppressed since]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.window <= 0:
+            return True
+        message = record.getMessage()
+        key = (record.name, record.levelno, message)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._seen.get(key)
+            if entry is not None and now - entry[0] < self.window:
+                entry[1] += 1
+                self.suppressed += 1
+                return False
+            if len(self._seen) >= MAX_TRACKED_MESSAGES:
+                self._prune(now)
+            self._seen[key] = [now, 0]
+        if entry is not None and entry[1]:
+            record.msg = f"{message} (repeated {entry[1]} more times in {now - entry[0]:.0f}s)"
+            record.args = None
+        return True
+
+    def _prune(self, now):
+        """Forgets expired messages, or the older half if all of them are recent (dicts keep insertion order)."""
+        fresh = {k: v for k, v in self._seen.items() if now - v[0] < self.window}
+        if len(fresh) >= MAX_TRACKED_MESSAGES // 2:
+            fresh = dict(list(fresh.items())[len(fresh) // 2:])
+        self._seen = fresh
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """Never blocks the caller: a record that does not fit in the queue is counted and dropped."""
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        """Formats the record in place: no other handler sees it, so the copy QueueHandler makes is not needed."""
+        record.message = record.msg = self.format(record)
+        record.args = record.exc_info = record.exc_text = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def install(queue_size=QUEUE_SIZE):
+    """Routes all logging into the queue. Records wait there until configure() starts the writer."""
+    global _handler, _repeat_filter
+    if _handler is not None:
+        return
+    _repeat_filter = RepeatFilter()
+    _handler = _DroppingQueueHandler(queue.Queue(queue_size))
+    _handler.addFilter(_repeat_filter)
+    root = logging.getLogger()
+    root.addHandler(_handler)
+    root.setLevel(logging.INFO)
+    atexit.register(shutdown)
+
+def configure(config, log_path=None, console=True):
+    """
+    Applies the [logging] settings and starts the writer thread. `log_path`
+    defaults to TrayFlag.log next to the settings; no file with file=false.
+    """
+    global _listener
+    install()
+    root = logging.getLogger()
+    root.setLevel(_level(config.log_level, logging.INFO))
+    for name in QUIET_LIBRARIES:
+        logging.getLogger(name).setLevel(logging.WARNING)
+    for name, level in config.log_modules.items():
+        logging.getLogger(name).setLevel(_level(level, logging.NOTSET))
+    _repeat_filter.window = config.log_dedup_seconds
+
+    handlers = []
+    if config.log_file:
+        if log_path is None:
+            from utils import resource_path
+            from constants import APP_NAME
+            log_path = resource_path(f"{APP_NAME}.log")
+        try:
+            file_handler = RotatingFileHandler(log_path, maxBytes=config.log_max_kb * 1024,
+                                               backupCount=config.log_backups, encoding="utf-8", delay=True)
+            file_handler.setFormatter(logging.Formatter(FILE_FORMAT))
+            handlers.append(file_handler)
+        except OSError as e:
+            logging.getLogger(__name__).warning("Log file %s unavailable: %s", log_path, e)
+    if console and sys.stderr is not None:
+        console_handler = logging.StreamHandler(sys.stderr)
+        console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+        handlers.append(console_handler)
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+    _listener = QueueListener(_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+def _level(name, default):
+    level = logging.getLevelName(str(name).strip().upper())
+    return level if isinstance(level, int) else default
+
+def shutdown():
+    """Writes out everything still queued. Runs at exit; records logged later stay in the queue."""
+    global _listener
+    if _handler is None:
+        return
+    if _listener is None and not _handler.queue.empty() and sys.stderr is not None:
+        # Exiting before configure(): at least show what was logged on the console
+        console_handler = logging.StreamHandler(sys.stderr)
+        console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+        _listener = QueueListener(_handler.queue, console_handler)
+        _listener.start()
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+def stats():
+    if _handler is None:
+        return {'queued': 0, 'dropped': 0, 'suppressed': 0}
+    return {'queued': _handler.queue.qsize(), 'dropped': _handler.dropped, 'suppressed': _repeat_filter.suppressed}
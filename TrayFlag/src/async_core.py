@@ -0,0 +1,117 @@
+# File: src/async_core.py
+
+import asyncio
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+from PySide6 import QtCore
+
+log = logging.getLogger(__name__)
+
+class QtBridge(QtCore.QObject):
+    """Carries callbacks from the asyncio thread to the Qt (GUI) thread."""
+    callRequested = QtCore.Signal(object)
+
+    def __init__(self):
+        super().__init__()
+        self.callRequested.connect(self._invoke)
+
+    @QtCore.Slot(object)
+    def _invoke(self, fn):
+        try:
+            fn()
+        except Exception as e:
+            log.exception("Callback from async core failed: %s", e)
+
+    def call_soon(self, fn):
+        """Thread-safe: runs `fn()` on the thread that owns the bridge (the Qt main thread)."""
+        self.callRequested.emit(fn)
+
+
+class AsyncCore:
+    """
+    One asyncio event loop on a dedicated thread, bridged to the Qt event loop.
+    With [engine] asyncio=true the location checks, the update check and the
+    status API run here; blocking calls (HTTP via requests) go to a small
+    fixed executor instead of a thread per action.
+
+    Not everything moved: sound playback, the network watcher, the idle
+    backend and history maintenance keep their own threads. A timeout or
+    cancel() stops waiting for a coroutine, but a blocking call already on
+    the executor runs until its own (HTTP) timeout. shutdown() cancels the
+    coroutines and does not wait for those calls.
+    """
+    def __init__(self, max_blocking_workers=3):
+        self.loop = asyncio.new_event_loop()
+        self.executor = ThreadPoolExecutor(max_workers=max_blocking_workers, thread_name_prefix="async-io")
+        self.loop.set_default_executor(self.executor)
+        self.bridge = QtBridge()
+        self._thread = threading.Thread(target=self._run, name="async-core", daemon=True)
+        self._started = threading.Event()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(self._started.set)
+        self.loop.run_forever()
+
+    def start(self):
+        self._thread.start()
+        self._started.wait(5)
+        return self
+
+    def submit(self, coro, timeout=None, on_done=None, name=None):
+        """
+        Schedules `coro` on the loop. Returns a concurrent.futures.Future (cancel() works).
+        `on_done(result, error)` is called on the Qt thread when it finishes.
+        """
+        async def guarded():
+            if timeout is None:
+                return await coro
+            return await asyncio.wait_for(coro, timeout)
+
+        future = asyncio.run_coroutine_threadsafe(guarded(), self.loop)
+        if on_done is not None:
+            def done(f):
+                if f.cancelled():
+                    return
+                error = f.exception()
+                result = None if error else f.result()
+                if isinstance(error, asyncio.TimeoutError):
+                    log.warning("Async task %s timed out after %ss", name or coro, timeout)
+                self.bridge.call_soon(lambda: on_done(result, error))
+            future.add_done_callback(done)
+        return future
+
+    async def run_blocking(self, fn, *args):
+        """Awaitable wrapper for blocking calls, executed on the fixed executor."""
+        return await self.loop.run_in_executor(None, fn, *args)
+
+    def pending_tasks(self):
+        if not self.loop.is_running():
+            return 0
+        future = asyncio.run_coroutine_threadsafe(self._count_tasks(), self.loop)
+        try:
+            return future.result(1)
+        except Exception:
+            return -1
+
+    async def _count_tasks(self):
+        return len([t for t in asyncio.all_tasks() if t is not asyncio.current_task()])
+
+    def shutdown(self, timeout=2.0):
+        """Cancels all tasks, stops the loop and releases the executor without waiting for blocked calls."""
+        if not self.loop.is_running():
+            return
+        async def cancel_all():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        try:
+            asyncio.run_coroutine_threadsafe(cancel_all(), self.loop).result(timeout)
+        except (CancelledError, Exception) as e:
+            log.warning("Async core shutdown: %r", e)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        log.info("Async core stopped.")
@@ -1,19 +1,24 @@
 # File: src/config.py
 
 import os
+import secrets
+import logging
 from PySide6.QtCore import QSettings
 from utils import resource_path
-from constants import APP_NAME, __version__
+from constants import APP_NAME, UPDATE_URL, __version__
+
+log = logging.getLogger(__name__)
 
 SETTINGS_FILE_PATH = resource_path(f"{APP_NAME}.ini")
 
 class ConfigManager:
-    def __init__(self):
-        self.settings = QSettings(SETTINGS_FILE_PATH, QSettings.Format.IniFormat)
+    def __init__(self, path=SETTINGS_FILE_PATH):
+        self.path = path
+        self.settings = QSettings(path, QSettings.Format.IniFormat)
         
         # Check if the file exists. If not, create it and populate it.
-        if not os.path.exists(SETTINGS_FILE_PATH) or not self.settings.childGroups():
-            print(f"INI file not found or empty. Creating a new one with default settings at: {SETTINGS_FILE_PATH}")
+        if not os.path.exists(path) or not self.settings.childGroups():
+            log.info("INI file not found or empty. Creating a new one with default settings at: %s", path)
             self._create_default_ini()
 
         self.load_settings()
@@ -35,11 +40,70 @@ class ConfigManager:
         
         # Section [intervals]
         self.settings.setValue("intervals/active", 7)
+        self.settings.setValue("intervals/policy", "fixed") # fixed or adaptive (fewer checks, slower to notice changes)
+        self.settings.setValue("intervals/max_backoff", 300) # seconds, while checks keep failing
+        self.settings.setValue("intervals/max_stable", 60) # seconds, while the IP stays the same
         
         # Section [idle]
         self.settings.setValue("idle/enabled", True)
         self.settings.setValue("idle/threshold_mins", 15)
         self.settings.setValue("idle/interval_mins", 60)
+        self.settings.setValue("idle/backend", "auto") # auto, win32, input (Linux evdev) or logind
+
+        # Section [network]
+        self.settings.setValue("network/backend", "native") # native or powershell (legacy)
+        self.settings.setValue("network/providers", "ipify,myip")
+        self.settings.setValue("network/timeout", 10)
+        self.settings.setValue("network/mode", "sequential") # sequential or race
+        self.settings.setValue("network/quorum", 1)
+        self.settings.setValue("network/watch_events", True) # react to local network changes where supported
+        self.settings.setValue("network/safety_interval", 300) # seconds between polls while the watcher runs
+        self.settings.setValue("network/precheck", True) # skip the providers when there is no default route
+        self.settings.setValue("network/precheck_host", "") # optional TCP probe (e.g. 1.1.1.1), only logged when it fails
+        self.settings.setValue("network/precheck_port", 443)
+        self.settings.setValue("network/precheck_timeout_ms", 1000)
+
+        # Section [updates]
+        self.settings.setValue("updates/url", UPDATE_URL) # can point at a local server for testing
+        self.settings.setValue("updates/default_max_age_mins", 60) # freshness when the server sends no Cache-Control
+
+        # Section [engine]
+        self.settings.setValue("engine/asyncio", False) # run location and update checks on one asyncio loop
+
+        # Section [cache]
+        self.settings.setValue("cache/enabled", True)
+        self.settings.setValue("cache/ttl_hours", 24)
+        self.settings.setValue("cache/max_entries", 256)
+
+        # Section [history]
+        self.settings.setValue("history/enabled", True) # keep every IP change in a local database
+        self.settings.setValue("history/retention_days", 365)
+        self.settings.setValue("history/max_entries", 1000000)
+
+        # Section [api]
+        self.settings.setValue("api/enabled", False) # local status/metrics endpoint on 127.0.0.1
+        self.settings.setValue("api/port", 47600)
+        self.settings.setValue("api/token", "") # generated on first start with the API enabled
+
+        # Section [logging]
+        self.settings.setValue("logging/level", "INFO") # DEBUG, INFO, WARNING or ERROR
+        self.settings.setValue("logging/modules", "") # per-module levels, e.g. ip_fetcher=DEBUG,scheduler=WARNING
+        self.settings.setValue("logging/file", True) # TrayFlag.log next to the settings
+        self.settings.setValue("logging/max_kb", 1024) # rotated at this size
+        self.settings.setValue("logging/backups", 3)
+        self.settings.setValue("logging/dedup_seconds", 60) # a repeated message is written once per window
+
+        # Section [debug]
+        self.settings.setValue("debug/tracing", False) # record timing spans of the update pipeline
+        self.settings.setValue("debug/trace_capacity", 4096) # spans kept in the ring buffer
+        self.settings.setValue("debug/trace_file", "") # Chrome trace JSON written at exit; empty = none
+        self.settings.setValue("debug/resource_sample_mins", 60) # log RSS, threads and QObject counts; 0 = off
+        self.settings.setValue("debug/tracemalloc", False) # trace allocations for /memory of the status API
+        self.settings.setValue("debug/tracemalloc_frames", 1) # stack frames kept per allocation
+
+        # Section [geoip]
+        self.settings.setValue("geoip/database", "") # .mmdb, .csv or compiled .idx; empty = disabled
+        self.settings.setValue("geoip/remote_lookup", True) # False = never call ipinfo, use the local database only
         
         # Make sure everything is written to disk
         self.settings.sync()
@@ -56,10 +120,64 @@ class ConfigManager:
         self.sound = self.settings.value("main/sound", True, type=bool)
         
         self.update_interval = self.settings.value("intervals/active", 7, type=int)
+        self.poll_policy = self.settings.value("intervals/policy", "fixed", type=str)
+        self.poll_max_backoff = self.settings.value("intervals/max_backoff", 300, type=int)
+        self.poll_max_stable = self.settings.value("intervals/max_stable", 60, type=int)
         
         self.idle_enabled = self.settings.value("idle/enabled", True, type=bool)
         self.idle_threshold_mins = self.settings.value("idle/threshold_mins", 15, type=int)
         self.idle_interval_mins = self.settings.value("idle/interval_mins", 60, type=int)
+        self.idle_backend = self.settings.value("idle/backend", "auto", type=str)
+
+        self.network_backend = self.settings.value("network/backend", "native", type=str)
+        self.network_providers = self._read_list("network/providers", "ipify,myip")
+        self.network_timeout = self.settings.value("network/timeout", 10, type=int)
+        self.network_mode = self.settings.value("network/mode", "sequential", type=str)
+        self.network_quorum = self.settings.value("network/quorum", 1, type=int)
+        self.network_watch_events = self.settings.value("network/watch_events", True, type=bool)
+        self.network_safety_interval = self.settings.value("network/safety_interval", 300, type=int)
+        self.precheck_enabled = self.settings.value("network/precheck", True, type=bool)
+        self.precheck_host = self.settings.value("network/precheck_host", "", type=str)
+        self.precheck_port = self.settings.value("network/precheck_port", 443, type=int)
+        self.precheck_timeout_ms = self.settings.value("network/precheck_timeout_ms", 1000, type=int)
+
+        self.update_url = self.settings.value("updates/url", UPDATE_URL, type=str)
+        self.update_default_max_age_mins = self.settings.value("updates/default_max_age_mins", 60, type=int)
+
+        self.asyncio_engine = self.settings.value("engine/asyncio", False, type=bool)
+
+        self.cache_enabled = self.settings.value("cache/enabled", True, type=bool)
+        self.cache_ttl_hours = self.settings.value("cache/ttl_hours", 24, type=int)
+        self.cache_max_entries = self.settings.value("cache/max_entries", 256, type=int)
+
+        self.history_enabled = self.settings.value("history/enabled", True, type=bool)
+        self.history_retention_days = self.settings.value("history/retention_days", 365, type=int)
+        self.history_max_entries = self.settings.value("history/max_entries", 1000000, type=int)
+
+        self.api_enabled = self.settings.value("api/enabled", False, type=bool)
+        self.api_port = self.settings.value("api/port", 47600, type=int)
+        self.api_token = self.settings.value("api/token", "", type=str)
+        if self.api_enabled and not self.api_token:
+            self.api_token = secrets.token_urlsafe(24)
+            self.settings.setValue("api/token", self.api_token)
+            log.info("Generated a status API token (api/token in %s)", self.path)
+
+        self.log_level = self.settings.value("logging/level", "INFO", type=str)
+        self.log_modules = dict(item.partition("=")[::2] for item in self._read_list("logging/modules", ""))
+        self.log_file = self.settings.value("logging/file", True, type=bool)
+        self.log_max_kb = self.settings.value("logging/max_kb", 1024, type=int)
+        self.log_backups = self.settings.value("logging/backups", 3, type=int)
+        self.log_dedup_seconds = self.settings.value("logging/dedup_seconds", 60, type=int)
+
+        self.tracing = self.settings.value("debug/tracing", False, type=bool)
+        self.trace_capacity = self.settings.value("debug/trace_capacity", 4096, type=int)
+        self.trace_file = self.settings.value("debug/trace_file", "", type=str)
+        self.resource_sample_mins = self.settings.value("debug/resource_sample_mins", 60, type=int)
+        self.tracemalloc = self.settings.value("debug/tracemalloc", False, type=bool)
+        self.tracemalloc_frames = self.settings.value("debug/tracemalloc_frames", 1, type=int)
+
+        self.geoip_database = self.settings.value("geoip/database", "", type=str)
+        self.geoip_remote_lookup = self.settings.value("geoip/remote_lookup", True, type=bool)
         
         self._check_and_update_version()
 
@@ -79,9 +197,16 @@ class ConfigManager:
         
         self.load_settings()
 
+    def _read_list(self, key, default):
+        """Reads a comma-separated value. QSettings may already return it as a list."""
+        value = self.settings.value(key, default)
+        if isinstance(value, str):
+            value = value.split(",")
+        return [str(item).strip() for item in value if str(item).strip()]
+
     def _check_and_update_version(self):
         """Checks the version in the .ini and updates it if necessary."""
         ini_version = self.settings.value(f"{APP_NAME}/version", "0.0.0", type=str)
         if ini_version != __version__:
-            print(f"INFO: INI version mismatch. Updating from {ini_version} to {__version__}.")
+            log.info("INI version mismatch. Updating from %s to %s.", ini_version, __version__)
             self.settings.setValue(f"{APP_NAME}/version", __version__)
@@ -0,0 +1,86 @@
+# File: src/connectivity.py
+
+import os
+import errno
+import socket
+import select
+
+RTF_UP = 0x0001
+PROC_ROUTE = "/proc/net/route"
+PROC_IPV6_ROUTE = "/proc/net/ipv6_route"
+
+def _linux_default_route(route_table, ipv6_route_table):
+    """Looks for an 'up' default route in the /proc route tables (or fakes of them)."""
+    try:
+        with open(route_table) as f:
+            next(f, None) # header
+            for line in f:
+                fields = line.split()
+                if len(fields) >= 8 and fields[1] == "00000000" and fields[7] == "00000000" and int(fields[3], 16) & RTF_UP:
+                    return True
+    except OSError:
+        pass
+    try:
+        with open(ipv6_route_table) as f:
+            for line in f:
+                fields = line.split()
+                # dest, dest prefix, ..., flags, iface
+                if len(fields) >= 10 and fields[0] == "0" * 32 and fields[1] == "00" and fields[9] != "lo" and int(fields[8], 16) & RTF_UP:
+                    return True
+    except OSError:
+        pass
+    return False
+
+def _udp_route_probe(address=("192.0.2.1", 53)):
+    """
+    Portable fallback: connect() on a UDP socket only asks the OS for a route,
+    nothing is sent. Fails with ENETUNREACH when there is no default route.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.connect(address)
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+def has_default_route(route_table=PROC_ROUTE, ipv6_route_table=PROC_IPV6_ROUTE):
+    if os.path.exists(route_table) or os.path.exists(ipv6_route_table):
+        return _linux_default_route(route_table, ipv6_route_table)
+    return _udp_route_probe()
+
+def tcp_probe(host, port, timeout=1.0):
+    """Non-blocking TCP connect to host:port. True if the handshake completes within `timeout`."""
+    try:
+        family = socket.AF_INET6 if ":" in host else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+    except OSError:
+        return False
+    try:
+        sock.setblocking(False)
+        result = sock.connect_ex((host, port))
+        if result not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK, getattr(errno, "WSAEWOULDBLOCK", -1)):
+            return False
+        _, writable, failed = select.select([], [sock], [sock], timeout)
+        if not writable or failed:
+            return False
+        return sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+def check_connectivity(host="", port=443, timeout=1.0,
+                       route_table=PROC_ROUTE, ipv6_route_table=PROC_IPV6_ROUTE):
+    """
+    Fast local pre-flight before the real IP providers. Returns (online, reason).
+    Only a missing default route makes it offline. A failed TCP probe of `host`
+    (an empty host skips it) is reported in `reason` but stays online: a
+    blocked or filtered probe host says little about the providers.
+    """
+    if not has_default_route(route_table, ipv6_route_table):
+        return False, "no default route"
+    if host and not tcp_probe(host, port, timeout):
+        return True, f"{host}:{port} unreachable"
+    return True, ""
@@ -5,3 +5,4 @@ ORG_NAME = "https://github.com/Ridbowt/TrayFlag"
 LINK_COLOR = "#6CB6FF"
 __version__ = "1.16.0"
 RELEASE_DATE = "2026-04-28"
+UPDATE_URL = "https://raw.githubusercontent.com/Ridbowt/TrayFlag/main/TrayFlagLastVersion.txt"
@@ -2,11 +2,14 @@
 
 import os
 import webbrowser
+import logging
 from PySide6 import QtWidgets, QtGui, QtCore
 from utils import resource_path
 from constants import APP_NAME, LINK_COLOR
 import themes
 
+log = logging.getLogger(__name__)
+
 class AboutDialog(QtWidgets.QDialog):
     def __init__(self, app, app_icon, tr, version, release_date, logo_pixmap, parent=None):
         super().__init__(parent)
@@ -129,7 +132,7 @@ class AboutDialog(QtWidgets.QDialog):
         except Exception as e:
             # If there's any other error
             sponsors_text.setPlainText(self.tr.get("sponsors_list_error"))
-            print(f"Error loading sponsors.txt: {e}") # Для отладки
+            log.warning("Error loading sponsors.txt: %s", e) # Для отладки
         
         sponsors_layout.addWidget(sponsors_text)
 
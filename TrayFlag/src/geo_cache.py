@@ -0,0 +1,123 @@
+# File: src/geo_cache.py
+
+import json
+import time
+import sqlite3
+import threading
+from utils import resource_path
+from constants import APP_NAME
+
+GEO_CACHE_PATH = resource_path(f"{APP_NAME}_geocache.db")
+
+class GeoCache:
+    """
+    Persistent cache of geo lookups (country, city, ISP) keyed by IP.
+    Entries expire after `ttl_seconds`; the table is kept at `max_entries`
+    by evicting the least recently used IPs. Hits only note the time in
+    memory; the last-used times are written in one batch before anything
+    that orders by them (put, latest), on purge_expired() and on close().
+    """
+    TOUCH_BATCH = 64 # IPs with a pending last-used time that force a write
+    def __init__(self, path=GEO_CACHE_PATH, ttl_seconds=24 * 3600, max_entries=256):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._touched = {} # ip -> last-used time not written yet
+        # Lookups run on worker threads, so the connection is shared under a lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS geo_cache ("
+            " ip TEXT PRIMARY KEY, data TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_geo_cache_last_used ON geo_cache(last_used)")
+        self._conn.commit()
+
+    def get(self, ip):
+        """Returns the cached ip_data dict for `ip`, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT data, fetched_at FROM geo_cache WHERE ip = ?", (ip,)).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                # Expired rows stay until purge_expired(): peek() still uses them as a hint
+                self.misses += 1
+                return None
+            self._touched[ip] = now
+            if len(self._touched) >= self.TOUCH_BATCH:
+                self._flush_touched()
+                self._conn.commit()
+            self.hits += 1
+            return json.loads(row[0])
+
+    def peek(self, ip):
+        """Returns the entry for `ip` even if expired, without touching counters or LRU order."""
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM geo_cache WHERE ip = ?", (ip,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, ip, ip_data):
+        """Stores a successful lookup and evicts the least recently used entries."""
+        now = time.time()
+        with self._lock:
+            self._touched.pop(ip, None)
+            self._flush_touched() # eviction below orders by last_used
+            self._conn.execute(
+                "INSERT OR REPLACE INTO geo_cache (ip, data, fetched_at, last_used) VALUES (?, ?, ?, ?)",
+                (ip, json.dumps(ip_data), now, now)
+            )
+            self._conn.execute(
+                "DELETE FROM geo_cache WHERE ip NOT IN "
+                "(SELECT ip FROM geo_cache ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def latest(self):
+        """
+        Returns (ip_data, last used time) of the most recently used, still
+        valid entry, or None (used to pre-warm the display at startup).
+        """
+        with self._lock:
+            if self._touched:
+                self._flush_touched()
+                self._conn.commit()
+            row = self._conn.execute(
+                "SELECT data, last_used FROM geo_cache WHERE fetched_at >= ? ORDER BY last_used DESC LIMIT 1",
+                (time.time() - self.ttl_seconds,)
+            ).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def purge_expired(self):
+        """Deletes expired entries. Returns how many were removed."""
+        with self._lock:
+            self._flush_touched()
+            cursor = self._conn.execute("DELETE FROM geo_cache WHERE fetched_at < ?", (time.time() - self.ttl_seconds,))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def stats(self):
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM geo_cache").fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'size': size}
+
+    def close(self):
+        with self._lock:
+            if self._touched:
+                self._flush_touched()
+                self._conn.commit()
+            self._conn.close()
+
+    def _flush_touched(self):
+        """Writes the pending last-used times (lock held; the caller commits)."""
+        if self._touched:
+            self._conn.executemany("UPDATE geo_cache SET last_used = ? WHERE ip = ?",
+                                   [(used, ip) for ip, used in self._touched.items()])
+            self._touched.clear()
+
+def is_cacheable(ip_data):
+    """Only complete answers are cached, never error placeholders."""
+    full_data = (ip_data or {}).get('full_data') or {}
+    return bool(full_data.get('country_code')) and not full_data.get('error')
@@ -0,0 +1,167 @@
+# File: src/geoip_db.py
+
+import os
+import csv
+import mmap
+import json
+import struct
+import ipaddress
+import logging
+
+log = logging.getLogger(__name__)
+
+try:
+    import maxminddb
+    MAXMINDDB_AVAILABLE = True
+except ImportError:
+    MAXMINDDB_AVAILABLE = False
+
+# --- Compiled range index format ---
+# Header: magic, IPv4 record count, IPv6 record count, offset of the ASN -> org JSON table.
+# Records are sorted by start address and store addresses as big-endian bytes,
+# so plain bytes comparison orders them numerically and no parsing is needed at load time.
+INDEX_MAGIC = b"TFGEOIP1"
+_HEADER = struct.Struct(">8sIIQ")
+_V4 = struct.Struct(">4s4s2sI")    # start, end, country code, ASN
+_V6 = struct.Struct(">16s16s2sI")
+
+
+class RangeIndex:
+    """Memory-mapped, binary-searchable IPv4/IPv6 range index built by build_index()."""
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count_v4, self.count_v6, self._orgs_offset = _HEADER.unpack_from(self._map, 0)
+        if magic != INDEX_MAGIC:
+            self.close()
+            raise ValueError(f"Not a TrayFlag GeoIP index: {path}")
+        self._v4_offset = _HEADER.size
+        self._v6_offset = self._v4_offset + self.count_v4 * _V4.size
+        self._orgs = None
+
+    def _search(self, packed, record, offset, count):
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start, end, cc, asn = record.unpack_from(self._map, offset + mid * record.size)
+            if packed < start:
+                hi = mid
+            elif packed > end:
+                lo = mid + 1
+            else:
+                return cc, asn
+        return None
+
+    def _org_name(self, asn):
+        if self._orgs is None:
+            raw = self._map[self._orgs_offset:]
+            self._orgs = json.loads(raw.decode("utf-8")) if raw else {}
+        return self._orgs.get(str(asn), "")
+
+    def lookup(self, ip_address):
+        """Returns {'country_code', 'asn', 'isp'} for the IP, or None if it is not covered."""
+        try:
+            ip = ipaddress.ip_address(ip_address)
+        except ValueError:
+            return None
+        if ip.version == 4:
+            found = self._search(ip.packed, _V4, self._v4_offset, self.count_v4)
+        else:
+            found = self._search(ip.packed, _V6, self._v6_offset, self.count_v6)
+        if not found:
+            return None
+        cc, asn = found
+        org = self._org_name(asn) if asn else ""
+        return {
+            'country_code': cc.decode("ascii").strip("\0"),
+            'asn': asn or None,
+            'isp': f"AS{asn} {org}".strip() if asn else "",
+        }
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+
+class MmdbDatabase:
+    """MaxMind-style .mmdb database, read through the optional maxminddb package."""
+    def __init__(self, path):
+        if not MAXMINDDB_AVAILABLE:
+            raise ImportError("maxminddb is not installed")
+        self.path = path
+        self._reader = maxminddb.open_database(path, maxminddb.MODE_MMAP)
+
+    def lookup(self, ip_address):
+        try:
+            record = self._reader.get(ip_address)
+        except ValueError:
+            return None
+        if not record:
+            return None
+        country = record.get("country") or record.get("registered_country") or {}
+        asn = record.get("autonomous_system_number")
+        org = record.get("autonomous_system_organization", "")
+        return {
+            'country_code': country.get("iso_code", "") if isinstance(country, dict) else "",
+            'asn': asn,
+            'isp': f"AS{asn} {org}".strip() if asn else org,
+        }
+
+    def close(self):
+        self._reader.close()
+
+
+def build_index(csv_path, index_path):
+    """
+    Compiles a CSV of IP ranges into a RangeIndex file.
+    Rows: start_ip,end_ip,country_code[,asn[,org]] (a header row and '#' comments are skipped).
+    """
+    v4, v6, orgs = [], [], {}
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if not row or row[0].startswith("#"):
+                continue
+            try:
+                start = ipaddress.ip_address(row[0].strip())
+                end = ipaddress.ip_address(row[1].strip())
+            except (ValueError, IndexError):
+                continue # header or malformed line
+            if start.version != end.version:
+                continue
+            cc = row[2].strip().upper().encode("ascii")[:2] if len(row) > 2 else b""
+            asn = int(row[3]) if len(row) > 3 and row[3].strip().isdigit() else 0
+            if asn and len(row) > 4 and row[4].strip():
+                orgs[str(asn)] = row[4].strip()
+            (v4 if start.version == 4 else v6).append((start.packed, end.packed, cc.ljust(2, b"\0"), asn))
+
+    v4.sort()
+    v6.sort()
+    orgs_offset = _HEADER.size + len(v4) * _V4.size + len(v6) * _V6.size
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "wb") as out:
+        out.write(_HEADER.pack(INDEX_MAGIC, len(v4), len(v6), orgs_offset))
+        for rec in v4:
+            out.write(_V4.pack(*rec))
+        for rec in v6:
+            out.write(_V6.pack(*rec))
+        out.write(json.dumps(orgs, separators=(",", ":")).encode("utf-8"))
+    os.replace(tmp_path, index_path)
+    return len(v4), len(v6)
+
+def open_database(path):
+    """
+    Opens a local GeoIP database by extension: .mmdb (needs maxminddb),
+    .csv (compiled to a .idx next to it when missing or stale), or a compiled index.
+    """
+    if path.lower().endswith(".mmdb"):
+        return MmdbDatabase(path)
+    if path.lower().endswith(".csv"):
+        index_path = path + ".idx"
+        if not os.path.exists(index_path) or os.path.getmtime(index_path) < os.path.getmtime(path):
+            count_v4, count_v6 = build_index(path, index_path)
+            log.info("Compiled GeoIP index %s: %s IPv4 / %s IPv6 ranges", index_path, count_v4, count_v6)
+        path = index_path
+    return RangeIndex(path)
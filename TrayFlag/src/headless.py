@@ -0,0 +1,272 @@
+# File: src/headless.py
+
+"""
+Headless mode (main.py --headless): the same UpdateHandler pipeline as the
+tray app, on a QCoreApplication and without any widget or GUI module, for
+servers and CI. Every change is written as one JSON line:
+
+    {"event": "ip_changed", "time": "...", "ip": "...", "country_code": "NL", ...}
+
+Events: ip_changed, ip_confirmed (the first check matches the last run),
+network_lost, network_restored. With --once a single check is run and the
+exit code reports its result (see the EXIT_* constants).
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import socket
+import argparse
+import logging
+from PySide6 import QtCore
+
+from config import ConfigManager, SETTINGS_FILE_PATH
+from constants import APP_NAME, __version__
+from state_manager import AppState, SNAPSHOT_PATH
+from history_store import HistoryStore, HISTORY_DB_PATH
+from scheduler import Scheduler
+from update_handler import UpdateHandler
+import tracing
+import app_logging
+import resource_monitor
+import runtime_check
+
+log = logging.getLogger(__name__)
+
+EXIT_OK = 0 # IP obtained, same as the last run (or the first run)
+EXIT_ERROR = 1 # unexpected error
+EXIT_USAGE = 2 # bad arguments (argparse)
+EXIT_NO_NETWORK = 3 # no external IP could be obtained
+EXIT_IP_CHANGED = 4 # the IP differs from the one recorded by the last run
+EXIT_COUNTRY_MISMATCH = 5 # the country is not the one given with --expect-country
+EXIT_TIMEOUT = 6 # no answer within --timeout
+
+STATE_SNAPSHOT_DELAY = 2 # seconds, as in the tray app
+
+class EventWriter:
+    """Writes one JSON object per line to a stream and flushes it, so pipes see events immediately."""
+    def __init__(self, stream):
+        self.stream = stream
+        self.written = 0
+
+    def write(self, event, **fields):
+        record = {'event': event, 'time': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), **fields}
+        self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.stream.flush()
+        self.written += 1
+
+
+class HeadlessApp(QtCore.QObject):
+    """Runs the IP checks and reports changes through an EventWriter instead of a tray icon."""
+    def __init__(self, config, writer, once=False, expect_country=None, state_dir=None, core=None):
+        super().__init__()
+        self.config = config
+        self.core = core
+        self.writer = writer
+        self.once = once
+        self.expect_country = expect_country.upper() if expect_country else None
+        self.exit_code = None
+
+        snapshot_path, history_path = SNAPSHOT_PATH, HISTORY_DB_PATH
+        if state_dir:
+            snapshot_path = os.path.join(state_dir, os.path.basename(SNAPSHOT_PATH))
+            history_path = os.path.join(state_dir, os.path.basename(HISTORY_DB_PATH))
+        self.history_store = None
+        if config.history_enabled:
+            try:
+                self.history_store = HistoryStore(history_path, retention_days=config.history_retention_days,
+                                                  max_entries=config.history_max_entries)
+            except Exception as e:
+                log.warning("IP history disabled: %s", e)
+        self.state = AppState(snapshot_path=snapshot_path, history=self.history_store)
+        self.state.on_change = self._schedule_state_snapshot
+        # The IP of the last run: the first check reports whether it is still the same
+        self.state.restore_snapshot()
+
+        self.scheduler = Scheduler()
+        self.update_handler = UpdateHandler(config, self.state, self.scheduler, core)
+        self.update_handler.ipDataReceived.connect(self.on_ip_data_received)
+        self.status_server = None
+
+    def start(self):
+        # No user at a headless box: never enter idle mode. Nothing to paint first, so check right away.
+        self.update_handler.start(idle_detection=False, first_check_delay=0)
+        if not self.once:
+            resource_monitor.install(self.config, self.scheduler)
+        if self.config.api_enabled and not self.once:
+            from status_server import StatusServer
+            try:
+                self.status_server = StatusServer(self.config.api_token, self.config.api_port,
+                                                  history=self.history_store, core=self.core).start()
+                self.update_handler.poll_listeners.append(self.publish_status)
+                self.publish_status()
+            except Exception as e:
+                log.warning("Status API disabled: %s", e)
+                self.status_server = None
+
+    def publish_status(self, *args):
+        from status_server import collect_status
+        status, metrics = collect_status(self.state, self.update_handler, self.scheduler)
+        status['version'] = __version__
+        status['headless'] = True
+        self.status_server.publish(status, metrics)
+
+    def stop(self):
+        self.update_handler.stop()
+        if self.status_server:
+            self.status_server.stop()
+        if self.scheduler.is_scheduled("state_snapshot"):
+            self.scheduler.cancel("state_snapshot")
+            self.state.save_snapshot()
+        if self.history_store:
+            self.history_store.close()
+
+    def _schedule_state_snapshot(self):
+        if self.once:
+            return # written once, before exiting
+        if not self.scheduler.is_scheduled("state_snapshot"):
+            self.scheduler.schedule_once("state_snapshot", STATE_SNAPSHOT_DELAY, self.state.save_snapshot)
+
+    def _location_fields(self, data, previous_ip=None):
+        fields = {
+            'ip': data.get('ip'),
+            'country_code': (data.get('country_code') or "").upper(),
+            'city': data.get('city'),
+            'isp': data.get('isp'),
+            'previous_ip': previous_ip,
+        }
+        if self.expect_country:
+            fields['country_mismatch'] = fields['country_code'] != self.expect_country
+        return fields
+
+    @QtCore.Slot(object, bool)
+    def on_ip_data_received(self, ip_data, is_forced):
+        tracing.record("signal.delivery", self.update_handler.emitted_at, signal="ipDataReceived")
+        previous_ip = self.state.last_known_external_ip
+        if not ip_data or ip_data.get('ip') == "N/A":
+            if previous_ip != "N/A":
+                error = (ip_data or {}).get('full_data', {}).get('error', 'No external IP detected')
+                self.writer.write("network_lost", previous_ip=self.state.current_location_data.get('ip'), error=error)
+            self.state.clear_network_state()
+            self._finish(EXIT_NO_NETWORK)
+            return
+
+        full_data = ip_data.get('full_data') or {'ip': ip_data.get('ip'), 'country_code': '??', 'city': 'N/A', 'isp': 'N/A'}
+        current_ip = full_data.get('ip') or ip_data.get('ip')
+        # Kept while the network is down, so it is still the IP seen before the outage
+        last_ip = self.state.current_location_data.get('ip')
+        was_stale = self.state.is_stale
+        self.state.update_location(full_data)
+        if current_ip != previous_ip:
+            event = "network_restored" if previous_ip == "N/A" and current_ip == last_ip else "ip_changed"
+            self.writer.write(event, **self._location_fields(full_data, last_ip))
+        elif was_stale:
+            self.writer.write("ip_confirmed", **self._location_fields(full_data, last_ip))
+
+        if self.expect_country and (full_data.get('country_code') or "").upper() != self.expect_country:
+            self._finish(EXIT_COUNTRY_MISMATCH)
+        elif last_ip and current_ip != last_ip:
+            self._finish(EXIT_IP_CHANGED)
+        else:
+            self._finish(EXIT_OK)
+
+    def _finish(self, code):
+        if not self.once or self.exit_code is not None:
+            return
+        self.exit_code = code
+        self.state.save_snapshot()
+        QtCore.QCoreApplication.instance().exit(code)
+
+    def on_timeout(self, seconds):
+        if self.exit_code is None:
+            self.writer.write("timeout", seconds=seconds)
+            self.exit_code = EXIT_TIMEOUT
+            QtCore.QCoreApplication.instance().exit(EXIT_TIMEOUT)
+
+
+def _install_signal_handlers(app):
+    """
+    Ctrl+C / SIGTERM quit the event loop. Python only runs signal handlers
+    between bytecodes, so the signal is also written to a socket the Qt
+    loop watches (no polling timer needed to notice it).
+    """
+    reader, writer = socket.socketpair()
+    reader.setblocking(False)
+    writer.setblocking(False)
+    signal.set_wakeup_fd(writer.fileno())
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *args: app.quit())
+    notifier = QtCore.QSocketNotifier(reader.fileno(), QtCore.QSocketNotifier.Type.Read)
+    notifier.activated.connect(lambda *args: reader.recv(64))
+    return reader, writer, notifier # keep them alive
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog=f"{APP_NAME} --headless",
+                                     description="Watch the external IP without a GUI; events are JSON lines.")
+    parser.add_argument("--headless", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--profile-startup", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--once", action="store_true", help="run one check and exit with a status code")
+    parser.add_argument("--output", metavar="PATH", help="append events to PATH instead of stdout")
+    parser.add_argument("--config", metavar="PATH", default=SETTINGS_FILE_PATH, help="settings .ini to use")
+    parser.add_argument("--state-dir", metavar="DIR", help="where the state snapshot and history are kept")
+    parser.add_argument("--interval", type=int, metavar="SECONDS", help="override [intervals] active")
+    parser.add_argument("--expect-country", metavar="CC", help="exit/flag when the country differs (e.g. a VPN exit)")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds to wait for --once (default: 60)")
+    parser.add_argument("--trace", metavar="PATH", help="record timing spans and write them to PATH as a Chrome trace")
+    return parser.parse_args(argv)
+
+def main(argv):
+    args = parse_args(argv)
+    # Events own stdout; log records (and anything a library prints) go to stderr
+    events_stream = open(args.output, "a", encoding="utf-8") if args.output else sys.stdout
+    sys.stdout = sys.stderr
+    app_logging.install()
+    log.info("--- %s v%s starting headless ---", APP_NAME, __version__)
+    if runtime_check.ensure_safe_runtime():
+        return EXIT_ERROR
+
+    qt_app = QtCore.QCoreApplication([sys.argv[0]])
+    qt_app.setApplicationName(APP_NAME)
+    keep_alive = _install_signal_handlers(qt_app)
+
+    if args.state_dir:
+        os.makedirs(args.state_dir, exist_ok=True)
+    config = ConfigManager(args.config)
+    app_logging.configure(config, log_path=os.path.join(args.state_dir, f"{APP_NAME}.log") if args.state_dir else None)
+    if args.interval:
+        config.update_interval = args.interval
+    if args.once:
+        config.network_watch_events = False
+    trace_file = args.trace or config.trace_file
+    if args.trace or config.tracing:
+        tracing.enable(config.trace_capacity)
+    core = None
+    if config.asyncio_engine:
+        from async_core import AsyncCore
+        core = AsyncCore().start()
+
+    headless = HeadlessApp(config, EventWriter(events_stream), once=args.once,
+                           expect_country=args.expect_country, state_dir=args.state_dir, core=core)
+    if args.once:
+        QtCore.QTimer.singleShot(int(args.timeout * 1000), lambda: headless.on_timeout(args.timeout))
+    headless.start()
+    try:
+        code = qt_app.exec()
+    finally:
+        headless.stop()
+        if core:
+            core.shutdown()
+        if args.output:
+            events_stream.close()
+        if tracing.is_enabled():
+            tracing.log_summary()
+            if trace_file:
+                try:
+                    tracing.export_chrome_trace(trace_file)
+                except OSError as e:
+                    log.error("Could not write the trace file: %s", e)
+    if args.once and headless.exit_code is None:
+        return EXIT_ERROR # interrupted before the check finished
+    return code
@@ -0,0 +1,236 @@
+# File: src/history_store.py
+
+import time
+import sqlite3
+import threading
+import logging
+from utils import resource_path
+from constants import APP_NAME
+
+log = logging.getLogger(__name__)
+
+HISTORY_DB_PATH = resource_path(f"{APP_NAME}_history.db")
+FIELDS = ('ip', 'country_code', 'city', 'isp')
+# How long a write waits for the file while compact() holds it; then the location is queued
+BUSY_TIMEOUT = 0.2
+COMPACT_TIMEOUT = 60
+
+class HistoryStore:
+    """
+    Append-only log of IP transitions: one row per change of external IP,
+    not per check, so years of history stay small. A transition row is just
+    (time, IP, location id); country/city/ISP triples are stored once in
+    `locations`. Rows are indexed by time and by IP for range queries ("all
+    IPs in the last 24 h", "time spent per country"). rotate() drops rows
+    beyond `retention_days` / `max_entries`, compact() returns the freed
+    pages to the file system on a connection of its own, so it never holds
+    the lock record() needs; a location recorded meanwhile is queued and
+    written once the file is free again.
+    """
+    def __init__(self, path=HISTORY_DB_PATH, retention_days=365, max_entries=1_000_000):
+        self.path = path
+        self.retention_days = retention_days
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._location_ids = {} # (country_code, city, isp) -> locations.id
+        self._pending = [] # (ip, values, ts) recorded while compaction held the file
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=BUSY_TIMEOUT)
+        # WAL + NORMAL: an append is one sequential write, without an fsync per transition
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS locations ("
+            " id INTEGER PRIMARY KEY, country_code TEXT, city TEXT, isp TEXT,"
+            " UNIQUE (country_code, city, isp))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS transitions ("
+            " id INTEGER PRIMARY KEY, ts REAL NOT NULL, ip TEXT NOT NULL, location_id INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_transitions_ts ON transitions(ts)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_transitions_ip ON transitions(ip)")
+        self._conn.commit()
+        self._last = self._fetch_last()
+
+    def _fetch_last(self):
+        """(id, ip, location_id) of the newest transition, or None."""
+        return self._conn.execute(
+            "SELECT id, ip, location_id FROM transitions ORDER BY id DESC LIMIT 1").fetchone()
+
+    def _location_id(self, values):
+        """Id of a (country_code, city, isp) triple, inserted on first use. Called under the lock."""
+        location_id = self._location_ids.get(values)
+        if location_id is None:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO locations (country_code, city, isp) VALUES (?, ?, ?)", values)
+            location_id = self._conn.execute(
+                "SELECT id FROM locations WHERE country_code IS ? AND city IS ? AND isp IS ?", values
+            ).fetchone()[0]
+            self._location_ids[values] = location_id
+        return location_id
+
+    def _select(self, where, params, order="t.ts", limit=None):
+        """Runs a transitions query and returns location dicts (the format AppState uses)."""
+        sql = ("SELECT t.ts, t.ip, l.country_code, l.city, l.isp FROM transitions t"
+               f" JOIN locations l ON l.id = t.location_id WHERE {where} ORDER BY {order}")
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [{'ip': ip, 'country_code': country, 'city': city, 'isp': isp, 'time': ts}
+                for ts, ip, country, city, isp in rows]
+
+    def record(self, location, ts=None):
+        """
+        Records `location` as the current one. A new row is added only when the
+        IP differs from the last row; for the same IP the row's details are
+        refreshed if they changed (e.g. a preliminary '??' country filled in).
+        Returns True if a new transition was written.
+        """
+        ip = location.get('ip')
+        if not ip or ip == "N/A":
+            return False
+        values = tuple(location.get(field) or "" for field in FIELDS[1:])
+        with self._lock:
+            self._pending.append((ip, values, time.time() if ts is None else ts))
+            return self._flush_pending()
+
+    def _flush_pending(self):
+        """
+        Writes the queued locations in order. Called under the lock. Returns
+        True if one of them was a new transition; while the file is busy they
+        stay queued for the next call.
+        """
+        added = False
+        try:
+            while self._pending:
+                added = self._write(*self._pending[0]) or added
+                self._pending.pop(0)
+        except sqlite3.OperationalError as e: # locked by compact()
+            self._conn.rollback()
+            self._location_ids.clear() # ids inserted by the rolled-back transaction are gone
+            log.debug("IP history busy (%s); %s location(s) queued", e, len(self._pending))
+        return added
+
+    def _write(self, ip, values, ts):
+        location_id = self._location_id(values)
+        if self._last and self._last[1] == ip:
+            if self._last[2] != location_id:
+                self._conn.execute("UPDATE transitions SET location_id = ? WHERE id = ?",
+                                   (location_id, self._last[0]))
+                self._conn.commit()
+                self._last = (self._last[0], ip, location_id)
+            return False
+        cursor = self._conn.execute(
+            "INSERT INTO transitions (ts, ip, location_id) VALUES (?, ?, ?)", (ts, ip, location_id))
+        self._conn.commit()
+        self._last = (cursor.lastrowid, ip, location_id)
+        return True
+
+    def append_many(self, rows):
+        """Bulk insert of (ts, ip, country_code, city, isp) tuples, in time order (imports, benchmarks)."""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO transitions (ts, ip, location_id) VALUES (?, ?, ?)",
+                ((ts, ip, self._location_id((country, city, isp))) for ts, ip, country, city, isp in rows))
+            self._conn.commit()
+            self._last = self._fetch_last()
+
+    def recent(self, limit):
+        """The newest `limit` transitions, oldest first."""
+        return self._select("1", (), order="t.id DESC", limit=limit)[::-1]
+
+    def between(self, start, end=None, limit=None):
+        """
+        Transitions that were in effect during [start, end], oldest first:
+        the one active at `start` plus every change up to `end`. With `limit`,
+        only the newest `limit` of them.
+        """
+        end = time.time() if end is None else end
+        where = "t.ts >= (SELECT COALESCE(MAX(ts), 0) FROM transitions WHERE ts <= ?) AND t.ts <= ?"
+        if limit is None:
+            return self._select(where, (start, end))
+        return self._select(where, (start, end), order="t.ts DESC", limit=limit)[::-1]
+
+    def ips_since(self, seconds):
+        """Distinct IPs used in the last `seconds`, e.g. ips_since(24 * 3600)."""
+        seen = {}
+        for entry in self.between(time.time() - seconds):
+            seen.setdefault(entry['ip'], entry)
+        return list(seen.values())
+
+    def last_seen(self, ip):
+        """Time `ip` last became the external IP, or None if it never was."""
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(ts) FROM transitions WHERE ip = ?", (ip,)).fetchone()
+        return row[0]
+
+    def time_per_country(self, start, end=None):
+        """
+        Seconds spent per country in [start, end]. Each location is counted
+        until the next transition; the newest one until `end` (now), so time
+        while the app was not running is attributed to the last known location.
+        """
+        end = time.time() if end is None else end
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT l.country_code, SUM(MIN(COALESCE(t.next_ts, :end), :end) - MAX(t.ts, :start)) FROM ("
+                "  SELECT ts, location_id, LEAD(ts) OVER (ORDER BY ts) AS next_ts FROM transitions"
+                "  WHERE ts >= (SELECT COALESCE(MAX(ts), 0) FROM transitions WHERE ts <= :start) AND ts < :end"
+                ") t JOIN locations l ON l.id = t.location_id GROUP BY l.country_code",
+                {'start': start, 'end': end}
+            ).fetchall()
+        return {country or '??': seconds for country, seconds in rows if seconds > 0}
+
+    def rotate(self):
+        """Deletes rows older than the retention period or beyond max_entries. Returns how many."""
+        cutoff = time.time() - self.retention_days * 86400
+        with self._lock:
+            # The newest row is the current location however old it is, so it is always kept
+            removed = self._conn.execute(
+                "DELETE FROM transitions WHERE ts < ? AND id < (SELECT MAX(id) FROM transitions)", (cutoff,)
+            ).rowcount
+            removed += self._conn.execute(
+                "DELETE FROM transitions WHERE id <= (SELECT id FROM transitions ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (self.max_entries,)
+            ).rowcount
+            if removed:
+                self._conn.execute("DELETE FROM locations WHERE id NOT IN (SELECT DISTINCT location_id FROM transitions)")
+                self._location_ids.clear()
+            self._conn.commit()
+            self._last = self._fetch_last()
+        return removed
+
+    def compact(self):
+        """
+        Rewrites the database file without free pages, on its own connection and
+        without the lock: queries go on, writes are queued until it is done.
+        """
+        conn = sqlite3.connect(self.path, timeout=COMPACT_TIMEOUT)
+        try:
+            conn.execute("VACUUM")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        finally:
+            conn.close()
+        with self._lock:
+            self._flush_pending()
+
+    def maintain(self):
+        """Periodic task: rotation, then compaction if anything was removed."""
+        removed = self.rotate()
+        if removed:
+            self.compact()
+            log.info("IP history: removed %s old transitions", removed)
+        return removed
+
+    def stats(self):
+        with self._lock:
+            count, oldest = self._conn.execute("SELECT COUNT(*), MIN(ts) FROM transitions").fetchone()
+        return {'transitions': count, 'oldest': oldest}
+
+    def close(self):
+        with self._lock:
+            self._flush_pending()
+            if self._pending:
+                log.warning("IP history: %s location(s) could not be written", len(self._pending))
+            self._conn.close()
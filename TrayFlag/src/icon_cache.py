@@ -0,0 +1,116 @@
+# File: src/icon_cache.py
+
+import os
+import json
+import logging
+from collections import OrderedDict
+from PySide6 import QtGui, QtCore
+
+log = logging.getLogger(__name__)
+
+# The atlas is one PNG with every flag in a grid; the grid layout is stored
+# in a PNG text chunk under this key, so the whole thing stays a single file.
+ATLAS_INDEX_KEY = "trayflag-atlas-index"
+ATLAS_FILENAME = "flags_atlas.png"
+
+class IconCache:
+    """
+    Size-bounded LRU of ready-to-use flag QIcons keyed by
+    (country code, size, device pixel ratio). Flags are cut from the
+    prebuilt atlas when it exists, otherwise loaded from assets/flags/*.png.
+    """
+    def __init__(self, flags_dir, atlas_path=None, max_entries=32):
+        self.flags_dir = flags_dir
+        self.atlas_path = atlas_path
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._icons = OrderedDict()
+        self._atlas = None
+        self._atlas_index = None
+        self._atlas_loaded = False
+
+    def get(self, country_code, size=20, device_pixel_ratio=1.0):
+        """Returns a QIcon for the country, or None if there is no flag for it."""
+        if not country_code:
+            return None
+        key = (country_code.lower(), size, round(device_pixel_ratio, 2))
+        icon = self._icons.get(key)
+        if icon is not None:
+            self._icons.move_to_end(key)
+            self.hits += 1
+            return icon
+
+        self.misses += 1
+        image = self._load_flag_image(key[0])
+        if image is None or image.isNull():
+            return None
+        pixels = max(1, round(size * device_pixel_ratio))
+        pixmap = QtGui.QPixmap.fromImage(image.scaled(
+            pixels, pixels, QtCore.Qt.AspectRatioMode.KeepAspectRatio, QtCore.Qt.TransformationMode.SmoothTransformation))
+        pixmap.setDevicePixelRatio(device_pixel_ratio)
+        icon = QtGui.QIcon(pixmap)
+
+        self._icons[key] = icon
+        if len(self._icons) > self.max_entries:
+            self._icons.popitem(last=False)
+        return icon
+
+    def _load_flag_image(self, code):
+        self._ensure_atlas()
+        position = self._atlas_index['codes'].get(code) if self._atlas_index else None
+        if position is not None:
+            cell = self._atlas_index['cell']
+            columns = self._atlas_index['columns']
+            return self._atlas.copy((position % columns) * cell, (position // columns) * cell, cell, cell)
+
+        path = os.path.join(self.flags_dir, f"{code}.png")
+        if not os.path.isfile(path):
+            return None
+        return QtGui.QImage(path)
+
+    def _ensure_atlas(self):
+        """Loads the atlas once, on first use. Falls back to single files if it is missing or broken."""
+        if self._atlas_loaded:
+            return
+        self._atlas_loaded = True
+        if not self.atlas_path or not os.path.isfile(self.atlas_path):
+            return
+        atlas = QtGui.QImage(self.atlas_path)
+        try:
+            index = json.loads(atlas.text(ATLAS_INDEX_KEY))
+            index['codes'] = {code: i for i, code in enumerate(index['codes'])}
+        except (ValueError, KeyError, TypeError) as e:
+            log.warning("Flag atlas %s has no valid index (%s). Using single files.", self.atlas_path, e)
+            return
+        self._atlas = atlas
+        self._atlas_index = index
+
+    def clear(self):
+        self._icons.clear()
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._icons), 'atlas': self._atlas is not None}
+
+
+def build_atlas(flags_dir, atlas_path, cell=64):
+    """Packs every assets/flags/*.png into one grid PNG with the index in a text chunk."""
+    codes = sorted(name[:-4].lower() for name in os.listdir(flags_dir) if name.lower().endswith(".png"))
+    columns = max(1, int(len(codes) ** 0.5 + 0.999))
+    rows = max(1, (len(codes) + columns - 1) // columns)
+    atlas = QtGui.QImage(columns * cell, rows * cell, QtGui.QImage.Format.Format_ARGB32)
+    atlas.fill(QtCore.Qt.GlobalColor.transparent)
+
+    painter = QtGui.QPainter(atlas)
+    painter.setRenderHint(QtGui.QPainter.RenderHint.SmoothPixmapTransform)
+    for i, code in enumerate(codes):
+        image = QtGui.QImage(os.path.join(flags_dir, f"{code}.png"))
+        if image.size() != QtCore.QSize(cell, cell):
+            image = image.scaled(cell, cell, QtCore.Qt.AspectRatioMode.KeepAspectRatio, QtCore.Qt.TransformationMode.SmoothTransformation)
+        painter.drawImage((i % columns) * cell, (i // columns) * cell, image)
+    painter.end()
+
+    atlas.setText(ATLAS_INDEX_KEY, json.dumps({'cell': cell, 'columns': columns, 'codes': codes}, separators=(",", ":")))
+    if not atlas.save(atlas_path, "PNG"):
+        raise IOError(f"Could not write atlas to {atlas_path}")
+    return len(codes)
@@ -1,12 +1,36 @@
 # File: src/idle_detector.py
 
-try:
-    import win32api
-    from pycaw.pycaw import AudioUtilities
-    LIBS_AVAILABLE = True
-except ImportError:
-    print("WARNING: pywin32/pycaw not found. Idle mode will be disabled.")
-    LIBS_AVAILABLE = False
+import os
+import sys
+import glob
+import time
+import select
+import shutil
+import subprocess
+import threading
+import logging
+
+log = logging.getLogger(__name__)
+
+# pywin32/pycaw (comtypes) are imported by load_win32_libs() when the
+# idle backend is created, not at startup
+win32api = AudioUtilities = None
+LIBS_AVAILABLE = False
+_libs_loaded = False
+
+def load_win32_libs():
+    global win32api, AudioUtilities, LIBS_AVAILABLE, _libs_loaded
+    if not _libs_loaded:
+        _libs_loaded = True
+        try:
+            import win32api
+            from pycaw.pycaw import AudioUtilities
+            LIBS_AVAILABLE = True
+        except ImportError:
+            if sys.platform == "win32":
+                log.warning("pywin32/pycaw not found. Idle mode will be disabled.")
+            LIBS_AVAILABLE = False
+    return LIBS_AVAILABLE
 
 def get_idle_time_seconds():
     if not LIBS_AVAILABLE: return 0
@@ -18,6 +42,7 @@ def get_idle_time_seconds():
         return 0
 
 def is_audio_playing():
+    """Full scan of the audio sessions (a COM walk). Prefer AudioActivityTracker, which caches it."""
     if not LIBS_AVAILABLE: return False
     try:
         sessions = AudioUtilities.GetAllSessions()
@@ -29,10 +54,389 @@ def is_audio_playing():
     except Exception:
         return False
 
-def is_user_idle(idle_threshold_seconds):
-    if not LIBS_AVAILABLE: return False
-    if get_idle_time_seconds() < idle_threshold_seconds:
-        return False
-    if is_audio_playing():
+
+class PycawSessionSource:
+    """Windows audio sessions through pycaw."""
+    def thread_init(self):
+        # COM must be initialized on every thread that uses it
+        import pythoncom
+        pythoncom.CoInitialize()
+
+    def is_active(self):
+        return is_audio_playing()
+
+
+class FakeSessionSource:
+    """
+    Stand-in for the audio sessions, for tests and benchmarks on any OS.
+    `sessions` is a list of dicts with 'process', 'volume' and 'state'
+    (1 = active); each scan costs `scan_cost` seconds per session.
+    """
+    def __init__(self, sessions=None, scan_cost=0.0):
+        self.sessions = sessions or []
+        self.scan_cost = scan_cost
+        self.scans = 0
+
+    def thread_init(self):
+        pass
+
+    def is_active(self):
+        self.scans += 1
+        if self.scan_cost:
+            time.sleep(self.scan_cost * len(self.sessions))
+        return any(s.get('process') and s.get('volume', 0) > 0 and s.get('state') == 1 for s in self.sessions)
+
+
+class AudioActivityTracker:
+    """
+    Cached answer to "is something playing?". Reads are constant time; the
+    session scan runs on a background worker, at most once per
+    `min_interval` seconds and only when a reader found the snapshot older
+    than `max_age`.
+    """
+    def __init__(self, source, min_interval=5.0, max_age=5.0):
+        self.source = source
+        self.min_interval = min_interval
+        self.max_age = max_age
+        self._playing = None
+        self._updated_at = 0.0
+        self._last_scan = float("-inf")
+        self._refresh = threading.Event()
+        self._stopped = False
+        self._thread = None
+        self.scans = 0
+        self.scan_ms = 0.0 # duration of the last scan
+
+    def is_playing(self):
+        """
+        Returns the snapshot if it is fresh, otherwise asks for a refresh and
+        returns None ("not known yet"); the caller should look again shortly.
+        """
+        if time.monotonic() - self._updated_at <= self.max_age and self._playing is not None:
+            return self._playing
+        self._request_refresh()
+        return None
+
+    def _request_refresh(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="audio-scan", daemon=True)
+            self._thread.start()
+        self._refresh.set()
+
+    def stop(self):
+        self._stopped = True
+        self._refresh.set()
+
+    def _run(self):
+        try:
+            self.source.thread_init()
+        except Exception as e:
+            log.warning("Audio session scan unavailable: %s", e)
+            return
+        while True:
+            self._refresh.wait()
+            if self._stopped:
+                return
+            # Bounded rate: never more than one scan per min_interval
+            wait = self._last_scan + self.min_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self._refresh.clear()
+            self._last_scan = time.monotonic()
+            try:
+                playing = bool(self.source.is_active())
+            except Exception:
+                playing = False
+            now = time.monotonic()
+            self.scan_ms = (now - self._last_scan) * 1000
+            self.scans += 1
+            self._playing, self._updated_at = playing, now
+
+    def stats(self):
+        return {'scans': self.scans, 'last_scan_ms': round(self.scan_ms, 3), 'playing': self._playing}
+
+
+class IdleBackend:
+    """
+    Source of "seconds since the last user input". Push backends call
+    `on_activity()` (from their own thread) on input, so waking up from idle
+    mode needs no timer; polling backends are asked once per second while
+    in idle mode only.
+    """
+    name = "none"
+    push = False
+    available = False
+
+    def start(self, on_activity):
+        pass
+
+    def stop(self):
+        pass
+
+    def idle_seconds(self):
+        return 0
+
+    def is_audio_playing(self):
+        """True, False, or None while the answer is not known yet."""
         return False
-    return True
+
+
+class Win32IdleBackend(IdleBackend):
+    """Windows: GetLastInputInfo, and active audio sessions keep the user 'present'."""
+    name = "win32"
+
+    def __init__(self):
+        self.available = load_win32_libs()
+        self.audio = AudioActivityTracker(PycawSessionSource())
+
+    def stop(self):
+        self.audio.stop()
+
+    def idle_seconds(self):
+        return get_idle_time_seconds()
+
+    def is_audio_playing(self):
+        return self.audio.is_playing()
+
+
+class LogindIdleBackend(IdleBackend):
+    """Linux: the session's IdleHint as set by the desktop environment (polled via loginctl)."""
+    name = "logind"
+
+    def __init__(self, session_id=None):
+        self.session_id = session_id or os.environ.get("XDG_SESSION_ID", "")
+        self.loginctl = shutil.which("loginctl")
+        self.available = bool(self.loginctl and self.session_id)
+
+    def idle_seconds(self):
+        try:
+            output = subprocess.run(
+                [self.loginctl, "show-session", self.session_id, "-p", "IdleHint", "-p", "IdleSinceHintMonotonic"],
+                capture_output=True, text=True, timeout=2).stdout
+        except (OSError, subprocess.SubprocessError):
+            return 0
+        values = dict(line.split("=", 1) for line in output.splitlines() if "=" in line)
+        if values.get("IdleHint") != "yes":
+            return 0
+        try:
+            # Microseconds of CLOCK_MONOTONIC, the same clock as time.monotonic() on Linux
+            return max(0.0, time.monotonic() - int(values.get("IdleSinceHintMonotonic", "0")) / 1e6)
+        except ValueError:
+            return 0
+
+
+class InputEventsBackend(IdleBackend):
+    """
+    Linux: push backend reading evdev input devices (/dev/input/event*, or
+    any readable files/FIFOs standing in for them). Event contents are
+    discarded; only the time of the last input is kept.
+    """
+    name = "input"
+    push = True
+    # While nobody waits for activity, a burst of events is taken in at most once per this many seconds
+    COALESCE_SECONDS = 1.0
+
+    def __init__(self, devices=None):
+        self.devices = devices if devices is not None else sorted(glob.glob("/dev/input/event*"))
+        # Only probed here: start() opens the descriptors, so a backend that is never started holds none
+        self.available = any(self._probe(path) for path in self.devices)
+        self._last_input = time.monotonic()
+        self._on_activity = None
+        self._stop_r = self._stop_w = None
+        self._thread = None
+
+    @staticmethod
+    def _open(path):
+        """Non-blocking read descriptor for `path`, or None (usually no permission)."""
+        try:
+            return os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+        except OSError:
+            return None
+
+    @classmethod
+    def _probe(cls, path):
+        fd = cls._open(path)
+        if fd is None:
+            return False
+        os.close(fd)
+        return True
+
+    def start(self, on_activity):
+        self._on_activity = on_activity
+        # The other devices may still be readable when one is not
+        fds = [fd for fd in map(self._open, self.devices) if fd is not None]
+        self._stop_r, self._stop_w = os.pipe()
+        self._thread = threading.Thread(target=self._run, args=(fds, self._stop_r, self._stop_w),
+                                        name="idle-input-events", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Wakes the thread, which closes the descriptors. Nothing to do if start() never ran."""
+        if self._thread is None:
+            return
+        self._thread = None
+        os.write(self._stop_w, b"x")
+
+    def idle_seconds(self):
+        return time.monotonic() - self._last_input
+
+    def _run(self, fds, stop_r, stop_w):
+        """Owns `fds` and the stop pipe and closes them on exit (a later start() gets new ones)."""
+        try:
+            while True:
+                # No timeout: the thread sleeps until input or stop()
+                readable, _, _ = select.select(fds + [stop_r], [], [])
+                if stop_r in readable:
+                    break
+                for fd in readable:
+                    try:
+                        while os.read(fd, 4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    except OSError:
+                        fds.remove(fd) # device unplugged
+                        os.close(fd)
+                self._last_input = time.monotonic()
+                try:
+                    self._on_activity()
+                except Exception as e:
+                    log.exception("Idle activity callback failed: %s", e)
+                time.sleep(self.COALESCE_SECONDS)
+        finally:
+            for fd in fds + [stop_r, stop_w]:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+
+
+IDLE_BACKENDS = {
+    "win32": Win32IdleBackend,
+    "input": InputEventsBackend,
+    "logind": LogindIdleBackend,
+}
+
+def create_idle_backend(name="auto"):
+    """Returns the configured backend, or the first available one for "auto"; IdleBackend() if none."""
+    names = [name] if name in IDLE_BACKENDS else ["win32", "input", "logind"]
+    for backend_name in names:
+        backend = IDLE_BACKENDS[backend_name]()
+        if backend.available:
+            log.info("Idle detection backend: %s", backend.name)
+            return backend
+    log.info("No idle detection backend available. Idle mode is disabled.")
+    return IdleBackend()
+
+
+class IdleMonitor:
+    """
+    Decides when the user became idle and when they came back, using the
+    scheduler instead of a permanent 1 Hz pulse:
+
+    - while active, the next check is scheduled for the moment the idle
+      threshold could be reached at the earliest (threshold - idle time),
+      so checks are rare right after input and come closer to the threshold;
+    - while idle, a push backend reports input directly, and a polling
+      backend is asked once per `wake_poll` seconds.
+    """
+    def __init__(self, scheduler, backend, on_idle, on_wake, post=None,
+                 wake_poll=1.0, min_check=1.0, audio_recheck=60.0, audio_pending_recheck=1.0):
+        self.scheduler = scheduler
+        self.backend = backend
+        self.on_idle = on_idle
+        self.on_wake = on_wake
+        # Delivers backend-thread activity to the scheduler's thread
+        self.post = post or (lambda: self.on_activity())
+        self.wake_poll = wake_poll
+        self.min_check = min_check
+        self.audio_recheck = audio_recheck
+        self.audio_pending_recheck = audio_pending_recheck
+        self.enabled = False
+        self.requested_enabled = False
+        self.threshold_seconds = 0
+        self.watching_wakeup = False
+        self.stopped = False
+
+    def start(self, enabled, threshold_seconds):
+        if self.backend.push:
+            self.backend.start(self._backend_activity)
+        self.configure(enabled, threshold_seconds)
+
+    def set_backend(self, backend):
+        """Swaps in the real backend, which is created off the main thread after startup."""
+        if self.stopped:
+            backend.stop()
+            return
+        self.backend.stop()
+        self.backend = backend
+        if backend.push:
+            backend.start(self._backend_activity)
+        self.configure(self.requested_enabled, self.threshold_seconds)
+
+    def stop(self):
+        self.stopped = True
+        self.scheduler.cancel("idle_enter_check")
+        self.scheduler.cancel("idle_wake_check")
+        self.backend.stop()
+
+    def configure(self, enabled, threshold_seconds):
+        """Applies (changed) settings and re-plans the next check."""
+        self.requested_enabled = enabled
+        self.enabled = enabled and self.backend.available
+        self.threshold_seconds = threshold_seconds
+        if not self.watching_wakeup:
+            self.watch_for_idle()
+
+    def watch_for_idle(self):
+        """Active mode: schedule the earliest moment the user could have become idle."""
+        self.watching_wakeup = False
+        self.scheduler.cancel("idle_wake_check")
+        if not self.enabled:
+            self.scheduler.cancel("idle_enter_check")
+            return
+        delay = max(self.min_check, self.threshold_seconds - self.backend.idle_seconds())
+        self.scheduler.schedule_once("idle_enter_check", delay, self._check_idle)
+
+    def watch_for_wakeup(self):
+        """Idle mode: wait for input."""
+        self.watching_wakeup = True
+        self.scheduler.cancel("idle_enter_check")
+        if not self.backend.push:
+            self.scheduler.add_periodic("idle_wake_check", self.wake_poll, self._check_wakeup)
+
+    def is_user_idle(self):
+        if not self.enabled or self.backend.idle_seconds() < self.threshold_seconds:
+            return False
+        return self.backend.is_audio_playing() is False
+
+    def _check_idle(self):
+        if self.watching_wakeup or not self.enabled:
+            return
+        if self.backend.idle_seconds() < self.threshold_seconds:
+            self.watch_for_idle() # input happened since the check was planned
+            return
+        playing = self.backend.is_audio_playing()
+        if playing is None:
+            # The audio snapshot is being refreshed in the background
+            self.scheduler.schedule_once("idle_enter_check", self.audio_pending_recheck, self._check_idle)
+        elif playing:
+            # Watching a video is not being away; look again later
+            self.scheduler.schedule_once("idle_enter_check", self.audio_recheck, self._check_idle)
+        else:
+            self.on_idle()
+
+    def _check_wakeup(self):
+        # Only basic mouse/keyboard input wakes up
+        if self.watching_wakeup and self.backend.idle_seconds() < self.threshold_seconds:
+            self.on_activity()
+
+    def _backend_activity(self):
+        # Backend thread: input while active needs no reaction, so the main thread is not woken for it
+        if self.watching_wakeup:
+            self.post()
+
+    def on_activity(self):
+        """Input was seen while idle (called on the scheduler's thread)."""
+        if self.watching_wakeup:
+            self.on_wake()
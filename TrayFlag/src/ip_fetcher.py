@@ -1,77 +1,269 @@
 # File: src/ip_fetcher.py (НОВАЯ ВЕРСИЯ)
 
-import subprocess
-import json
-import os
-from utils import resource_path
-
-def _run_ps_script(script_name):
-    """Helper function to run a PowerShell script."""
-    script_path = resource_path(os.path.join("getip", script_name))
-    if not os.path.exists(script_path):
-        raise FileNotFoundError(f"Script not found: {script_path}")
-
-    command = ["powershell", "-ExecutionPolicy", "Bypass", "-File", script_path]
-    
-    result = subprocess.run(
-        command,
-        capture_output=True,
-        text=True,
-        timeout=20,
-        creationflags=subprocess.CREATE_NO_WINDOW
-    )
-    result.check_returncode() # Will raise an error if the script exits with a code other than 0
-    return json.loads(result.stdout)
+import time
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+import ip_providers
+import geoip_db
+import connectivity
+import tracing
 
-def get_ip_data():
-    """
-    STEP 1: Quick IP check.
-    Returns only the IP, not full details.
-    """
+log = logging.getLogger(__name__)
+
+# Active providers. "native" talks HTTP in-process over a shared keep-alive
+# session; "powershell" keeps the old getip_*.ps1 scripts as a legacy backend.
+_backend = "native"
+_ip_providers = ip_providers.create_ip_providers("native")
+_geo_provider = ip_providers.create_geo_provider("native")
+
+# "sequential" tries providers one after another; "race" queries all of them
+# at once and takes the first answer (or the first one confirmed by `_quorum`).
+_mode = "sequential"
+_quorum = 1
+_race_executor = None
+_race_executor_size = 0
+_race_executor_lock = threading.Lock()
+# Provider -> its race call that may still be running; a provider is not raced again until it ends
+_race_calls = {}
+
+# Optional offline GeoIP database (country/ASN without a network round trip)
+_local_db = None
+_remote_lookup = True
+
+# Connectivity pre-check: (host, port, timeout) or None when disabled
+_precheck = None
+
+# Print the provider summary every N IP checks
+STATS_LOG_EVERY = 50
+
+class ProviderStats:
+    """Per-provider counters: attempts, successes, race wins and latency."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self.checks = 0
+
+    def _entry(self, name):
+        return self._stats.setdefault(name, {'attempts': 0, 'successes': 0, 'wins': 0, 'total_latency': 0.0, 'last_latency': 0.0})
+
+    def record_attempt(self, name, latency, success):
+        with self._lock:
+            entry = self._entry(name)
+            entry['attempts'] += 1
+            entry['last_latency'] = latency
+            if success:
+                entry['successes'] += 1
+                entry['total_latency'] += latency
+
+    def record_win(self, name):
+        with self._lock:
+            self._entry(name)['wins'] += 1
+
+    def record_check(self):
+        with self._lock:
+            self.checks += 1
+            return self.checks
+
+    def snapshot(self):
+        """Returns {name: {...}} with win rate and average latency (ms) of successful calls."""
+        with self._lock:
+            result = {}
+            for name, entry in self._stats.items():
+                result[name] = {
+                    'attempts': entry['attempts'],
+                    'successes': entry['successes'],
+                    'wins': entry['wins'],
+                    'win_rate': round(entry['wins'] / self.checks, 3) if self.checks else 0.0,
+                    'avg_latency_ms': round(entry['total_latency'] * 1000 / entry['successes'], 1) if entry['successes'] else None,
+                    'last_latency_ms': round(entry['last_latency'] * 1000, 1),
+                }
+            return result
+
+    def log_summary(self):
+        for name, entry in self.snapshot().items():
+            log.info("Provider %s: win rate %.0f%%, %s/%s ok, avg %s ms", name, entry['win_rate'] * 100,
+                     entry['successes'], entry['attempts'], entry['avg_latency_ms'])
+
+provider_stats = ProviderStats()
+
+def configure(config):
+    """Rebuilds the provider chain from the [network] settings."""
+    global _backend, _ip_providers, _geo_provider, _mode, _quorum, _remote_lookup, _precheck
+    _backend = config.network_backend
+    _ip_providers = ip_providers.create_ip_providers(_backend, config.network_providers, config.network_timeout)
+    _geo_provider = ip_providers.create_geo_provider(_backend, config.network_timeout)
+    _mode = config.network_mode
+    _quorum = max(1, config.network_quorum)
+    _open_local_db(config.geoip_database)
+    _remote_lookup = config.geoip_remote_lookup or _local_db is None
+    _precheck = (config.precheck_host, config.precheck_port, config.precheck_timeout_ms / 1000) if config.precheck_enabled else None
+    log.info("IP backend: %s, mode: %s (%s)", _backend, _mode, ', '.join(p.name for p in _ip_providers))
+
+def set_providers(ip_provider_list, geo_provider, mode=None, quorum=None):
+    """Replaces the provider chain directly (used by benchmarks and stub servers)."""
+    global _ip_providers, _geo_provider, _mode, _quorum
+    _ip_providers = list(ip_provider_list)
+    _geo_provider = geo_provider
+    if mode is not None:
+        _mode = mode
+    if quorum is not None:
+        _quorum = max(1, quorum)
+
+def _open_local_db(path):
+    global _local_db
+    if _local_db is not None:
+        _local_db.close()
+        _local_db = None
+    if not path:
+        return
     try:
-        print("Attempting fast IP check via getip_ipify.ps1...")
-        data = _run_ps_script("getip_ipify.ps1")
-        ip = data.get("ip")
-        if ip and ip != "N/A":
-            return ip
+        _local_db = geoip_db.open_database(path)
+        log.info("Local GeoIP database loaded: %s", path)
     except Exception as e:
-        print(f"Fast IP check (ipify) failed: {e}. Proceeding to fallback.")
+        log.warning("Could not open GeoIP database %s: %s", path, e)
 
-    # Fallback
-    print("Falling back to getip_myip.ps1...")
+def lookup_local(ip_address):
+    """Country/ASN from the local GeoIP database, or None if there is none or no match."""
+    if _local_db is None or not ip_address:
+        return None
     try:
-        data = _run_ps_script("getip_myip.ps1")
-        ip = data.get("ip")
-        if ip and ip != "N/A":
-            return ip
+        return _local_db.lookup(ip_address)
     except Exception as e:
-        print(f"Fallback (myip) also failed: {e}")
+        log.warning("Local GeoIP lookup failed for %s: %s", ip_address, e)
+        return None
+
+def remote_lookup_enabled():
+    return _remote_lookup
+
+def _local_full_data(ip_address, local):
+    return ip_providers.make_full_data(ip_address, local['country_code'], "N/A", local['isp'] or "N/A")
+
+def get_provider_stats():
+    return provider_stats.snapshot()
+
+def _timed_fetch(provider, attempts=None):
+    start = time.monotonic()
+    with tracing.span("ip.provider", provider=provider.name):
+        try:
+            ip = provider.fetch_ip(attempts)
+            provider_stats.record_attempt(provider.name, time.monotonic() - start, True)
+            return ip
+        except Exception:
+            provider_stats.record_attempt(provider.name, time.monotonic() - start, False)
+            raise
 
+def _get_race_executor(size):
+    """Shared pool with at least `size` workers: one per provider, so a straggler never delays another."""
+    global _race_executor, _race_executor_size
+    with _race_executor_lock:
+        if _race_executor is None or _race_executor_size < size:
+            if _race_executor is not None:
+                _race_executor.shutdown(wait=False) # its running calls finish on their own
+            _race_executor_size = max(4, size)
+            _race_executor = ThreadPoolExecutor(max_workers=_race_executor_size, thread_name_prefix="ip-race")
+        return _race_executor
+
+def _get_ip_sequential():
+    for index, provider in enumerate(_ip_providers):
+        try:
+            if index == 0:
+                log.debug("Attempting fast IP check via %s...", provider.name)
+            else:
+                log.info("Falling back to %s...", provider.name)
+            ip = _timed_fetch(provider)
+            provider_stats.record_win(provider.name)
+            return ip
+        except Exception as e:
+            log.warning("IP check (%s) failed: %s", provider.name, e)
     return None
 
+def _get_ip_race():
+    """
+    One attempt per provider, all at once, bounded by the largest provider
+    timeout: no retries, since the other providers are the fallback. A
+    provider whose call from an earlier race is still running sits this
+    one out, so slow providers never hold more than one worker each.
+    """
+    executor = _get_race_executor(len(_ip_providers))
+    futures = {}
+    for provider in _ip_providers:
+        previous = _race_calls.get(provider)
+        if previous is not None and not previous.done():
+            log.debug("IP check (%s) still running from an earlier race, skipped.", provider.name)
+            continue
+        future = _race_calls[provider] = executor.submit(_timed_fetch, provider, 1)
+        futures[future] = provider
+    for provider in [p for p in _race_calls if p not in _ip_providers and _race_calls[p].done()]:
+        del _race_calls[provider] # replaced by configure()
+    if not futures:
+        log.warning("IP race skipped: every provider is still busy with an earlier check.")
+        return None
+    quorum = min(_quorum, len(futures))
+    log.debug("Racing IP check across %s providers (quorum %s)...", len(futures), quorum)
+    deadline = max(provider.timeout for provider in futures.values())
+    votes = {}
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            provider = futures[future]
+            try:
+                ip = future.result()
+            except Exception as e:
+                log.warning("IP check (%s) failed: %s", provider.name, e)
+                continue
+            votes.setdefault(ip, []).append(provider.name)
+            if len(votes[ip]) >= quorum:
+                provider_stats.record_win(provider.name)
+                return ip
+        if quorum > 1 and votes:
+            log.warning("IP providers disagree, no quorum reached: %s", votes)
+    except FuturesTimeout:
+        log.warning("IP race timed out after %.0fs.", deadline)
+    finally:
+        # Drop whatever has not started yet; running calls end within their single timeout
+        for future in futures:
+            future.cancel()
+    return None
+
+def get_ip_data():
+    """
+    STEP 1: Quick IP check.
+    Returns only the IP, not full details.
+    """
+    if not _ip_providers:
+        return None
+    if _precheck:
+        with tracing.span("net.connectivity"):
+            online, reason = connectivity.check_connectivity(*_precheck)
+        if not online:
+            log.info("Offline (%s). Skipping IP providers.", reason)
+            return None
+        if reason:
+            log.info("Connectivity probe: %s. Trying the IP providers anyway.", reason)
+    if _mode == "race" and len(_ip_providers) > 1:
+        ip = _get_ip_race()
+    else:
+        ip = _get_ip_sequential()
+
+    if provider_stats.record_check() % STATS_LOG_EVERY == 0:
+        provider_stats.log_summary()
+    return ip
+
 def get_full_data(ip_address):
     """
     Gets full geo-data for a known IP.
     """
+    local = lookup_local(ip_address)
+    if local and not _remote_lookup:
+        return _local_full_data(ip_address, local)
+
     # --- STEP 3: Retrieve geo-data ---
     try:
-        print(f"Fetching full data for {ip_address} via getip_ipinfo.ps1...")
-        # We need to pass the IP to the script. We'll do this via environment variables.
-        env = os.environ.copy()
-        env["TRAYFLAG_IP_TO_LOOKUP"] = ip_address
-        
-        script_path = resource_path(os.path.join("getip", "getip_ipinfo.ps1"))
-        command = ["powershell", "-ExecutionPolicy", "Bypass", "-File", script_path]
-        
-        result = subprocess.run(
-            command,
-            capture_output=True, text=True, timeout=20,
-            creationflags=subprocess.CREATE_NO_WINDOW,
-            env=env
-        )
-        result.check_returncode()
-        return json.loads(result.stdout)
+        log.info("Fetching full data for %s via %s...", ip_address, _geo_provider.name)
+        return _geo_provider.fetch_full(ip_address)
     except Exception as e:
-        print(f"Full data fetch (ipinfo) failed: {e}")
+        log.warning("Full data fetch (%s) failed: %s", _geo_provider.name, e)
+        if local:
+            return _local_full_data(ip_address, local)
         # If it fails, at least return what we have (IP only)
-        return {'ip': ip_address, 'full_data': {}}
\ No newline at end of file
+        return {'ip': ip_address, 'full_data': {}}
@@ -0,0 +1,245 @@
+# File: src/ip_providers.py
+
+import os
+import json
+import time
+import threading
+import subprocess
+import logging
+from utils import resource_path
+
+log = logging.getLogger(__name__)
+
+# --- Shared HTTP session ---
+# One keep-alive connection pool for every native provider, so repeated polls
+# reuse the same TCP/TLS connection instead of opening a new one each time.
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """Returns the shared requests.Session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            # requests (with urllib3 and certifi) is imported on first use, off the startup path:
+            # the first check runs on a worker thread after the tray icon is shown
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({"User-Agent": "TrayFlag", "Accept": "application/json"})
+            _session = session
+        return _session
+
+def close_session():
+    """Closes the shared session and all pooled connections."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+class ProviderError(Exception):
+    """Raised when a provider could not return a usable answer."""
+
+
+class IpProvider:
+    """Base class for services that return only the external IP."""
+    name = "base"
+
+    def __init__(self, timeout=10, retries=3, retry_delay=1.0):
+        self.timeout = timeout
+        self.retries = max(1, retries)
+        self.retry_delay = retry_delay
+
+    def fetch_ip(self, attempts=None):
+        """
+        Returns the external IP as a string or raises ProviderError.
+        `attempts` overrides `retries` (race mode makes a single attempt).
+        """
+        attempts = self.retries if attempts is None else max(1, attempts)
+        last_error = None
+        for attempt in range(1, attempts + 1):
+            try:
+                ip = self._fetch_ip_once()
+                if ip and ip != "N/A":
+                    return ip
+                last_error = ProviderError("empty IP in response")
+            except Exception as e:
+                last_error = e
+            log.debug("%s: attempt %s/%s failed: %s", self.name, attempt, attempts, last_error)
+            if attempt < attempts:
+                time.sleep(self.retry_delay)
+        raise ProviderError(f"{self.name}: all retries failed ({last_error})")
+
+    def _fetch_ip_once(self):
+        raise NotImplementedError
+
+
+class GeoProvider:
+    """Base class for services that return full geo-data for a known IP."""
+    name = "base"
+
+    def __init__(self, timeout=10, retries=3, retry_delay=1.0):
+        self.timeout = timeout
+        self.retries = max(1, retries)
+        self.retry_delay = retry_delay
+
+    def fetch_full(self, ip_address):
+        """
+        Returns {'ip': ..., 'full_data': {...}} in the same shape the
+        PowerShell scripts print, or raises ProviderError.
+        """
+        last_error = None
+        for attempt in range(1, self.retries + 1):
+            try:
+                return self._fetch_full_once(ip_address)
+            except Exception as e:
+                last_error = e
+            log.debug("%s: attempt %s/%s failed: %s", self.name, attempt, self.retries, last_error)
+            if attempt < self.retries:
+                time.sleep(self.retry_delay)
+        raise ProviderError(f"{self.name}: all retries failed ({last_error})")
+
+    def _fetch_full_once(self, ip_address):
+        raise NotImplementedError
+
+
+def make_full_data(ip, country_code="", city="", isp="", error=""):
+    return {
+        'ip': ip,
+        'full_data': {
+            'ip': ip,
+            'country_code': country_code or "",
+            'city': city or "",
+            'isp': isp or "",
+            'error': error,
+        }
+    }
+
+
+# --- Native (in-process) providers ---
+
+class IpifyProvider(IpProvider):
+    """Fast service to get only the external IP via ipify.org."""
+    name = "ipify"
+
+    def __init__(self, base_url="https://api.ipify.org", **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url.rstrip("/")
+
+    def _fetch_ip_once(self):
+        response = get_session().get(self.base_url, params={"format": "json"}, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json().get("ip")
+
+
+class MyIpProvider(IpProvider):
+    """Last-resort backup service via myip.com."""
+    name = "myip"
+
+    def __init__(self, base_url="https://api.myip.com", **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url.rstrip("/")
+
+    def _fetch_ip_once(self):
+        response = get_session().get(self.base_url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json().get("ip")
+
+
+class IpinfoProvider(GeoProvider):
+    """Full geo-data (country, city, ISP) via ipinfo.io."""
+    name = "ipinfo"
+
+    def __init__(self, base_url="https://ipinfo.io", **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url.rstrip("/")
+
+    def _fetch_full_once(self, ip_address):
+        response = get_session().get(f"{self.base_url}/{ip_address}/json", timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        return make_full_data(ip_address, data.get("country"), data.get("city"), data.get("org"))
+
+
+# --- Legacy PowerShell backend ---
+
+def _run_ps_script(script_name, timeout=20, env=None):
+    """Helper function to run a PowerShell script."""
+    script_path = resource_path(os.path.join("getip", script_name))
+    if not os.path.exists(script_path):
+        raise FileNotFoundError(f"Script not found: {script_path}")
+
+    command = ["powershell", "-ExecutionPolicy", "Bypass", "-File", script_path]
+
+    result = subprocess.run(
+        command,
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+        creationflags=subprocess.CREATE_NO_WINDOW,
+        env=env
+    )
+    result.check_returncode() # Will raise an error if the script exits with a code other than 0
+    return json.loads(result.stdout)
+
+
+class PowerShellIpProvider(IpProvider):
+    """Runs one of the getip_*.ps1 scripts. The scripts retry on their own."""
+
+    def __init__(self, script_name, timeout=20):
+        super().__init__(timeout=timeout, retries=1)
+        self.script_name = script_name
+        self.name = f"ps:{script_name}"
+
+    def _fetch_ip_once(self):
+        return _run_ps_script(self.script_name, timeout=self.timeout).get("ip")
+
+
+class PowerShellGeoProvider(GeoProvider):
+    """Runs getip_ipinfo.ps1, passing the IP via an environment variable."""
+
+    def __init__(self, script_name="getip_ipinfo.ps1", timeout=20):
+        super().__init__(timeout=timeout, retries=1)
+        self.script_name = script_name
+        self.name = f"ps:{script_name}"
+
+    def _fetch_full_once(self, ip_address):
+        env = os.environ.copy()
+        env["TRAYFLAG_IP_TO_LOOKUP"] = ip_address
+        return _run_ps_script(self.script_name, timeout=self.timeout, env=env)
+
+
+# --- Factories ---
+
+NATIVE_IP_PROVIDERS = {
+    "ipify": IpifyProvider,
+    "myip": MyIpProvider,
+}
+
+POWERSHELL_IP_SCRIPTS = {
+    "ipify": "getip_ipify.ps1",
+    "myip": "getip_myip.ps1",
+}
+
+def create_ip_providers(backend="native", names=("ipify", "myip"), timeout=10):
+    """Builds the ordered list of IP providers for the chosen backend."""
+    providers = []
+    for name in names:
+        if backend == "powershell" and name in POWERSHELL_IP_SCRIPTS:
+            providers.append(PowerShellIpProvider(POWERSHELL_IP_SCRIPTS[name], timeout=max(timeout, 20)))
+        elif backend != "powershell" and name in NATIVE_IP_PROVIDERS:
+            providers.append(NATIVE_IP_PROVIDERS[name](timeout=timeout))
+        else:
+            log.warning("Unknown IP provider '%s' for backend '%s'. Skipped.", name, backend)
+    return providers
+
+def create_geo_provider(backend="native", timeout=10):
+    """Builds the geo-data provider for the chosen backend."""
+    if backend == "powershell":
+        return PowerShellGeoProvider(timeout=max(timeout, 20))
+    return IpinfoProvider(timeout=timeout)
@@ -1,12 +1,30 @@
 # File: src/main.py
 
+import startup_profile # first, so its clock starts with the process
 import sys
 import os
+import logging
+import app_logging
+
+# --- Logging: records are queued from here on and written once the settings are loaded ---
+app_logging.install()
+log = logging.getLogger("main")
+
+# --- Startup profiling: phases and import times, reported after the first IP is painted ---
+if "--profile-startup" in sys.argv or os.environ.get("TRAYFLAG_PROFILE_STARTUP") == "1":
+    startup_profile.enable()
+
+# --- Headless mode: same update pipeline on a QCoreApplication, never imports QtWidgets ---
+if __name__ == "__main__" and "--headless" in sys.argv:
+    import headless
+    sys.exit(headless.main(sys.argv[1:]))
+
 from PySide6 import QtWidgets
 import themes
 from utils import resource_path, create_desktop_shortcut
 from constants import APP_NAME, ORG_NAME, __version__
 from translator import Translator
+import runtime_check
 
 # --- Code to check for a single instance ---
 try:
@@ -69,13 +87,20 @@ if __name__ == "__main__":
     mutex_name = f"TrayFlag-Instance-Mutex-8E2E7A4E"
     instance = SingleInstance(mutex_name)
     if instance.already_running():
-        print("[WARNING] Application is already running. Exiting.")
+        log.warning("Application is already running. Exiting.")
         sys.exit(0)
     
-    print(f"[INFO] --- {APP_NAME} v{__version__} starting up ---")
+    log.info("--- %s v%s starting up ---", APP_NAME, __version__)
 
     # 2. Create QApplication - it's needed for MessageBox
     qt_app = QtWidgets.QApplication(sys.argv)
+    startup_profile.mark("QApplication created")
+
+    # 3. Refuse a runtime whose Qt bindings would crash the app after some hours
+    problem = runtime_check.ensure_safe_runtime()
+    if problem:
+        QtWidgets.QMessageBox.critical(None, APP_NAME, problem)
+        sys.exit(1)
 
     # 4. Apply styles and settings
     qt_app.setStyleSheet(themes.get_context_menu_style())
@@ -85,6 +110,8 @@ if __name__ == "__main__":
     
     # 5. Import and run the main application
     from app import App
+    startup_profile.mark("app modules imported")
     main_app = App()
+    startup_profile.mark("App constructed")
     
     sys.exit(qt_app.exec())
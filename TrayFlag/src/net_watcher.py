@@ -0,0 +1,285 @@
+# File: src/net_watcher.py
+
+import os
+import sys
+import errno
+import time
+import socket
+import select
+import struct
+import threading
+import logging
+
+log = logging.getLogger(__name__)
+
+class NetworkWatcher:
+    """
+    Base class for OS-specific watchers that report local network changes
+    (interfaces, addresses, default routes, DNS). `callback(reason)` is
+    called from the watcher thread once a burst of changes has settled:
+    `debounce` seconds after the last one, or `max_delay` seconds after the
+    first if they keep coming. The reasons of a burst are reported together.
+    """
+    name = "base"
+
+    def __init__(self, callback, debounce=1.0, max_delay=None):
+        self.callback = callback
+        self.debounce = debounce
+        self.max_delay = max_delay if max_delay is not None else 5 * debounce
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._pending_reasons = {} # reason -> None, in order of arrival
+        self._pending_since = 0.0
+        self._last_change = 0.0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"net-watcher-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _run(self):
+        raise NotImplementedError
+
+    def _note_change(self, reason, now=None):
+        """Remembers a change; bursts (a VPN connect produces dozens of events) are reported once."""
+        now = time.monotonic() if now is None else now
+        if not self._pending_reasons:
+            self._pending_since = now
+        self._pending_reasons[reason] = None
+        self._last_change = now
+
+    def _flush_due_at(self):
+        """Monotonic time the pending burst is reported at, or None if nothing is pending."""
+        if not self._pending_reasons:
+            return None
+        return min(self._last_change + self.debounce, self._pending_since + self.max_delay)
+
+    def _flush_if_due(self, now=None):
+        due_at = self._flush_due_at()
+        now = time.monotonic() if now is None else now
+        if due_at is not None and now >= due_at:
+            reason = ", ".join(self._pending_reasons)
+            self._pending_reasons = {}
+            try:
+                self.callback(reason)
+            except Exception as e:
+                log.exception("Network change callback failed: %s", e)
+
+
+class NetlinkWatcher(NetworkWatcher):
+    """
+    Linux: rtnetlink multicast groups for links, addresses and routes.
+
+    The current links, addresses and routes are loaded first (a netlink
+    dump), so only real changes are reported: the kernel re-announces a
+    route or address whenever its lifetime is refreshed (every IPv6 router
+    advertisement), and those are ignored. resolv.conf is compared when
+    netlink wakes the thread (DNS changes come with link/address changes);
+    otherwise the thread sleeps until there is something to read.
+    """
+    name = "netlink"
+
+    RTMGRP_LINK = 0x1
+    RTMGRP_IPV4_IFADDR = 0x10
+    RTMGRP_IPV4_ROUTE = 0x40
+    RTMGRP_IPV6_IFADDR = 0x100
+    RTMGRP_IPV6_ROUTE = 0x400
+
+    NLMSG_ERROR, NLMSG_DONE = 2, 3
+    RTM_NEWLINK, RTM_DELLINK, RTM_GETLINK = 16, 17, 18
+    RTM_NEWADDR, RTM_DELADDR, RTM_GETADDR = 20, 21, 22
+    RTM_NEWROUTE, RTM_DELROUTE, RTM_GETROUTE = 24, 25, 26
+    NLM_F_REQUEST, NLM_F_DUMP = 0x1, 0x300
+    IFF_UP, IFF_RUNNING, IFF_LOWER_UP = 0x1, 0x40, 0x10000
+    RTM_F_CLONED = 0x200
+    IFA_ADDRESS, IFA_LOCAL = 1, 2
+    RTA_DST, RTA_OIF, RTA_GATEWAY, RTA_PRIORITY, RTA_TABLE = 1, 4, 5, 6, 15
+
+    MESSAGE_TYPES = {
+        RTM_NEWLINK: "link up/changed", RTM_DELLINK: "link removed",
+        RTM_NEWADDR: "address added", RTM_DELADDR: "address removed",
+        RTM_NEWROUTE: "route added", RTM_DELROUTE: "route removed",
+    }
+    _NLMSGHDR = struct.Struct("=IHHII") # length, type, flags, seq, pid
+    _IFINFOMSG = struct.Struct("=BxHiII") # family, type, index, flags, change
+    _IFADDRMSG = struct.Struct("=BBBBI") # family, prefixlen, flags, scope, index
+    _RTMSG = struct.Struct("=BBBBBBBBI") # family, dst_len, src_len, tos, table, protocol, scope, type, flags
+    _RTATTR = struct.Struct("=HH") # length, type
+    DUMP_TIMEOUT = 2.0
+
+    def __init__(self, callback, debounce=1.0, max_delay=None, resolv_conf="/etc/resolv.conf", sock=None):
+        super().__init__(callback, debounce, max_delay)
+        self.resolv_conf = resolv_conf
+        self._known = {} # link/address/route key -> state; a NEW message that matches changes nothing
+        self._dump_seq = 0
+        if sock is None:
+            groups = (self.RTMGRP_LINK | self.RTMGRP_IPV4_IFADDR | self.RTMGRP_IPV4_ROUTE |
+                      self.RTMGRP_IPV6_IFADDR | self.RTMGRP_IPV6_ROUTE)
+            # Opened here so an unsupported kernel fails in create_watcher(), not on the thread
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+            sock.bind((0, groups))
+        self._sock = sock
+        self._sock.setblocking(False)
+        # stop() wakes the thread through this pair; socket objects refuse writes once closed
+        self._wake_r, self._wake_w = socket.socketpair()
+
+    def stop(self):
+        super().stop()
+        try:
+            self._wake_w.send(b"x")
+        except OSError:
+            pass # the thread has already exited
+
+    def _resolv_conf_stamp(self):
+        try:
+            st = os.stat(self.resolv_conf)
+            return (st.st_mtime_ns, st.st_ino)
+        except OSError:
+            return None
+
+    @classmethod
+    def _attributes(cls, data, offset, end):
+        attrs = {}
+        while offset + cls._RTATTR.size <= end:
+            length, attr_type = cls._RTATTR.unpack_from(data, offset)
+            if length < cls._RTATTR.size:
+                break
+            attrs[attr_type] = bytes(data[offset + cls._RTATTR.size:offset + length])
+            offset += (length + 3) & ~3 # RTA_ALIGN
+        return attrs
+
+    def _identify(self, msg_type, data, offset, end):
+        """(key, state) of the link, address or route a message describes, or None to ignore it."""
+        body = offset + self._NLMSGHDR.size
+        if msg_type in (self.RTM_NEWLINK, self.RTM_DELLINK) and body + self._IFINFOMSG.size <= end:
+            _, _, index, flags, _ = self._IFINFOMSG.unpack_from(data, body)
+            return ("link", index), flags & (self.IFF_UP | self.IFF_RUNNING | self.IFF_LOWER_UP)
+        if msg_type in (self.RTM_NEWADDR, self.RTM_DELADDR) and body + self._IFADDRMSG.size <= end:
+            family, prefixlen, _, _, index = self._IFADDRMSG.unpack_from(data, body)
+            attrs = self._attributes(data, body + self._IFADDRMSG.size, end)
+            address = attrs.get(self.IFA_LOCAL) or attrs.get(self.IFA_ADDRESS)
+            return ("address", family, prefixlen, index, address), None
+        if msg_type in (self.RTM_NEWROUTE, self.RTM_DELROUTE) and body + self._RTMSG.size <= end:
+            family, dst_len, _, _, table, _, _, _, flags = self._RTMSG.unpack_from(data, body)
+            if flags & self.RTM_F_CLONED:
+                return None # route cache entries, not configuration
+            attrs = self._attributes(data, body + self._RTMSG.size, end)
+            table = struct.unpack("=I", attrs[self.RTA_TABLE])[0] if len(attrs.get(self.RTA_TABLE, b"")) == 4 else table
+            return ("route", family, dst_len, table, attrs.get(self.RTA_DST), attrs.get(self.RTA_GATEWAY),
+                    attrs.get(self.RTA_OIF), attrs.get(self.RTA_PRIORITY)), None
+        return None
+
+    def _apply(self, data):
+        """
+        Updates the known state from one netlink datagram. Returns (reasons
+        for the real changes in it, True if it ended a dump).
+        """
+        reasons, done = [], False
+        offset = 0
+        while offset + self._NLMSGHDR.size <= len(data):
+            length, msg_type, _, _, _ = self._NLMSGHDR.unpack_from(data, offset)
+            if length < self._NLMSGHDR.size:
+                break
+            end = min(offset + length, len(data))
+            if msg_type in (self.NLMSG_DONE, self.NLMSG_ERROR):
+                done = True
+            elif msg_type in self.MESSAGE_TYPES:
+                identity = self._identify(msg_type, data, offset, end)
+                if identity is not None:
+                    key, state = identity
+                    if msg_type in (self.RTM_DELLINK, self.RTM_DELADDR, self.RTM_DELROUTE):
+                        self._known.pop(key, None)
+                        reasons.append(self.MESSAGE_TYPES[msg_type])
+                    elif key not in self._known or self._known[key] != state:
+                        self._known[key] = state
+                        reasons.append(self.MESSAGE_TYPES[msg_type])
+            offset += (length + 3) & ~3 # NLMSG_ALIGN
+        return reasons, done
+
+    def _load_current_state(self):
+        """Dumps the links, addresses and routes into the known state without reporting them."""
+        for msg_type, request in ((self.RTM_GETLINK, self._IFINFOMSG), (self.RTM_GETADDR, self._IFADDRMSG),
+                                  (self.RTM_GETROUTE, self._RTMSG)):
+            self._dump_seq += 1
+            self._sock.send(self._NLMSGHDR.pack(self._NLMSGHDR.size + request.size, msg_type,
+                                                self.NLM_F_REQUEST | self.NLM_F_DUMP, self._dump_seq, 0)
+                            + bytes(request.size))
+            deadline = time.monotonic() + self.DUMP_TIMEOUT
+            done = False
+            while not done and not self._stop_event.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not select.select([self._sock], [], [], remaining)[0]:
+                    log.debug("Netlink dump %s did not finish", msg_type)
+                    break
+                try:
+                    while not done:
+                        _, done = self._apply(self._sock.recv(65536))
+                except BlockingIOError:
+                    pass
+
+    def _read_changes(self):
+        """Takes in everything queued on the socket; returns True if anything changed."""
+        changed = False
+        try:
+            while True:
+                for reason in self._apply(self._sock.recv(65536))[0]:
+                    self._note_change(reason)
+                    changed = True
+        except BlockingIOError:
+            pass
+        except OSError as e:
+            if e.errno != errno.ENOBUFS:
+                raise
+            # The kernel dropped events (a flood); the known state may be stale, so re-read it
+            log.info("Netlink events were dropped; reloading the network state")
+            self._known.clear()
+            self._load_current_state()
+            self._note_change("network events dropped")
+            changed = True
+        return changed
+
+    def _run(self):
+        try:
+            self._load_current_state()
+            dns_stamp = self._resolv_conf_stamp()
+            while not self._stop_event.is_set():
+                # Sleeps until netlink data or stop(), or until a pending burst is due
+                due_at = self._flush_due_at()
+                timeout = None if due_at is None else max(0.0, due_at - time.monotonic())
+                readable, _, _ = select.select([self._sock, self._wake_r], [], [], timeout)
+                if self._sock in readable:
+                    self._read_changes()
+                    stamp = self._resolv_conf_stamp()
+                    if stamp != dns_stamp:
+                        dns_stamp = stamp
+                        self._note_change("DNS configuration changed")
+                self._flush_if_due()
+        except OSError as e:
+            if not self._stop_event.is_set():
+                log.error("Network watcher stopped: %s", e)
+        finally:
+            self._sock.close()
+            self._wake_r.close()
+            self._wake_w.close()
+
+
+# Other OS backends register here: {sys.platform prefix: watcher class}
+WATCHER_BACKENDS = {
+    "linux": NetlinkWatcher,
+}
+
+def create_watcher(callback, debounce=1.0):
+    """Returns a started watcher for this OS, or None if there is no backend or it failed to open."""
+    for prefix, cls in WATCHER_BACKENDS.items():
+        if sys.platform.startswith(prefix):
+            try:
+                watcher = cls(callback, debounce)
+            except (OSError, AttributeError) as e:
+                log.warning("Network watcher '%s' unavailable: %s", cls.name, e)
+                return None
+            watcher.start()
+            log.info("Network watcher started: %s", cls.name)
+            return watcher
+    return None
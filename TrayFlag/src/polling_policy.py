@@ -0,0 +1,89 @@
+# File: src/polling_policy.py
+
+import random
+
+class PollingPolicy:
+    """
+    Decides how long to wait before the next IP check. UpdateHandler reports
+    every outcome (on_success/on_failure) and calls reset() on user clicks
+    and network changes.
+    """
+    name = "base"
+
+    def __init__(self, jitter=0.30, rng=None):
+        self.jitter = jitter
+        self.rng = rng or random.Random()
+        self.effective_interval = 0.0 # last interval before jitter, in seconds
+
+    def next_interval(self, base_seconds):
+        """Returns the delay in seconds (jitter applied) before the next check."""
+        self.effective_interval = self._interval(base_seconds)
+        spread = self.effective_interval * self.jitter
+        return max(1.0, self.rng.uniform(self.effective_interval - spread, self.effective_interval + spread))
+
+    def _interval(self, base_seconds):
+        return base_seconds
+
+    def on_success(self, ip_changed):
+        pass
+
+    def on_failure(self):
+        pass
+
+    def reset(self):
+        pass
+
+    def describe(self):
+        return f"{self.name}, {self.effective_interval:.0f}s"
+
+
+class FixedPolicy(PollingPolicy):
+    """The classic behaviour: always the configured interval ± jitter."""
+    name = "fixed"
+
+
+class AdaptivePolicy(PollingPolicy):
+    """
+    Exponential backoff (capped at `max_backoff`) while checks fail, and a
+    gradual widening (capped at `max_stable`) while the IP stays the same.
+    Any change, user click or network event snaps back to the base interval.
+    """
+    name = "adaptive"
+
+    def __init__(self, max_backoff=300, max_stable=60, widen_after=5, widen_factor=1.25, **kwargs):
+        super().__init__(**kwargs)
+        self.max_backoff = max_backoff
+        self.max_stable = max_stable
+        self.widen_after = widen_after
+        self.widen_factor = widen_factor
+        self.failures = 0
+        self.stable_checks = 0
+
+    def _interval(self, base_seconds):
+        if self.failures:
+            return min(base_seconds * 2 ** self.failures, max(base_seconds, self.max_backoff))
+        steps = self.stable_checks // self.widen_after
+        return min(base_seconds * self.widen_factor ** steps, max(base_seconds, self.max_stable))
+
+    def on_success(self, ip_changed):
+        self.failures = 0
+        self.stable_checks = 0 if ip_changed else self.stable_checks + 1
+
+    def on_failure(self):
+        self.failures += 1
+        self.stable_checks = 0
+
+    def reset(self):
+        self.failures = 0
+        self.stable_checks = 0
+
+    def describe(self):
+        if self.failures:
+            return f"{self.name}, {self.effective_interval:.0f}s (backoff after {self.failures} failures)"
+        return f"{self.name}, {self.effective_interval:.0f}s (stable for {self.stable_checks} checks)"
+
+
+def create_policy(config, rng=None):
+    if config.poll_policy == "adaptive":
+        return AdaptivePolicy(max_backoff=config.poll_max_backoff, max_stable=config.poll_max_stable, rng=rng)
+    return FixedPolicy(rng=rng)
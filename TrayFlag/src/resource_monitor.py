@@ -0,0 +1,163 @@
+# File: src/resource_monitor.py
+
+"""
+Resource counters for runs that last weeks ([debug] in the ini).
+
+sample() counts the live QObjects by class (every wrapper the garbage
+collector can see), the widgets, the threads by name, the OS threads and
+the resident memory, and keeps the last SAMPLES_KEPT samples; the app
+samples every resource_sample_mins minutes and warns when a count has
+grown at every one of the last LEAK_SAMPLES samples. With tracemalloc=true, memory_diff()
+takes a snapshot and returns the source lines whose allocations grew the
+most since the previous one (the status API serves it at /memory).
+"""
+
+import gc
+import os
+import re
+import sys
+import time
+import threading
+import tracemalloc
+import logging
+from collections import Counter, deque
+
+from PySide6 import QtCore
+
+log = logging.getLogger(__name__)
+
+SAMPLES_KEPT = 48
+LEAK_SAMPLES = 6 # consecutive growing samples before a warning
+TOP_CLASSES = 15
+
+_samples = deque(maxlen=SAMPLES_KEPT)
+_baseline = None # tracemalloc snapshot the next diff compares with
+_baseline_lock = threading.Lock()
+
+def rss_kb():
+    """Resident memory of this process in KiB (Linux /proc, Windows via pywin32), or None."""
+    if sys.platform == "win32":
+        try:
+            import win32api, win32process
+            info = win32process.GetProcessMemoryInfo(win32api.GetCurrentProcess())
+            return info['WorkingSetSize'] // 1024
+        except Exception:
+            return None
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def os_thread_count():
+    """Threads of this process as the OS sees them (Qt's own included), or None where unknown."""
+    try:
+        return len(os.listdir("/proc/self/task"))
+    except OSError:
+        return None
+
+def qobject_counts():
+    """Live QObjects with a Python wrapper, by class."""
+    return Counter(type(obj).__name__ for obj in gc.get_objects() if isinstance(obj, QtCore.QObject))
+
+def widget_count():
+    """Live widgets, wrapped or not (menus are widgets), or None without a QApplication (headless)."""
+    widgets = sys.modules.get("PySide6.QtWidgets")
+    app = QtCore.QCoreApplication.instance()
+    if widgets is None or not isinstance(app, widgets.QApplication):
+        return None
+    return len(widgets.QApplication.allWidgets())
+
+def thread_counts():
+    """Python threads by name, numbers stripped ('ip-update-0' and 'ip-update-1' count as 'ip-update-')."""
+    return Counter(re.sub(r"\d+", "", thread.name) for thread in threading.enumerate())
+
+def sample():
+    """Takes one sample (Qt thread: it walks the QObject wrappers) and keeps it."""
+    qobjects = qobject_counts()
+    threads = thread_counts()
+    entry = {
+        'time': time.time(),
+        'rss_kb': rss_kb(),
+        'os_threads': os_thread_count(),
+        'python_threads': sum(threads.values()),
+        'qobjects': sum(qobjects.values()),
+        'widgets': widget_count(),
+        'qobjects_by_class': dict(qobjects.most_common(TOP_CLASSES)),
+        'threads_by_name': dict(threads),
+    }
+    _samples.append(entry)
+    return entry
+
+def last_sample():
+    return _samples[-1] if _samples else None
+
+def samples():
+    return list(_samples)
+
+def clear():
+    _samples.clear()
+
+def steady_growth(key, count=LEAK_SAMPLES):
+    """True when `key` grew at every one of the last `count` samples."""
+    values = [entry[key] for entry in list(_samples)[-(count + 1):]]
+    if len(values) <= count or None in values:
+        return False
+    return all(later > earlier for earlier, later in zip(values, values[1:]))
+
+def log_sample():
+    entry = sample()
+    log.info("Resources: RSS %s KiB, %s QObjects, %s widgets, %s Python threads, %s OS threads",
+             entry['rss_kb'], entry['qobjects'], entry['widgets'], entry['python_threads'], entry['os_threads'])
+    for key in ('qobjects', 'widgets', 'python_threads', 'os_threads'):
+        if steady_growth(key):
+            first = _samples[-(LEAK_SAMPLES + 1)]
+            log.warning("Possible leak: %s grew at each of the last %s samples (%s -> %s)",
+                        key, LEAK_SAMPLES, first[key], entry[key])
+
+def start_tracemalloc(frames=1):
+    """Starts tracing allocations; the first diff compares with this moment."""
+    global _baseline
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(max(1, frames))
+    with _baseline_lock:
+        _baseline = _snapshot()
+    log.info("tracemalloc started (%s frame(s) per allocation)", max(1, frames))
+
+def _snapshot():
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    ))
+
+def memory_diff(top=20):
+    """
+    Allocation growth per source line since the previous call (or since
+    start_tracemalloc), largest first. None while tracemalloc is off.
+    Safe from any thread.
+    """
+    global _baseline
+    if not tracemalloc.is_tracing():
+        return None
+    snapshot = _snapshot()
+    with _baseline_lock:
+        previous, _baseline = _baseline, snapshot
+    if previous is None:
+        return []
+    lines = []
+    for stat in snapshot.compare_to(previous, "lineno")[:top]:
+        frame = stat.traceback[0]
+        lines.append({
+            'where': f"{frame.filename}:{frame.lineno}",
+            'size_kb': round(stat.size / 1024, 1),
+            'size_diff_kb': round(stat.size_diff / 1024, 1),
+            'count_diff': stat.count_diff,
+        })
+    return lines
+
+def install(config, scheduler):
+    """Starts tracemalloc and the periodic sample as configured ([debug] in the ini)."""
+    if config.tracemalloc:
+        start_tracemalloc(config.tracemalloc_frames)
+    if config.resource_sample_mins > 0:
+        scheduler.add_periodic("resource_sample", config.resource_sample_mins * 60, log_sample, first_delay=60)
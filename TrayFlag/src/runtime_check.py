@@ -0,0 +1,49 @@
+# File: src/runtime_check.py
+
+"""
+Startup check for a PySide6 bug that makes long runs crash.
+
+Some PySide6 builds (seen with 6.12 on Python 3.11) lose one reference to
+True on every signal emit and one to None on every Qt call that returns
+nothing. Python 3.12 made True and None immortal, so there it is harmless;
+on older Pythons the count reaches zero after a few hours of checks and the
+interpreter aborts. The app refuses to start on such a runtime instead.
+"""
+
+import sys
+import logging
+from PySide6 import QtCore
+import PySide6
+
+log = logging.getLogger(__name__)
+
+PROBE_CALLS = 20
+
+class _Probe(QtCore.QObject):
+    ping = QtCore.Signal()
+
+def refcount_problem():
+    """Returns a message describing the bug when this runtime has it, else None."""
+    if sys.version_info >= (3, 12):
+        return None
+    probe = _Probe()
+    probe.ping.connect(lambda: None)
+    true_before, none_before = sys.getrefcount(True), sys.getrefcount(None)
+    for _ in range(PROBE_CALLS):
+        probe.ping.emit()
+        probe.setObjectName("probe")
+    lost_true = true_before - sys.getrefcount(True)
+    lost_none = none_before - sys.getrefcount(None)
+    # A few references may move on other threads meanwhile; the bug loses one per call
+    if lost_true < PROBE_CALLS // 2 and lost_none < PROBE_CALLS // 2:
+        return None
+    return (f"PySide6 {PySide6.__version__} on Python {sys.version.split()[0]} loses references to "
+            f"True/None on every Qt call ({lost_true} and {lost_none} in {PROBE_CALLS} calls), so the "
+            f"app would crash after some hours. Use Python 3.12 or newer, or a PySide6 release without this bug.")
+
+def ensure_safe_runtime():
+    """Logs and returns the problem when the runtime is unsafe (the caller exits), else None."""
+    problem = refcount_problem()
+    if problem:
+        log.critical(problem)
+    return problem
@@ -0,0 +1,169 @@
+# File: src/scheduler.py
+
+import time
+import heapq
+import random
+import logging
+from PySide6 import QtCore
+
+import tracing
+
+log = logging.getLogger(__name__)
+
+# QTimer takes a signed 32-bit millisecond interval (~24.8 days)
+MAX_TIMER_MS = 2 ** 31 - 1
+
+class _Task:
+    def __init__(self, name, callback, period, jitter):
+        self.name = name
+        self.callback = callback
+        self.period = period      # None for one-shot tasks
+        self.jitter = jitter      # fraction of the period, e.g. 0.3 = ±30%
+        self.deadline = 0.0
+        self.version = 0          # bumped on reschedule/cancel; stale heap entries are skipped
+
+
+class TaskQueue:
+    """Heap of named task deadlines. Pure Python, so it can be driven by a simulated clock."""
+    def __init__(self, rng=None):
+        self.rng = rng or random.Random()
+        self._heap = []
+        self._tasks = {}
+        self.run_counts = {} # name -> runs, kept across one-shot reschedules
+
+    def add(self, name, callback, delay, period=None, jitter=0.0, now=0.0):
+        task = self._tasks.get(name)
+        if task is None:
+            task = _Task(name, callback, period, jitter)
+            self._tasks[name] = task
+        else:
+            task.callback, task.period, task.jitter = callback, period, jitter
+        self._push(task, now + delay)
+        return task
+
+    def _push(self, task, deadline):
+        task.version += 1
+        task.deadline = deadline
+        heapq.heappush(self._heap, (deadline, task.version, task.name))
+
+    def cancel(self, name):
+        task = self._tasks.pop(name, None)
+        if task is not None:
+            task.version += 1 # invalidates its heap entry
+
+    def get(self, name):
+        return self._tasks.get(name)
+
+    def _clean_top(self):
+        while self._heap:
+            deadline, version, name = self._heap[0]
+            task = self._tasks.get(name)
+            if task is not None and task.version == version:
+                return task
+            heapq.heappop(self._heap)
+        return None
+
+    def next_deadline(self):
+        task = self._clean_top()
+        return task.deadline if task else None
+
+    def pop_due(self, now):
+        """Removes and returns every task due at `now`; periodic ones are re-queued with jitter."""
+        due = []
+        while True:
+            task = self._clean_top()
+            if task is None or task.deadline > now:
+                break
+            heapq.heappop(self._heap)
+            due.append(task)
+            self.run_counts[task.name] = self.run_counts.get(task.name, 0) + 1
+            if task.period is None:
+                del self._tasks[task.name]
+            else:
+                spread = task.period * task.jitter
+                self._push(task, now + self.rng.uniform(task.period - spread, task.period + spread))
+        return due
+
+    def tasks(self):
+        return list(self._tasks.values())
+
+
+class Scheduler(QtCore.QObject):
+    """
+    Central scheduler for every periodic and delayed task in the app.
+    One single-shot QTimer is armed for the nearest deadline, so the
+    process wakes up exactly when something is due and never in between.
+    Callbacks run on the Qt main thread.
+    """
+    # Tasks that come due within this window run in the same wakeup
+    COALESCE_SECONDS = 0.010
+
+    def __init__(self, clock=time.monotonic, rng=None):
+        super().__init__()
+        self.clock = clock
+        self.queue = TaskQueue(rng)
+        self.wakeups = 0
+        self.started_at = clock()
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(QtCore.Qt.TimerType.PreciseTimer)
+        self._timer.timeout.connect(self._on_timeout)
+
+    def add_periodic(self, name, period, callback, jitter=0.0, first_delay=None):
+        """Runs `callback` every `period` seconds (± jitter), first after `first_delay` (default: one period)."""
+        delay = period if first_delay is None else first_delay
+        self.queue.add(name, callback, delay, period, jitter, self.clock())
+        self._rearm()
+
+    def schedule_once(self, name, delay, callback):
+        """Runs `callback` once after `delay` seconds, replacing a pending task with the same name."""
+        self.queue.add(name, callback, delay, None, 0.0, self.clock())
+        self._rearm()
+
+    def cancel(self, name):
+        self.queue.cancel(name)
+        self._rearm()
+
+    def is_scheduled(self, name):
+        return self.queue.get(name) is not None
+
+    def remaining(self, name):
+        """Seconds until the task runs, or None if it is not scheduled."""
+        task = self.queue.get(name)
+        return max(0.0, task.deadline - self.clock()) if task else None
+
+    def _rearm(self):
+        deadline = self.queue.next_deadline()
+        if deadline is None:
+            self._timer.stop()
+            return
+        delay_ms = max(0, round((deadline - self.clock()) * 1000))
+        self._timer.start(min(delay_ms, MAX_TIMER_MS))
+
+    @QtCore.Slot()
+    def _on_timeout(self):
+        self.wakeups += 1
+        for task in self.queue.pop_due(self.clock() + self.COALESCE_SECONDS):
+            try:
+                with tracing.span("scheduler.fire", task=task.name):
+                    task.callback()
+            except Exception as e:
+                log.exception("Scheduled task '%s' failed: %s", task.name, e)
+        self._rearm()
+
+    def stats(self):
+        """Wakeup counters and the next run of every task (for logs and debug views)."""
+        now = self.clock()
+        hours = max((now - self.started_at) / 3600, 1e-9)
+        return {
+            'wakeups': self.wakeups,
+            'wakeups_per_hour': round(self.wakeups / hours, 1),
+            'runs': dict(self.queue.run_counts),
+            'tasks': {t.name: {'next_in_s': round(t.deadline - now, 1), 'period_s': t.period}
+                      for t in self.queue.tasks()},
+        }
+
+    def log_stats(self):
+        stats = self.stats()
+        runs = ", ".join(f"{name} x{count}" for name, count in stats['runs'].items())
+        log.info("Scheduler: %s wakeups (%s/h), tasks: %s", stats['wakeups'], stats['wakeups_per_hour'], runs)
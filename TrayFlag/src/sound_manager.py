@@ -2,68 +2,243 @@
 
 import os
 import threading
+import logging
 from utils import resource_path
+import tracing
+
+log = logging.getLogger(__name__)
+
+# numpy, soundfile and sounddevice take a few hundred ms to import, so they
+# are loaded by load_audio_libs() on a background thread after startup
+np = sf = sd = None
+DECODE_LIBS_AVAILABLE = False
+SOUND_LIBS_AVAILABLE = False
+_libs_lock = threading.Lock()
+_libs_loaded = False
+
+def load_audio_libs():
+    """Imports the audio libraries once. Returns (can_decode, can_play)."""
+    global np, sf, sd, DECODE_LIBS_AVAILABLE, SOUND_LIBS_AVAILABLE, _libs_loaded
+    with _libs_lock:
+        if not _libs_loaded:
+            _libs_loaded = True
+            try:
+                import numpy as np
+                import soundfile as sf
+                DECODE_LIBS_AVAILABLE = True
+            except ImportError:
+                DECODE_LIBS_AVAILABLE = False
+            try:
+                import sounddevice as sd
+            except (ImportError, OSError): # OSError: the PortAudio library is missing
+                sd = None
+            SOUND_LIBS_AVAILABLE = DECODE_LIBS_AVAILABLE and sd is not None
+        return DECODE_LIBS_AVAILABLE, SOUND_LIBS_AVAILABLE
+
+# Gains relative to the full-volume recordings: the old _low/_medium files were these at -12 and -6 dB
+VOLUME_GAINS = {"low": 10 ** (-12 / 20), "medium": 10 ** (-6 / 20), "high": 1.0}
+
+SOUNDS_DIR = resource_path(os.path.join("assets", "sounds"))
+SOUND_FILES = {
+    "notification": "notification.wav",
+    "alert": "alert.wav",
+}
+
+class _Voice:
+    """One cue being played: decoded samples, read position and gain."""
+    __slots__ = ("name", "samples", "gain", "pos")
+
+    def __init__(self, name, samples, gain):
+        self.name = name
+        self.samples = samples
+        self.gain = gain
+        self.pos = 0
+
+
+class PlaybackEngine:
+    """
+    One long-lived output stream that mixes the cues queued by play().
+
+    - Overlapping cues are mixed (up to `max_voices`); a cue that is already
+      playing and started less than `dedupe_seconds` ago is dropped, so a
+      burst of alerts is heard once.
+    - The stream stops itself after `idle_seconds` of silence, so there is
+      no audio callback running between notifications, and is restarted
+      by the next cue. The stream object itself is only created once.
+    """
+    def __init__(self, samplerate=48000, channels=2, max_voices=3, dedupe_seconds=0.25,
+                 idle_seconds=5.0, stream_factory=None, callback_stop=None):
+        load_audio_libs()
+        self.samplerate = samplerate
+        self.channels = channels
+        self.max_voices = max_voices
+        self.dedupe_frames = int(dedupe_seconds * samplerate)
+        self.idle_seconds = idle_seconds
+        # Benchmarks pass a fake stream; normally sounddevice.OutputStream
+        self._stream_factory = stream_factory or (lambda **kwargs: sd.OutputStream(**kwargs))
+        self._callback_stop = callback_stop or sd.CallbackStop
+        self._stream = None
+        self._voices = []
+        self._lock = threading.Lock() # voices and silence count, shared with the audio callback
+        # play() and close(): queueing a cue and (re)starting the stream are one step
+        self._control_lock = threading.Lock()
+        self._stopping = False # the callback asked the stream to stop; it may still report active
+        self._silent_frames = 0
+        self.played = 0
+        self.dropped = 0
+
+    def play(self, name, samples, gain=1.0):
+        """Queues a cue. Returns False if it was dropped."""
+        with self._control_lock:
+            with self._lock:
+                for voice in self._voices:
+                    if voice.name == name and voice.pos < self.dedupe_frames:
+                        self.dropped += 1
+                        return False
+                if len(self._voices) >= self.max_voices:
+                    self.dropped += 1
+                    return False
+                self._voices.append(_Voice(name, samples, gain))
+                self._silent_frames = 0
+                self.played += 1
+            self._ensure_running()
+        return True
+
+    def _ensure_running(self):
+        """Called with the control lock held, so only one caller creates or restarts the stream."""
+        if self._stream is None:
+            self._stream = self._stream_factory(
+                samplerate=self.samplerate, channels=self.channels, dtype="float32", callback=self._callback)
+        with self._lock:
+            # A stream whose callback has just raised CallbackStop still reports active
+            # until it winds down; the voice queued above would never be heard
+            restart = self._stopping or not self._stream.active
+            self._stopping = False
+        if restart:
+            # A stream that ended via CallbackStop must be stopped before it can be started again.
+            # Not under self._lock: stop() waits for a callback that may be waiting for it.
+            self._stream.stop()
+            self._stream.start()
+
+    def _callback(self, outdata, frames, time_info, status):
+        """Audio thread: sums the active voices into the output block."""
+        outdata.fill(0)
+        with self._lock:
+            for voice in list(self._voices):
+                chunk = voice.samples[voice.pos:voice.pos + frames]
+                outdata[:len(chunk)] += chunk * voice.gain
+                voice.pos += len(chunk)
+                if voice.pos >= len(voice.samples):
+                    self._voices.remove(voice)
+            if self._voices:
+                self._silent_frames = 0
+            else:
+                self._silent_frames += frames
+                if self._silent_frames >= self.idle_seconds * self.samplerate:
+                    self._stopping = True
+                    raise self._callback_stop
+        np.clip(outdata, -1.0, 1.0, out=outdata)
+
+    def close(self):
+        with self._control_lock:
+            if self._stream is not None:
+                self._stream.close()
+                self._stream = None
 
-try:
-    import soundfile as sf
-    import sounddevice as sd
-    SOUND_LIBS_AVAILABLE = True
-except ImportError:
-    SOUND_LIBS_AVAILABLE = False
 
 class SoundManager:
-    def __init__(self, config):
+    def __init__(self, config, engine=None, sounds_dir=SOUNDS_DIR):
         """
         Initializes the sound manager.
         :param config: Example of ConfigManager for access to settings.
+        :param engine: PlaybackEngine to use (created on first play by default).
+        :param sounds_dir: Folder with the sound files.
         """
         self.config = config
-        self.sound_samples = None
-        self.sound_samplerate = None
-        self.alert_sound_samples = None
-        self.alert_sound_samplerate = None
-        
-        if SOUND_LIBS_AVAILABLE:
+        self.engine = engine
+        self.sounds_dir = sounds_dir
+        self.sounds = {} # name -> float32 (frames, channels) at the engine's sample rate
+        self.gain = VOLUME_GAINS.get(config.volume_level, VOLUME_GAINS["medium"])
+        self.loaded = False
+        self._loading = False
+        self._pending = [] # cues requested before the sounds were loaded
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Imports the audio libraries and decodes the sounds, then plays any cue that was waiting."""
+        with self._lock:
+            if self.loaded or self._loading:
+                return
+            self._loading = True
+        can_decode, _ = load_audio_libs()
+        if can_decode:
             self._load_sounds()
+        with self._lock:
+            self.loaded = True
+            pending, self._pending = self._pending, []
+        for name in pending:
+            self._play(name)
+
+    def load_in_background(self):
+        threading.Thread(target=self.load, name="sound-loader", daemon=True).start()
 
     def reload_sounds(self):
-        """Public method for reloading with a log."""
-        print(f"Sounds reloaded for volume level: {self.config.volume_level}")
-        self._load_sounds()
+        """Applies a changed volume level. The samples stay decoded; only the gain changes."""
+        self.gain = VOLUME_GAINS.get(self.config.volume_level, VOLUME_GAINS["medium"])
+        log.info("Sound volume set to: %s (gain %s)", self.config.volume_level, self.gain)
 
     def _load_sounds(self):
-        """Internal method that simply loads files."""
-        volume_level = self.config.volume_level
-        self.sound_samples, self.sound_samplerate = self._load_sound_file(f"notification_{volume_level}.wav")
-        self.alert_sound_samples, self.alert_sound_samplerate = self._load_sound_file(f"alert_{volume_level}.wav")
+        """Decodes every sound once, converted to the engine's sample rate and channel count."""
+        for name, filename in SOUND_FILES.items():
+            samples = self._load_sound_file(filename)
+            if samples is not None:
+                self.sounds[name] = samples
 
-    def _load_sound_file(self, filename):
+    def _load_sound_file(self, filename, samplerate=48000, channels=2):
         """Loads a sound file from the assets folder."""
         try:
-            path = resource_path(os.path.join("assets", "sounds", filename))
-            return sf.read(path, dtype='float32')
+            path = os.path.join(self.sounds_dir, filename)
+            samples, file_rate = sf.read(path, dtype='float32', always_2d=True)
         except Exception as e:
-            print(f"Error loading sound {filename}: {e}")
-            return None, None
+            log.warning("Error loading sound %s: %s", filename, e)
+            return None
+        if samples.shape[1] != channels:
+            samples = np.repeat(samples[:, :1], channels, axis=1)
+        if file_rate != samplerate:
+            # Linear resampling, done once at load time
+            frames = int(round(len(samples) * samplerate / file_rate))
+            positions = np.linspace(0, len(samples) - 1, frames)
+            indices = np.arange(len(samples))
+            samples = np.column_stack([np.interp(positions, indices, samples[:, c]) for c in range(channels)])
+        return np.ascontiguousarray(samples, dtype=np.float32)
 
     def play_notification(self):
-        """Plays a notification sound in a separate thread."""
+        """Queues the notification sound on the playback engine."""
         if self.config.sound:
-            self._start_sound_thread(self.sound_samples, self.sound_samplerate)
+            self._play("notification")
 
     def play_alert(self):
-        """Plays an alert sound in a separate thread."""
+        """Queues the alert sound on the playback engine."""
         if self.config.sound:
-            self._start_sound_thread(self.alert_sound_samples, self.alert_sound_samplerate)
+            self._play("alert")
 
-    def _start_sound_thread(self, samples, samplerate):
-        if not SOUND_LIBS_AVAILABLE or samples is None:
+    def _play(self, name):
+        with self._lock:
+            if not self.loaded:
+                if name not in self._pending:
+                    self._pending.append(name)
+                return
+        samples = self.sounds.get(name)
+        if samples is None or (self.engine is None and not SOUND_LIBS_AVAILABLE):
             return
-        threading.Thread(target=self._play_sound_task, args=(samples, samplerate), daemon=True).start()
-
-    def _play_sound_task(self, samples, samplerate):
         try:
-            sd.play(samples, samplerate)
-            sd.wait()
+            with tracing.span("sound.play", sound=name):
+                if self.engine is None:
+                    self.engine = PlaybackEngine()
+                self.engine.play(name, samples, self.gain)
         except Exception as e:
-            print(f"Error in sound playback thread: {e}")
+            log.warning("Error in sound playback: %s", e)
+
+    def close(self):
+        if self.engine:
+            self.engine.close()
@@ -0,0 +1,76 @@
+# File: src/startup_profile.py
+
+"""
+Startup profiling mode (main.py --profile-startup, or TRAYFLAG_PROFILE_STARTUP=1).
+
+Records wall-clock phases (QApplication created, icon shown, first IP
+painted, ...) and, like `python -X importtime`, the self and cumulative
+time of every module imported during startup. The report is printed once,
+when report() is first called after the first IP is painted.
+Without enable() every function here is a no-op.
+"""
+
+import sys
+import time
+import builtins
+import threading
+import logging
+
+log = logging.getLogger(__name__)
+
+_start = time.perf_counter()
+_enabled = False
+_reported = False
+_phases = []  # (name, seconds since start)
+_imports = {} # module -> [self seconds, cumulative seconds]
+_local = threading.local() # per thread: child time accumulated by the imports in progress
+_original_import = builtins.__import__
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level or name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+    stack = _local.__dict__.setdefault("stack", [])
+    stack.append(0.0)
+    started = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        elapsed = time.perf_counter() - started
+        children = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        entry = _imports.setdefault(name, [0.0, 0.0])
+        entry[0] += elapsed - children
+        entry[1] += elapsed
+
+def enable():
+    global _enabled
+    if _enabled:
+        return
+    _enabled = True
+    builtins.__import__ = _timed_import
+    mark("profiling enabled")
+
+def is_enabled():
+    return _enabled
+
+def mark(phase):
+    """Records a startup phase (only the first occurrence of each name)."""
+    if not _enabled or any(name == phase for name, _ in _phases):
+        return
+    _phases.append((phase, time.perf_counter() - _start))
+
+def report(top=15):
+    """Prints the phases and the slowest imports, then stops timing imports."""
+    global _reported
+    if not _enabled or _reported:
+        return
+    _reported = True
+    builtins.__import__ = _original_import
+    log.info("--- Startup phases (ms since process start) ---")
+    for name, seconds in _phases:
+        log.info("%9.1f  %s", seconds * 1000, name)
+    log.info("--- Slowest imports (self | cumulative, ms) ---")
+    slowest = sorted(_imports.items(), key=lambda item: item[1][1], reverse=True)[:top]
+    for module, (self_time, cumulative) in slowest:
+        log.info("%8.1f | %8.1f  %s", self_time * 1000, cumulative * 1000, module)
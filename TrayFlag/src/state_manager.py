@@ -1,17 +1,38 @@
 # File: src/state_manager.py
 
+import os
+import json
+import time
+import logging
 from collections import deque
+from utils import resource_path
+from constants import APP_NAME
+
+log = logging.getLogger(__name__)
+
+SNAPSHOT_PATH = resource_path(f"{APP_NAME}_state.json")
+SNAPSHOT_VERSION = 1
+HISTORY_VIEW_SIZE = 3 # previous locations kept in memory (the history submenu)
 
 class AppState:
     """Store and manage application state."""
-    def __init__(self):
+    def __init__(self, snapshot_path=SNAPSHOT_PATH, history=None):
         self.current_location_data = {}
-        self.location_history = deque(maxlen=3)
+        # With a HistoryStore this is a view over its newest transitions, otherwise the only record
+        self.location_history = deque(maxlen=HISTORY_VIEW_SIZE)
+        self.history = history
         self.last_known_external_ip = ""
         self.is_in_idle_mode = False
         self.last_known_ip = None
         self.last_update_time = 0
         self.base_tooltip_text = ""
+        self.poll_policy_info = "" # current polling policy and effective interval, for debugging
+        # True while the location shown comes from the last session and has not been verified yet
+        self.is_stale = False
+        self.snapshot_path = snapshot_path
+        # Called after every location change; the app uses it to schedule a (debounced) snapshot write
+        self.on_change = None
+        self._refresh_history_view()
 
     def update_location(self, new_data):
         """Update location data and history."""
@@ -20,12 +41,29 @@ class AppState:
             return
 
         # Update history only if IP actually changed
-        if self.last_known_external_ip != current_ip:
-            if self.current_location_data: # Add the previous state to the history
+        ip_changed = self.last_known_external_ip != current_ip
+        if ip_changed:
+            if self.current_location_data and not self.history: # Add the previous state to the history
                 self.location_history.append(self.current_location_data)
             self.last_known_external_ip = current_ip
         
         self.current_location_data = new_data
+        if self.history and (self.history.record(new_data) or ip_changed):
+            self._refresh_history_view()
+        self.last_update_time = time.time()
+        self.is_stale = False
+        if self.on_change:
+            self.on_change()
+
+    def _refresh_history_view(self):
+        """Reloads location_history: the newest transitions before the current location."""
+        if not self.history:
+            return
+        entries = self.history.recent(HISTORY_VIEW_SIZE + 1)
+        if entries and entries[-1]['ip'] == self.current_location_data.get('ip'):
+            entries.pop()
+        self.location_history.clear()
+        self.location_history.extend(entries)
 
     def set_idle_mode(self, status: bool):
         """Set idle mode flag."""
@@ -36,3 +74,61 @@ class AppState:
         self.last_known_external_ip = "N/A"
         self.base_tooltip_text = ""
         # self.current_location_data # You can keep the current location data without resetting
+
+    def save_snapshot(self):
+        """
+        Writes the last location and history to disk. The file is replaced
+        atomically, so a crash mid-write leaves the previous snapshot intact.
+        """
+        if not self.current_location_data:
+            return False
+        snapshot = {
+            'version': SNAPSHOT_VERSION,
+            'saved_at': time.time(),
+            'updated_at': self.last_update_time,
+            'location': self.current_location_data,
+            'history': list(self.location_history),
+        }
+        tmp_path = f"{self.snapshot_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            return True
+        except OSError as e:
+            log.warning("Could not save state snapshot: %s", e)
+            return False
+
+    def restore_snapshot(self):
+        """Restores the last session's location (marked as stale). Returns True if it did."""
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            log.warning("Ignoring unreadable state snapshot: %s", e)
+            return False
+        location = snapshot.get('location') or {}
+        if snapshot.get('version') != SNAPSHOT_VERSION or not location.get('ip'):
+            return False
+        self.show_restored(location, snapshot.get('updated_at', 0), snapshot.get('history', []))
+        return True
+
+    def show_restored(self, location, updated_at, history=()):
+        """
+        Shows a location from an earlier session, marked as stale. Display
+        only: unlike update_location() nothing is recorded in the history
+        and no snapshot is scheduled until a check confirms it.
+        """
+        self.current_location_data = location
+        self.last_known_external_ip = location['ip']
+        if self.history:
+            self._refresh_history_view()
+        else:
+            self.location_history.clear()
+            self.location_history.extend(history)
+        self.last_update_time = updated_at
+        self.is_stale = True
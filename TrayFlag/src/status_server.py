@@ -0,0 +1,302 @@
+# File: src/status_server.py
+
+import hmac
+import json
+import math
+import time
+import asyncio
+import threading
+import logging
+from urllib.parse import urlsplit, parse_qs
+
+import ip_fetcher
+import tracing
+import app_logging
+import resource_monitor
+
+log = logging.getLogger(__name__)
+
+API_PORT = 47600
+MAX_HEADER_BYTES = 8192
+KEEPALIVE_SECONDS = 15
+MAX_HISTORY_LIMIT = 10000
+MAX_MEMORY_LINES = 200
+
+def collect_status(state, update_handler, scheduler, extra=None):
+    """
+    Gathers the status document and the metrics on the Qt thread, where the
+    state and the scheduler live. The server thread only ever sees the result.
+    """
+    wall_now = time.time()
+    scheduler_stats = scheduler.stats()
+    status = {
+        'location': state.current_location_data,
+        'external_ip': state.last_known_external_ip or None,
+        'stale': state.is_stale,
+        'idle': state.is_in_idle_mode,
+        'last_update_time': state.last_update_time or None,
+        'history': list(state.location_history),
+        'poll_policy': state.poll_policy_info,
+        'scheduler': {
+            'wakeups': scheduler_stats['wakeups'],
+            'tasks': {name: {'next_run_at': round(wall_now + task['next_in_s'], 1), 'period_s': task['period_s']}
+                      for name, task in scheduler_stats['tasks'].items()},
+        },
+        'published_at': wall_now,
+    }
+
+    metrics = [
+        ("trayflag_polls_total", "counter", "IP checks finished", update_handler.polls),
+        ("trayflag_poll_failures_total", "counter", "IP checks without an external IP", update_handler.poll_failures),
+        ("trayflag_ip_changes_total", "counter", "External IP changes seen", update_handler.ip_changes),
+        ("trayflag_idle_mode", "gauge", "1 while in idle (power-saving) mode", int(state.is_in_idle_mode)),
+        ("trayflag_last_update_timestamp_seconds", "gauge", "Time of the last location update", state.last_update_time),
+        ("trayflag_scheduler_wakeups_total", "counter", "Timer wakeups of the scheduler", scheduler_stats['wakeups']),
+    ]
+    engine = update_handler.engine.stats()
+    metrics += [
+        ("trayflag_checks_coalesced_total", "counter", "Check requests joined to one in flight", engine['coalesced']),
+        ("trayflag_checks_dropped_total", "counter", "Checks cancelled or overtaken", engine['dropped']),
+        ("trayflag_checks_timed_out_total", "counter", "Checks given up after the engine timeout", engine['timed_out']),
+    ]
+    providers = ip_fetcher.provider_stats.snapshot()
+    for name, kind, help_text, key in (
+            ("trayflag_provider_attempts_total", "counter", "Requests per IP provider", 'attempts'),
+            ("trayflag_provider_successes_total", "counter", "Successful requests per IP provider", 'successes'),
+            ("trayflag_provider_wins_total", "counter", "Checks answered by each IP provider", 'wins'),
+            ("trayflag_provider_latency_ms", "gauge", "Average latency of successful requests", 'avg_latency_ms')):
+        metrics.append((name, kind, help_text, {(('provider', p),): entry[key] for p, entry in providers.items()
+                                                if entry[key] is not None}))
+    if update_handler.geo_cache:
+        cache = update_handler.geo_cache.stats()
+        metrics += [
+            ("trayflag_geo_cache_hits_total", "counter", "Geo lookups answered from the cache", cache['hits']),
+            ("trayflag_geo_cache_misses_total", "counter", "Geo lookups that missed the cache", cache['misses']),
+            ("trayflag_geo_cache_entries", "gauge", "Entries in the geo cache", cache['size']),
+        ]
+    logs = app_logging.stats()
+    metrics += [
+        ("trayflag_log_dropped_total", "counter", "Log records dropped because the log queue was full", logs['dropped']),
+        ("trayflag_log_suppressed_total", "counter", "Repeated log messages suppressed", logs['suppressed']),
+    ]
+    resources = resource_monitor.last_sample()
+    if resources:
+        threads = {(('kind', kind),): resources[key] for kind, key in (('python', 'python_threads'), ('os', 'os_threads'))
+                   if resources[key] is not None}
+        metrics += [
+            ("trayflag_qobjects", "gauge", "Live QObjects at the last resource sample", resources['qobjects']),
+            ("trayflag_threads", "gauge", "Threads at the last resource sample", threads),
+        ]
+        if resources['widgets'] is not None:
+            metrics.append(("trayflag_widgets", "gauge", "Live widgets at the last resource sample", resources['widgets']))
+        if resources['rss_kb'] is not None:
+            metrics.append(("trayflag_resident_memory_kb", "gauge", "Resident memory at the last resource sample",
+                            resources['rss_kb']))
+    if tracing.is_enabled():
+        spans = tracing.summary()
+        metrics.append(("trayflag_span_duration_ms", "gauge", "Pipeline stage durations over the trace buffer",
+                        {(('span', name), ('quantile', q)): stats[f'p{q[2:]}_ms']
+                         for name, stats in spans.items() for q in ("0.50", "0.95", "0.99")}))
+    metrics += extra or []
+    return status, metrics
+
+def render_metrics(metrics):
+    """Prometheus text exposition of (name, type, help, value or {labels: value}) tuples."""
+    lines = []
+    for name, kind, help_text, value in metrics:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        samples = value.items() if isinstance(value, dict) else [((), value)]
+        for labels, sample in samples:
+            label_text = ",".join(f'{key}="{val}"' for key, val in labels)
+            lines.append(f"{name}{{{label_text}}} {sample}" if label_text else f"{name} {sample}")
+    return "\n".join(lines) + "\n"
+
+
+class StatusServer:
+    """
+    Opt-in, token-protected HTTP/JSON endpoint on 127.0.0.1:
+
+        GET /status   current location, history view, last update, scheduler state
+        GET /history  ?limit=N (1..MAX_HISTORY_LIMIT) and/or ?since=SECONDS, from the
+                      history store; at most MAX_HISTORY_LIMIT entries, the newest
+        GET /metrics  Prometheus text format
+        GET /memory   ?top=N allocation growth since the previous call ([debug] tracemalloc)
+                      and the last resource sample
+
+    Requests are served by an asyncio loop on its own thread (or on the
+    AsyncCore's loop), never on the Qt thread. The Qt thread calls publish()
+    after every check; the documents are rendered once there and every scrape
+    just writes the prepared bytes, so scraping costs almost no CPU.
+    """
+    def __init__(self, token, port=API_PORT, host="127.0.0.1", history=None, core=None):
+        if not token:
+            raise ValueError("the status API needs a token")
+        self.token = token.encode("utf-8")
+        self.host = host
+        self.port = port
+        self.history = history
+        self._core = core
+        self._loop = core.loop if core else None
+        self._server = None
+        self._thread = None
+        self._started = threading.Event()
+        self._connections = set() # handler tasks, cancelled by stop()
+        self._status_body = b"{}"
+        self._metrics_body = b""
+        self.requests = 0
+        self.rejected = 0
+
+    def start(self):
+        if self._core:
+            asyncio.run_coroutine_threadsafe(self._serve(), self._loop).result(5)
+        else:
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run, name="status-api", daemon=True)
+            self._thread.start()
+            self._started.wait(5)
+        if self._server is None:
+            raise OSError(f"could not listen on {self.host}:{self.port}")
+        self.port = self._server.sockets[0].getsockname()[1]
+        log.info("Status API listening on http://%s:%s", self.host, self.port)
+        return self
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._serve())
+        except OSError as e:
+            log.error("Status API could not start: %s", e)
+            return
+        finally:
+            self._started.set()
+        self._loop.run_forever()
+
+    async def _serve(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+
+    def publish(self, status, metrics):
+        """Qt thread: replaces the served documents (a reference swap, no lock needed)."""
+        self._status_body = json.dumps(status, ensure_ascii=False).encode("utf-8")
+        self._metrics_body = render_metrics(metrics).encode("utf-8")
+
+    def stop(self):
+        if self._loop is None or self._server is None:
+            return
+        async def close():
+            self._server.close()
+            for task in list(self._connections):
+                task.cancel()
+            await asyncio.sleep(0) # let the cancelled handlers close their sockets
+        try:
+            asyncio.run_coroutine_threadsafe(close(), self._loop).result(2)
+        except Exception as e:
+            log.warning("Status API did not close cleanly: %s", e)
+        if self._thread:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(2)
+
+    async def _handle(self, reader, writer):
+        """One connection: HTTP/1.1 GET requests with keep-alive."""
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEPALIVE_SECONDS)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    return
+                if len(head) > MAX_HEADER_BYTES:
+                    return
+                keep_alive = await self._respond(head, writer)
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except ConnectionError:
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def _respond(self, head, writer):
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ")
+        except ValueError:
+            self._send(writer, 400, b"bad request\n", "text/plain", False)
+            return False
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            if name:
+                headers[name.strip().lower()] = value.strip()
+        keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+
+        if method != "GET":
+            self._send(writer, 405, b"only GET\n", "text/plain", keep_alive)
+            return keep_alive
+        if not self._authorized(headers, query):
+            self.rejected += 1
+            self._send(writer, 401, b"missing or wrong token\n", "text/plain", keep_alive)
+            return keep_alive
+        self.requests += 1
+        if url.path == "/status":
+            self._send(writer, 200, self._status_body, "application/json", keep_alive)
+        elif url.path == "/metrics":
+            own = (f"# TYPE trayflag_api_requests_total counter\ntrayflag_api_requests_total {self.requests}\n"
+                   f"# TYPE trayflag_api_rejected_total counter\ntrayflag_api_rejected_total {self.rejected}\n")
+            self._send(writer, 200, self._metrics_body + own.encode("ascii"), "text/plain; version=0.0.4", keep_alive)
+        elif url.path == "/history":
+            self._send(writer, *(await self._history(query)), keep_alive)
+        elif url.path == "/memory":
+            self._send(writer, *self._memory(query), keep_alive)
+        else:
+            self._send(writer, 404, b"not found\n", "text/plain", keep_alive)
+        return keep_alive
+
+    def _authorized(self, headers, query):
+        """Bearer token in the Authorization header, or ?token= for quick manual checks."""
+        supplied = headers.get("authorization", "")
+        supplied = supplied[7:] if supplied.lower().startswith("bearer ") else query.get("token", [""])[0]
+        return hmac.compare_digest(supplied.encode("utf-8"), self.token)
+
+    async def _history(self, query):
+        """The SQLite query runs on the executor: a large history must not stall the other connections."""
+        if self.history is None:
+            return 404, b"history is disabled\n", "text/plain"
+        try:
+            limit = max(1, min(MAX_HISTORY_LIMIT, int(query["limit"][0]))) if "limit" in query else None
+            since = float(query["since"][0]) if "since" in query else None
+            if since is not None and not (math.isfinite(since) and since >= 0):
+                raise ValueError(since)
+        except ValueError:
+            return 400, b"bad limit or since\n", "text/plain"
+        loop = asyncio.get_running_loop()
+        if since is not None:
+            query_history = lambda: self.history.between(time.time() - since, limit=limit or MAX_HISTORY_LIMIT)
+        else:
+            query_history = lambda: self.history.recent(limit or 100)
+        entries = await loop.run_in_executor(None, query_history)
+        return 200, json.dumps(entries, ensure_ascii=False).encode("utf-8"), "application/json"
+
+    def _memory(self, query):
+        """Takes a tracemalloc snapshot on the server thread: slow (~0.1-1 s), but only on demand."""
+        try:
+            top = min(MAX_MEMORY_LINES, int(query.get("top", ["20"])[0]))
+        except ValueError:
+            return 400, b"bad top\n", "text/plain"
+        body = {'tracemalloc': resource_monitor.memory_diff(top), 'resources': resource_monitor.last_sample()}
+        return 200, json.dumps(body).encode("utf-8"), "application/json"
+
+    def _send(self, writer, status, body, content_type, keep_alive):
+        reason = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+                  405: "Method Not Allowed"}[status]
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+            f"Cache-Control: no-store\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("ascii")
+            + body)
+
+    def stats(self):
+        return {'requests': self.requests, 'rejected': self.rejected}
@@ -0,0 +1,140 @@
+# File: src/tracing.py
+
+"""
+Timing spans for the update pipeline ([debug] tracing=true in the ini).
+
+    with tracing.span("ip.provider", provider="ipify"):
+        ...
+
+Finished spans (name, monotonic start, duration, thread, args) go into a
+ring buffer of the last `capacity` spans. summary() gives p50/p95/p99 per
+span name; export_chrome_trace() writes the buffer as a Chrome trace
+(chrome://tracing, Perfetto). Spans that start on one thread and end on
+another (a signal crossing to the GUI thread) use now() and record().
+
+Disabled (the default), span() returns a shared no-op object and record()
+returns at once; bench_tracing.py measures what that costs.
+"""
+
+import os
+import json
+import time
+import threading
+import logging
+from collections import deque
+
+log = logging.getLogger(__name__)
+
+_enabled = False
+_spans = deque(maxlen=4096) # (name, start_ns, duration_ns, thread id, args)
+_thread_names = {} # thread id -> name, for the trace viewer
+_clock = time.perf_counter_ns
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = _clock()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        record(self.name, self.start, **self.args)
+        return False
+
+
+def enable(capacity=4096):
+    global _enabled, _spans
+    if _spans.maxlen != capacity:
+        _spans = deque(_spans, maxlen=max(1, capacity))
+    _enabled = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def is_enabled():
+    return _enabled
+
+def span(name, **args):
+    """Context manager timing one stage. A no-op while tracing is disabled."""
+    if not _enabled:
+        return _NOOP
+    return _Span(name, args)
+
+def now():
+    """Start timestamp for record(); 0 while tracing is disabled."""
+    return _clock() if _enabled else 0
+
+def record(name, start_ns, **args):
+    """Records a span that started at `start_ns` (from now()) and ends now, on any thread."""
+    if not _enabled or not start_ns:
+        return
+    end = _clock()
+    thread = threading.current_thread()
+    _thread_names[thread.ident] = thread.name
+    # deque.append is atomic, so worker threads need no lock
+    _spans.append((name, start_ns, end - start_ns, thread.ident, args))
+
+def clear():
+    _spans.clear()
+
+def _percentile(ordered, pct):
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+def summary():
+    """{name: {count, p50_ms, p95_ms, p99_ms, max_ms}} over the spans in the buffer."""
+    durations = {}
+    for name, _, duration, _, _ in list(_spans):
+        durations.setdefault(name, []).append(duration)
+    result = {}
+    for name, values in durations.items():
+        values.sort()
+        result[name] = {
+            'count': len(values),
+            'p50_ms': round(_percentile(values, 50) / 1e6, 3),
+            'p95_ms': round(_percentile(values, 95) / 1e6, 3),
+            'p99_ms': round(_percentile(values, 99) / 1e6, 3),
+            'max_ms': round(values[-1] / 1e6, 3),
+        }
+    return result
+
+def log_summary():
+    for name, stats in sorted(summary().items()):
+        log.info("%s: n=%s p50 %s ms, p95 %s ms, p99 %s ms, max %s ms", name, stats['count'],
+                 stats['p50_ms'], stats['p95_ms'], stats['p99_ms'], stats['max_ms'])
+
+def export_chrome_trace(path):
+    """Writes the buffer in the Chrome trace event format. Returns the number of spans written."""
+    pid = os.getpid()
+    spans = list(_spans)
+    events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+              for tid, name in list(_thread_names.items())]
+    for name, start, duration, tid, args in spans:
+        events.append({'name': name, 'ph': 'X', 'pid': pid, 'tid': tid,
+                       'ts': start / 1000, 'dur': duration / 1000, 'args': args})
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, default=str)
+    os.replace(tmp_path, path)
+    log.info("Wrote %s spans to %s", len(spans), path)
+    return len(spans)
@@ -3,8 +3,11 @@
 import os
 import json
 import locale
+import logging
 from utils import resource_path
 
+log = logging.getLogger(__name__)
+
 class Translator:
     def __init__(self, i18n_dir_path, default_lang="en"):
         self.i18n_dir = i18n_dir_path
@@ -16,7 +19,7 @@ class Translator:
     def _find_languages(self):
         langs = {}
         if not os.path.isdir(self.i18n_dir):
-            print(f"Warning: i18n directory not found at {self.i18n_dir}")
+            log.warning("i18n directory not found at %s", self.i18n_dir)
             return langs
         for filename in os.listdir(self.i18n_dir):
             if filename.endswith(".json"):
@@ -30,7 +33,7 @@ class Translator:
         Prints a message only if this is a reload.
         """
         if is_reload:
-            print(f"Language changed to '{lang_code}'. Reloading translations...")
+            log.info("Language changed to '%s'. Reloading translations...", lang_code)
         
         return self._load_language_internal(lang_code)
 
@@ -44,7 +47,7 @@ class Translator:
             with open(filepath, 'r', encoding='utf-8') as f:
                 self.translations = json.load(f)
         except Exception as e:
-            print(f"Failed to load language '{self.current_lang}': {e}. Loading default.")
+            log.warning("Failed to load language '%s': %s. Loading default.", self.current_lang, e)
             if self.current_lang != self.default_lang:
                 self._load_language_internal(self.default_lang)
 
@@ -4,8 +4,13 @@ from PySide6 import QtWidgets, QtGui
 from functools import partial
 from utils import clean_isp_name
 from constants import APP_NAME
+from state_manager import HISTORY_VIEW_SIZE
 
 class TrayMenuManager:
+    """
+    Builds the tray menu once; update_menu_content() only changes texts and
+    visibility. Every action is a child of the menu, so dispose() frees them all.
+    """
     def __init__(self, app_instance):
         self.app = app_instance
         self.tr = self.app.tr
@@ -14,42 +19,59 @@ class TrayMenuManager:
 
     def create_menu(self):
             # Now the information items are created as clickable right away
-            self.ip_action = QtGui.QAction(self.tr.get("menu_ip_wait"))
+            self.ip_action = QtGui.QAction(self.tr.get("menu_ip_wait"), self.menu)
             self.ip_action.triggered.connect(lambda: self.app.copy_text_to_clipboard(self.app.state.current_location_data.get('ip', '')))
             self.ip_action.setEnabled(False)
 
-            self.city_action = QtGui.QAction(self.tr.get("menu_city_wait"))
+            self.city_action = QtGui.QAction(self.tr.get("menu_city_wait"), self.menu)
             self.city_action.triggered.connect(lambda: self.app.copy_text_to_clipboard(self.app.state.current_location_data.get('city', '')))
             self.city_action.setEnabled(False)
 
-            self.isp_action = QtGui.QAction(self.tr.get("menu_isp_wait"))
+            self.isp_action = QtGui.QAction(self.tr.get("menu_isp_wait"), self.menu)
             self.isp_action.triggered.connect(lambda: self.app.copy_text_to_clipboard(clean_isp_name(self.app.state.current_location_data.get('isp', ''))))
             self.isp_action.setEnabled(False)            
 
+            # Effective polling interval, refreshed whenever the menu opens; a debugging aid ([debug] tracing)
+            self.poll_action = None
+            if self.app.config.tracing:
+                self.poll_action = QtGui.QAction(self.tr.get("menu_poll_interval", policy="..."), self.menu)
+                self.poll_action.setEnabled(False)
+                self.menu.aboutToShow.connect(self.update_poll_info)
+
             # The remaining menu items stay unchanged
-            self.force_update_action = QtGui.QAction(self.tr.get("menu_update_now")); self.force_update_action.triggered.connect(lambda: self.app.update_handler.update_location_icon(is_forced_by_user=True))
-            self.speedtest_action = QtGui.QAction(self.tr.get("menu_speedtest_browser"))
+            self.force_update_action = QtGui.QAction(self.tr.get("menu_update_now"), self.menu); self.force_update_action.triggered.connect(lambda: self.app.update_handler.update_location_icon(is_forced_by_user=True))
+            self.speedtest_action = QtGui.QAction(self.tr.get("menu_speedtest_browser"), self.menu)
             self.speedtest_action.triggered.connect(self.app.open_speedtest_website)
-            self.dns_leak_action = QtGui.QAction(self.tr.get("menu_dns_leak_test"))
+            self.dns_leak_action = QtGui.QAction(self.tr.get("menu_dns_leak_test"), self.menu)
             self.dns_leak_action.triggered.connect(self.app.open_dns_leak_test_website)
-            self.weblink_action = QtGui.QAction(self.tr.get("menu_weblink")); self.weblink_action.triggered.connect(self.app.open_weblink); self.weblink_action.setEnabled(False)
-            self.history_menu = QtWidgets.QMenu(self.tr.get("menu_history"))
-            self.history_placeholder_action = QtGui.QAction(self.tr.get("menu_history_empty")); self.history_placeholder_action.setEnabled(False)
+            self.weblink_action = QtGui.QAction(self.tr.get("menu_weblink"), self.menu); self.weblink_action.triggered.connect(self.app.open_weblink); self.weblink_action.setEnabled(False)
+            self.history_menu = QtWidgets.QMenu(self.tr.get("menu_history"), self.menu)
+            self.history_placeholder_action = QtGui.QAction(self.tr.get("menu_history_empty"), self.menu); self.history_placeholder_action.setEnabled(False)
             self.history_menu.addAction(self.history_placeholder_action)
+            # A fixed pool of history entries, relabelled on every update instead of recreated
+            self.history_ips = [None] * HISTORY_VIEW_SIZE
+            self.history_actions = []
+            for index in range(HISTORY_VIEW_SIZE):
+                action = QtGui.QAction(self.menu)
+                action.setVisible(False)
+                action.triggered.connect(partial(self._copy_history_entry, index))
+                self.history_menu.addAction(action)
+                self.history_actions.append(action)
 
-            self.update_action = QtGui.QAction(self.tr.get("menu_check_for_updates"))
+            self.update_action = QtGui.QAction(self.tr.get("menu_check_for_updates"), self.menu)
             self.update_action.triggered.connect(self.app.run_updater)
 
-            self.settings_action = QtGui.QAction(self.tr.get("menu_settings")); self.settings_action.triggered.connect(self.app.open_settings_dialog)
-            self.about_action = QtGui.QAction(self.tr.get("menu_about", app_name=APP_NAME)); self.about_action.triggered.connect(self.app.open_about_dialog)
-            self.exit_action = QtGui.QAction(self.tr.get("menu_exit")); self.exit_action.triggered.connect(QtWidgets.QApplication.quit)
+            self.settings_action = QtGui.QAction(self.tr.get("menu_settings"), self.menu); self.settings_action.triggered.connect(self.app.open_settings_dialog)
+            self.about_action = QtGui.QAction(self.tr.get("menu_about", app_name=APP_NAME), self.menu); self.about_action.triggered.connect(self.app.open_about_dialog)
+            self.exit_action = QtGui.QAction(self.tr.get("menu_exit"), self.menu); self.exit_action.triggered.connect(QtWidgets.QApplication.quit)
             
             actions = [
                 # Group 1: Information
                 self.ip_action, self.city_action, self.isp_action,
+                *([self.poll_action] if self.poll_action else []),
                 None,
                 # Group 2: IP Actions
-                #self.history_menu,
+                self.history_menu,
                 self.force_update_action,
                 None,
                 # Group 3: Diagnostic Tools
@@ -79,13 +101,26 @@ class TrayMenuManager:
             self.city_action.setEnabled(has_ip)
             self.isp_action.setEnabled(has_ip)
 
-            self.history_menu.clear()
-            if not self.app.state.location_history:
-                self.history_menu.addAction(self.history_placeholder_action)
-            else:
-                for entry in reversed(self.app.state.location_history):
-                    hist_ip, hist_isp = entry.get('ip', 'N/A'), clean_isp_name(entry.get('isp', 'N/A'))
-                    text = f"{hist_ip} ({entry.get('country_code', '??').upper()}, {entry.get('city', 'N/A')}, {hist_isp})"
-                    action = QtGui.QAction(text, self.menu)
-                    action.triggered.connect(partial(self.app.copy_historical_ip, hist_ip))
-                    self.history_menu.addAction(action)
+            entries = list(reversed(self.app.state.location_history))[:len(self.history_actions)]
+            self.history_placeholder_action.setVisible(not entries)
+            for index, action in enumerate(self.history_actions):
+                if index >= len(entries):
+                    self.history_ips[index] = None
+                    action.setVisible(False)
+                    continue
+                entry = entries[index]
+                hist_ip, hist_isp = entry.get('ip', 'N/A'), clean_isp_name(entry.get('isp', 'N/A'))
+                self.history_ips[index] = hist_ip
+                action.setText(f"{hist_ip} ({entry.get('country_code', '??').upper()}, {entry.get('city', 'N/A')}, {hist_isp})")
+                action.setVisible(True)
+
+    def update_poll_info(self):
+        self.poll_action.setText(self.tr.get("menu_poll_interval", policy=self.app.state.poll_policy_info or "..."))
+
+    def _copy_history_entry(self, index, checked=False):
+        if self.history_ips[index]:
+            self.app.copy_historical_ip(self.history_ips[index])
+
+    def dispose(self):
+        """Frees the menu with its actions (their connections hold references back to this manager)."""
+        self.menu.deleteLater()
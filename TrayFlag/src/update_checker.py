@@ -0,0 +1,176 @@
+# File: src/update_checker.py
+
+import os
+import re
+import json
+import time
+import threading
+import logging
+from email.utils import parsedate_to_datetime
+import ip_providers
+from utils import resource_path
+from constants import APP_NAME, UPDATE_URL
+
+log = logging.getLogger(__name__)
+
+UPDATE_STATE_PATH = resource_path(f"{APP_NAME}_update.json")
+
+def parse_version_file(content):
+    """Returns (version, link) from the VER:/LINK: lines, or (None, None)."""
+    latest_version = None
+    download_link = None
+    for line in content.splitlines():
+        if line.startswith("VER:"):
+            latest_version = line.replace("VER:", "").strip()
+        elif line.startswith("LINK:"):
+            download_link = line.replace("LINK:", "").strip()
+    if not latest_version or not download_link:
+        return None, None
+    return latest_version, download_link
+
+def parse_version(v_str):
+    """"1.10.0" -> (1, 10, 0); None for anything else ("1.10.0-beta", "", None)."""
+    try:
+        return tuple(map(int, v_str.strip().split(".")))
+    except (AttributeError, ValueError):
+        return None
+
+def is_newer(latest_version, current_version):
+    """Simple comparison of dotted versions: "1.10.0" > "1.9.0". False if either cannot be parsed."""
+    latest, current = parse_version(latest_version), parse_version(current_version)
+    if latest is None or current is None:
+        return False
+    return latest > current
+
+def freshness_lifetime(headers, default_max_age):
+    """
+    Seconds the response may be reused without asking the server again,
+    from Cache-Control (max-age, no-cache, no-store) or Expires.
+    """
+    cache_control = headers.get("Cache-Control", "").lower()
+    if "no-store" in cache_control or "no-cache" in cache_control:
+        return 0
+    match = re.search(r"max-age\s*=\s*(\d+)", cache_control)
+    if match:
+        return int(match.group(1))
+    expires = headers.get("Expires")
+    if expires:
+        try:
+            return max(0, int(parsedate_to_datetime(expires).timestamp() - time.time()))
+        except (TypeError, ValueError):
+            return 0
+    return default_max_age
+
+
+class UpdateChecker:
+    """
+    Fetches the version file with conditional requests.
+
+    ETag, Last-Modified, the freshness lifetime and the parsed answer are
+    kept in a small JSON file next to the .ini. While the stored answer is
+    fresh (Cache-Control / Expires) no request is made at all; after that
+    the server is asked with If-None-Match / If-Modified-Since and a 304
+    reuses the stored answer.
+    """
+    def __init__(self, url=UPDATE_URL, state_path=UPDATE_STATE_PATH, timeout=15, default_max_age=3600):
+        self.url = url
+        self.state_path = state_path
+        self.timeout = timeout
+        # Used when the server sends no caching headers
+        self.default_max_age = default_max_age
+        self._lock = threading.Lock()
+        self.requests_made = 0
+        self.not_modified = 0
+        self.served_from_cache = 0
+        self._state = self._load()
+
+    def _load(self):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            # Validators of a different URL are useless, and so is an answer we cannot compare
+            if state.get("url") != self.url or parse_version(state.get("version")) is None:
+                return {}
+            return state
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def _save(self):
+        # Write-then-rename, so a crash never leaves a half-written file
+        tmp_path = f"{self.state_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._state, f, indent=2)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            log.warning("Could not save update check state: %s", e)
+
+    def is_fresh(self, now=None):
+        state = self._state
+        if not state.get("version"):
+            return False
+        now = time.time() if now is None else now
+        return now - state.get("fetched_at", 0) < state.get("max_age", 0)
+
+    def check(self):
+        """
+        Returns (version, link) of the latest release, or (None, None) if it
+        could not be determined. Raises nothing; errors are logged.
+        """
+        with self._lock:
+            if self.is_fresh():
+                self.served_from_cache += 1
+                log.debug("Update check: cached answer is still fresh, no request made.")
+                return self._state["version"], self._state["link"]
+            return self._fetch()
+
+    def _fetch(self):
+        headers = {"Accept": "text/plain, */*"}
+        if self._state.get("version"):
+            if self._state.get("etag"):
+                headers["If-None-Match"] = self._state["etag"]
+            if self._state.get("last_modified"):
+                headers["If-Modified-Since"] = self._state["last_modified"]
+        try:
+            self.requests_made += 1
+            response = ip_providers.get_session().get(self.url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304:
+                self.not_modified += 1
+                log.debug("Update check: version file not modified (304).")
+                self._remember(response, self._state["version"], self._state["link"])
+                return self._state["version"], self._state["link"]
+            response.raise_for_status() # Will raise an error if the status is not 200 OK
+        except Exception as e:
+            log.debug("Update check failed: %s", e)
+            return None, None
+
+        version, link = parse_version_file(response.text)
+        if not version:
+            log.debug("Update check: Failed to parse version file.")
+            return None, None
+        if parse_version(version) is None:
+            # Not cached: a fixed file is picked up by the next check instead of after max-age
+            log.debug("Update check: unrecognized version %r.", version)
+            return None, None
+        self._remember(response, version, link)
+        return version, link
+
+    def _remember(self, response, version, link):
+        self._state = {
+            "url": self.url,
+            # A 304 may omit validators; keep the ones we sent
+            "etag": response.headers.get("ETag") or self._state.get("etag", ""),
+            "last_modified": response.headers.get("Last-Modified") or self._state.get("last_modified", ""),
+            "fetched_at": time.time(),
+            "max_age": freshness_lifetime(response.headers, self.default_max_age),
+            "version": version,
+            "link": link,
+        }
+        self._save()
+
+    def stats(self):
+        return {
+            'requests': self.requests_made,
+            'not_modified': self.not_modified,
+            'served_from_cache': self.served_from_cache,
+        }
@@ -0,0 +1,185 @@
+# File: src/update_engine.py
+
+import queue
+import threading
+import logging
+
+log = logging.getLogger(__name__)
+
+# A check on the async core that has not finished by then is given up (the providers time out far sooner)
+CORE_CHECK_TIMEOUT = 120
+
+class UpdateJob:
+    """One location check. `is_forced` may be upgraded while it runs (a click joins a poll)."""
+    def __init__(self, generation, is_forced):
+        self.generation = generation
+        self.is_forced = is_forced
+        self.cancelled = False
+        # False once the check has decided what to emit; a forced request can no longer join it
+        self.joinable = True
+
+
+class UpdateEngine:
+    """
+    Single-flight executor for location checks on a small fixed pool of
+    daemon workers.
+
+    - A request that arrives while a check is in flight joins it instead of
+      starting another one (a forced request upgrades the running check, as
+      long as that check has not yet decided what to emit).
+    - A `restart` request (the network just changed) cancels the running
+      check and starts a fresh one; the stale check's results are dropped.
+    - Results are delivered in order: nothing older than the last delivered
+      check is ever emitted.
+    - On the async core, a check still running after CORE_CHECK_TIMEOUT is
+      given up: it is cancelled like a restarted one and `on_timeout(job)`
+      is called on the Qt thread. Its executor thread cannot be interrupted
+      and finishes on its own.
+    """
+    def __init__(self, run_job, max_workers=2, core=None, on_timeout=None):
+        self._run_job = run_job
+        self._on_timeout = on_timeout
+        # With an AsyncCore the checks run as coroutines on its fixed executor
+        # instead of on our own worker threads
+        self._core = core
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._current = None
+        self._generation = 0
+        self._delivered_generation = 0
+        self.submitted = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.completed = 0
+        self.timed_out = 0
+        self.in_flight = 0
+        self.closed = False
+        if core is None:
+            for i in range(max(1, max_workers)):
+                threading.Thread(target=self._worker, name=f"ip-update-{i}", daemon=True).start()
+
+    def submit(self, is_forced=False, restart=False):
+        """Requests a check. Returns the job that will answer it."""
+        with self._lock:
+            if self.closed:
+                return None
+            self.submitted += 1
+            current = self._current
+            if current is not None and not restart and (current.joinable or not is_forced):
+                current.is_forced = current.is_forced or is_forced
+                self.coalesced += 1
+                return current
+            if current is not None and restart:
+                current.cancelled = True
+                self.dropped += 1
+                is_forced = is_forced or current.is_forced
+            self._generation += 1
+            job = UpdateJob(self._generation, is_forced)
+            self._current = job
+            self.in_flight += 1
+            if self._core is not None:
+                # The stale job sees `cancelled` and skips or drops its work
+                self._core.submit(
+                    self._core.run_blocking(self._process, job), timeout=CORE_CHECK_TIMEOUT,
+                    on_done=lambda result, error: self._on_core_done(job, error),
+                    name=f"location check #{job.generation}")
+                return job
+        self._queue.put(job)
+        return job
+
+    def seal(self, job):
+        """Called by the check before it decides what to emit. Returns the final is_forced."""
+        with self._lock:
+            job.joinable = False
+            return job.is_forced
+
+    def deliver(self, job, emit):
+        """Calls `emit()` only if `job` is still current and not older than what was delivered."""
+        with self._lock:
+            if not self._claim(job):
+                return False
+            emit()
+            return True
+
+    def claim(self, job):
+        """
+        deliver() for a single delivering thread (the GUI thread): True if `job`
+        may deliver now, which the caller then does outside the lock, so the
+        slots it runs may submit the next check.
+        """
+        with self._lock:
+            return self._claim(job)
+
+    def _claim(self, job):
+        if job.cancelled:
+            return False
+        if job.generation < self._delivered_generation:
+            self.dropped += 1 # overtaken by a newer check
+            return False
+        self._delivered_generation = job.generation
+        return True
+
+    def release(self, job):
+        """
+        Called by the check right before it reports that it finished: a request
+        made in response to that report starts a new check instead of joining
+        this one, which has nothing left to deliver.
+        """
+        with self._lock:
+            if self._current is job:
+                self._current = None
+
+    def shutdown(self):
+        """
+        Stops accepting checks and cancels the one in flight, so nothing is
+        emitted after the application has started to exit (a worker still
+        blocked on the network finishes on its own and is dropped).
+        """
+        with self._lock:
+            self.closed = True
+            if self._current is not None:
+                self._current.cancelled = True
+                self._current = None
+
+    def _on_core_done(self, job, error):
+        """Qt thread, after a check on the async core ended or timed out."""
+        if not isinstance(error, TimeoutError):
+            return
+        with self._lock:
+            if job.cancelled:
+                return # already replaced by a newer check
+            job.cancelled = True
+            self.timed_out += 1
+            if self._current is job:
+                self._current = None
+        log.warning("Location check #%s gave no answer within %ss; dropped", job.generation, CORE_CHECK_TIMEOUT)
+        if self._on_timeout:
+            self._on_timeout(job)
+
+    def _worker(self):
+        while True:
+            self._process(self._queue.get())
+
+    def _process(self, job):
+        try:
+            if not job.cancelled:
+                self._run_job(job)
+        except Exception as e:
+            log.exception("Location update failed: %s", e)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+                if self._current is job:
+                    self._current = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'in_flight': self.in_flight,
+                'submitted': self.submitted,
+                'coalesced': self.coalesced,
+                'dropped': self.dropped,
+                'completed': self.completed,
+                'timed_out': self.timed_out,
+            }
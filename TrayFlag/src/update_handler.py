@@ -1,107 +1,289 @@
 # File: src/update_handler.py
 
-import random
+import time
 import threading
+import logging
 from PySide6 import QtCore
 
+import ip_fetcher
 from ip_fetcher import get_ip_data, get_full_data
+from ip_providers import make_full_data
 import idle_detector
+import net_watcher
+from geo_cache import GeoCache, is_cacheable
+from polling_policy import create_policy
+from update_engine import UpdateEngine
+import tracing
+
+log = logging.getLogger(__name__)
 
 class UpdateHandler(QtCore.QObject):
     # Signal that will send data to the main thread
     ipDataReceived = QtCore.Signal(object, bool) # (ip_data, is_forced)
+    # Early "IP changed" signal with a cached or locally resolved country, sent before the full lookup
+    ipChanged = QtCore.Signal(object, bool) # (preliminary ip_data, is_forced)
     enteredIdleMode = QtCore.Signal()
+    # Emitted from the network watcher thread; delivered to the GUI thread as a queued call
+    networkChanged = QtCore.Signal(str)
+    # Carries one callable per finished check from the worker to the GUI thread (see _post_result)
+    _resultPosted = QtCore.Signal(object)
+    # Emitted from a push idle backend's thread when input is seen during idle mode
+    userActivity = QtCore.Signal()
+    # Emitted from the loader thread with the idle backend (its imports are slow on Windows)
+    idleBackendReady = QtCore.Signal(object)
 
-    def __init__(self, config, state):
+    def __init__(self, config, state, scheduler, core=None):
         super().__init__()
         self.config = config
         self.state = state
+        ip_fetcher.configure(config)
+        # IP -> {'started': monotonic time the change was detected, 'first_ms': ...} for timing logs
+        self._change_timings = {}
+        # Counters for the status API
+        self.polls = 0
+        self.poll_failures = 0
+        self.ip_changes = 0
+        # tracing.now() when the last result left the worker; the GUI slot records the delivery span
+        self.emitted_at = 0
+        # Plain callables(success, ip_changed), called on the GUI thread after every check
+        self.poll_listeners = []
+
+        self.geo_cache = None
+        if config.cache_enabled:
+            try:
+                self.geo_cache = GeoCache(ttl_seconds=config.cache_ttl_hours * 3600, max_entries=config.cache_max_entries)
+                self.geo_cache.purge_expired()
+            except Exception as e:
+                log.warning("Geo cache disabled: %s", e)
         
-        # Main timer for checking IP
-        self.main_timer = QtCore.QTimer()
-        self.main_timer.timeout.connect(self.main_update_loop)
-        
-        # "Pulse timer" for checking idleness
-        self.idle_check_timer = QtCore.QTimer()
-        self.idle_check_timer.setInterval(1000)
-        self.idle_check_timer.timeout.connect(self.check_for_wakeup)
-
-    def start(self):
-        """Runs the main update loop and "pulse" timer."""
-        self.idle_check_timer.start()
-        # Run the main update loop after 200ms
-        QtCore.QTimer.singleShot(200, self.main_update_loop)
-
-    def check_for_wakeup(self):
-        """Checks if the user has woken up from idle mode."""
-        if not self.state.is_in_idle_mode:
+        # IP checks and idle checks are tasks of the shared scheduler.
+        # The next IP check is scheduled only after the previous one finished,
+        # so slow checks never overlap.
+        self.scheduler = scheduler
+        self.policy = create_policy(config)
+        self._resultPosted.connect(self._run_posted)
+        # Bounded, single-flight worker pool for the checks themselves
+        self.engine = UpdateEngine(self._update_location_task, core=core, on_timeout=self._on_check_timeout)
+
+        # Optional event-driven trigger: check right after a local network change
+        # and fall back to a long safety interval for the periodic poll
+        self.network_watcher = None
+        self.networkChanged.connect(self.on_network_changed)
+
+        # Idle detection: scheduled checks while active, input events or a 1 s poll only while idle.
+        # Starts with a no-op backend; the real one is created in the background by start().
+        self.idle_monitor = idle_detector.IdleMonitor(
+            scheduler, idle_detector.IdleBackend(),
+            on_idle=self.enter_idle_mode, on_wake=self.exit_idle_mode, post=self.userActivity.emit)
+        self.userActivity.connect(self.idle_monitor.on_activity)
+        self.idleBackendReady.connect(self.idle_monitor.set_backend)
+
+    def prewarm_state(self):
+        """
+        Shows the last cached lookup (stale) until the first check confirms it.
+        Display only: no history entry, no snapshot. Returns True if it did.
+        """
+        if not self.geo_cache:
+            return False
+        cached = self.geo_cache.latest()
+        if not cached:
+            return False
+        ip_data, used_at = cached
+        full_data = ip_data.get('full_data')
+        if not full_data or not full_data.get('ip'):
+            return False
+        log.info("Pre-warming state from geo cache: %s", full_data['ip'])
+        self.state.show_restored(full_data, used_at)
+        return True
+
+    def _lookup_full_data(self, ip, job, announce=False):
+        """
+        Geo lookup that answers known IPs from the cache without touching the network.
+        With `announce`, a cache miss first emits ipChanged with whatever country
+        is already known, so the flag can change before the remote lookup returns.
+        """
+        started = tracing.now()
+        if self.geo_cache:
+            cached = self.geo_cache.get(ip)
+            if cached:
+                stats = self.geo_cache.stats()
+                log.info("Geo cache hit for %s (hits: %s, misses: %s)", ip, stats['hits'], stats['misses'])
+                tracing.record("geo.lookup", started, source="cache")
+                return cached
+        if announce and ip_fetcher.remote_lookup_enabled():
+            preliminary = self._preliminary_data(ip)
+            if preliminary:
+                self.engine.deliver(job, lambda: self.ipChanged.emit(preliminary, job.is_forced))
+        full_data = get_full_data(ip)
+        if self.geo_cache and is_cacheable(full_data):
+            self.geo_cache.put(ip, full_data)
+        tracing.record("geo.lookup", started, source="remote" if ip_fetcher.remote_lookup_enabled() else "local")
+        return full_data
+
+    def _preliminary_data(self, ip):
+        """Country for `ip` from an expired cache entry or the local GeoIP database, if any."""
+        stale = self.geo_cache.peek(ip) if self.geo_cache else None
+        if stale and stale.get('full_data'):
+            return stale
+        local = ip_fetcher.lookup_local(ip)
+        if local and local.get('country_code'):
+            return make_full_data(ip, local['country_code'], "N/A", local['isp'] or "N/A")
+        return None
+
+    def report_paint(self, ip, stage):
+        """
+        Called by the GUI after painting a stage ('first' or 'full') of an IP change.
+        Logs time-to-first-flag and time-to-full-data once the full stage is painted.
+        """
+        timing = self._change_timings.get(ip)
+        if timing is None:
             return
+        elapsed_ms = (time.monotonic() - timing['started']) * 1000
+        if stage == "first":
+            timing['first_ms'] = elapsed_ms
+            return
+        first_ms = timing.get('first_ms', elapsed_ms)
+        log.info("%s: time-to-first-flag %.0f ms, time-to-full-data %.0f ms", ip, first_ms, elapsed_ms)
+        self._change_timings.pop(ip, None)
 
-        threshold_mins = self.config.idle_threshold_mins
-        threshold_seconds = 5 if threshold_mins == 0 else threshold_mins * 60
+    def start(self, idle_detection=True, first_check_delay=0.2):
+        """Starts the IP poll, idle detection (unless disabled, e.g. headless) and the network watcher."""
+        self.idle_monitor.start(idle_detection and self.config.idle_enabled, self._idle_threshold_seconds())
+        if idle_detection:
+            threading.Thread(target=lambda: self.idleBackendReady.emit(idle_detector.create_idle_backend(self.config.idle_backend)),
+                             name="idle-backend-loader", daemon=True).start()
+        if self.geo_cache:
+            self.scheduler.add_periodic("geo_cache_expiry", 3600, self.geo_cache.purge_expired)
+        if self.config.network_watch_events:
+            self.network_watcher = net_watcher.create_watcher(self.networkChanged.emit)
+        # Run the main update loop after 200ms (the tray icon paints first)
+        self.scheduler.schedule_once("ip_poll", first_check_delay, self.main_update_loop)
+
+    def stop(self):
+        """Stops timers and the network watcher (called on application exit)."""
+        self.scheduler.cancel("ip_poll")
+        self.engine.shutdown()
+        self.idle_monitor.stop()
+        if self.network_watcher:
+            self.network_watcher.stop()
+
+    @QtCore.Slot(str)
+    def on_network_changed(self, reason):
+        """A local network change was reported: check the IP now instead of waiting for the poll."""
+        if self.state.is_in_idle_mode:
+            return
+        log.info("Network change detected (%s). Checking IP...", reason)
+        self.policy.reset()
+        # A check started before the change may report the old IP: replace it
+        self.update_location_icon(restart=True)
 
-        # Check ONLY for basic mouse/keyboard input
-        is_input_idle = idle_detector.get_idle_time_seconds() < threshold_seconds
+    def _idle_threshold_seconds(self):
+        threshold_mins = self.config.idle_threshold_mins
+        # "Easter egg" for debugging: if 0 is selected, use 5 seconds
+        return 5 if threshold_mins == 0 else threshold_mins * 60
 
-        # WAKE UP only if there IS input activity
-        if is_input_idle:
-            self.exit_idle_mode()
+    def apply_idle_settings(self):
+        """Called after the idle settings were changed."""
+        self.idle_monitor.configure(self.config.idle_enabled, self._idle_threshold_seconds())
 
     def main_update_loop(self):
-        """Main update loop, called every time the main timer fires."""
-        if self.config.idle_enabled and not self.state.is_in_idle_mode:
-
-            threshold_mins = self.config.idle_threshold_mins
-            
-            # "Easter egg" for debugging: if 0 is selected, use 5 seconds
-            if threshold_mins == 0:
-                threshold_seconds = 5
-            else:
-                threshold_seconds = threshold_mins * 60
-
-            if idle_detector.is_user_idle(threshold_seconds):
-                self.enter_idle_mode()
-                return
+        """Main update loop, called every time the IP poll task fires."""
         self.update_location_icon()
 
     def enter_idle_mode(self):
         if self.state.is_in_idle_mode: return
         self.state.set_idle_mode(True)
-        print("Entering idle mode...")
+        log.info("Entering idle mode...")
+        self.idle_monitor.watch_for_wakeup()
         self.enteredIdleMode.emit()
-        self.main_timer.start(self.config.idle_interval_mins * 60 * 1000)
+        self.scheduler.schedule_once("ip_poll", self.config.idle_interval_mins * 60, self.main_update_loop)
 
     def exit_idle_mode(self):
         if not self.state.is_in_idle_mode: return
         self.state.set_idle_mode(False)
-        print("Exiting idle mode...")
+        log.info("Exiting idle mode...")
+        self.idle_monitor.watch_for_idle()
         self.update_location_icon(is_forced_by_user=True)
 
     def schedule_next_update(self):
         if self.state.is_in_idle_mode:
-            self.main_timer.start(self.config.idle_interval_mins * 60 * 1000)
+            self.scheduler.schedule_once("ip_poll", self.config.idle_interval_mins * 60, self.main_update_loop)
         else:
             base_seconds = self.config.update_interval
-            jitter = base_seconds * 0.30
-            rand_seconds = random.uniform(base_seconds - jitter, base_seconds + jitter)
-            interval_ms = round(rand_seconds) * 1000
-            self.main_timer.start(max(1000, interval_ms))
+            if self.network_watcher:
+                # Changes are reported by the watcher; the poll is only a safety net
+                base_seconds = max(base_seconds, self.config.network_safety_interval)
+            interval = max(1, round(self.policy.next_interval(base_seconds)))
+            self.state.poll_policy_info = self.policy.describe()
+            log.debug("Next IP check in %ss (%s)", interval, self.state.poll_policy_info)
+            self.scheduler.schedule_once("ip_poll", interval, self.main_update_loop)
+
+    def on_poll_finished(self, success, ip_changed):
+        self.polls += 1
+        self.poll_failures += not success
+        self.ip_changes += ip_changed
+        if success:
+            self.policy.on_success(ip_changed)
+        else:
+            self.policy.on_failure()
+        self.schedule_next_update()
+        for listener in self.poll_listeners:
+            listener(success, ip_changed)
+
+    def _on_check_timeout(self, job):
+        """A check on the async core was given up: counts as a failed poll, so polling goes on."""
+        self.on_poll_finished(False, False)
+
+    @QtCore.Slot(object)
+    def _run_posted(self, fn):
+        fn()
+
+    def _post_result(self, job, emit, success, ip_changed):
+        """
+        Worker side: hands the check's result and its completion to the GUI
+        thread as a single call. The data is claimed from the engine there,
+        so a check cancelled in the meantime (shutdown) delivers nothing.
+        """
+        def finish():
+            if emit is not None and self.engine.claim(job):
+                emit()
+            if not job.cancelled:
+                self.on_poll_finished(success, ip_changed)
+        self.emitted_at = tracing.now()
+        self._resultPosted.emit(finish)
 
     def reset_to_active_mode(self):
+        if self.state.is_in_idle_mode:
+            self.idle_monitor.watch_for_idle()
         self.state.set_idle_mode(False)
         self.schedule_next_update()
 
-    def update_location_icon(self, is_forced_by_user=False):
+    def update_location_icon(self, is_forced_by_user=False, restart=False):
         if is_forced_by_user:
-            if self.main_timer.isActive(): self.main_timer.stop()
+            self.scheduler.cancel("ip_poll")
+            self.policy.reset()
             self.reset_to_active_mode()
         
-        threading.Thread(target=self._update_location_task, args=(is_forced_by_user,), daemon=True).start()
-        
-        if not is_forced_by_user:
-            self.schedule_next_update()
+        # Joins a check that is already running; the next one is scheduled from on_poll_finished
+        self.engine.submit(is_forced_by_user, restart=restart)
+
+    def _update_location_task(self, job):
+        success, ip_changed, emit = False, False, None
+        try:
+            with tracing.span("check", forced=job.is_forced):
+                success, ip_changed, emit = self._check_location(job)
+        finally:
+            self.engine.release(job)
+            # A cancelled check was replaced by a newer one, which reports for itself
+            if not job.cancelled:
+                self._post_result(job, emit, success, ip_changed)
 
-    def _update_location_task(self, is_forced):
+    def _check_location(self, job):
+        """
+        Runs one check. Returns (success, ip_changed, emit), where emit() sends
+        the result on the GUI thread (None when there is nothing to send).
+        """
+        started = time.monotonic()
         ip_data = get_ip_data()  # str или dict
         ip = None
 
@@ -112,24 +294,36 @@ class UpdateHandler(QtCore.QObject):
         else:
             ip = 'N/A'
 
+        if job.cancelled:
+            return False, False, None
+        is_forced = self.engine.seal(job)
         last_ip = getattr(self.state, 'last_known_ip', None)
 
         # Нет сети
         if ip == 'N/A':
-            print("[ERROR] Could not retrieve external IP.")
-            self.state.last_known_ip = None
-            self.ipDataReceived.emit({'ip': 'N/A', 'full_data': {'error': 'No connection'}}, is_forced)
-            return
+            log.warning("Could not retrieve external IP.")
+            def emit_error():
+                self.state.last_known_ip = None
+                self.ipDataReceived.emit({'ip': 'N/A', 'full_data': {'error': 'No connection'}}, is_forced)
+            return False, False, emit_error
 
         # Always emit the signal on a forced update (exiting idle)
         if is_forced or last_ip is None or ip != last_ip:
-            print(f"[SUCCESS] IP address update: {last_ip} -> {ip}")
-            full_data = get_full_data(ip)
-            self.state.last_known_ip = ip
-            self.ipDataReceived.emit(full_data, is_forced)
+            log.info("IP address update: %s -> %s", last_ip, ip)
+            ip_changed = ip != last_ip
+            if ip_changed:
+                self._change_timings = {ip: {'started': started}}
+            full_data = self._lookup_full_data(ip, job, announce=ip_changed)
+            def emit_data():
+                self.state.last_known_ip = ip
+                self.ipDataReceived.emit(full_data, is_forced)
+            return True, ip_changed, emit_data
         else:
-            print("IP has not changed, but forced update or normal check.")
+            log.debug("IP has not changed, but forced update or normal check.")
             # If forced (exiting idle), still update the icon
             if is_forced:
-                full_data = get_full_data(ip)
-                self.ipDataReceived.emit(full_data, is_forced)
+                full_data = self._lookup_full_data(ip, job)
+                def emit_confirmed():
+                    self.ipDataReceived.emit(full_data, is_forced)
+                return True, False, emit_confirmed
+            return True, False, None
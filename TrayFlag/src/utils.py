@@ -5,9 +5,11 @@ import os
 import re
 import shutil
 import subprocess
-from PySide6 import QtWidgets, QtGui, QtCore
+import logging
 from constants import APP_NAME
 
+log = logging.getLogger(__name__)
+
 def get_base_path():
     """
     Returns the base path of the application
@@ -43,7 +45,7 @@ def set_autostart_shortcut(enabled):
     try:
         import win32com.client
     except ImportError:
-        print("WARNING: pywin32 library not found. Autostart feature is disabled.")
+        log.warning("pywin32 library not found. Autostart feature is disabled.")
         return
         
     shell = win32com.client.Dispatch("WScript.Shell")
@@ -58,13 +60,15 @@ def set_autostart_shortcut(enabled):
         shortcut.Description = f"Start {APP_NAME}"
         shortcut.WorkingDirectory = get_base_path()
         shortcut.save()
-        print(f"Autostart shortcut created at: {shortcut_path}")
+        log.info("Autostart shortcut created at: %s", shortcut_path)
     else:
         if os.path.exists(shortcut_path):
             os.remove(shortcut_path)
-            print(f"Autostart shortcut removed from: {shortcut_path}")
+            log.info("Autostart shortcut removed from: %s", shortcut_path)
 
 def create_no_internet_icon(size=20):
+    # Imported here so that the non-GUI helpers (resource_path etc.) don't pull in Qt
+    from PySide6 import QtGui, QtCore
     pixmap = QtGui.QPixmap(size, size)
     pixmap.fill(QtCore.Qt.GlobalColor.transparent)
     painter = QtGui.QPainter(pixmap)
@@ -88,7 +92,7 @@ def create_desktop_shortcut():
     try:
         import win32com.client
     except ImportError:
-        print("WARNING: pywin32 library not found. Desktop shortcut feature is disabled.")
+        log.warning("pywin32 library not found. Desktop shortcut feature is disabled.")
         return
         
     shell = win32com.client.Dispatch("WScript.Shell")
@@ -99,7 +103,7 @@ def create_desktop_shortcut():
     
     # Check if the shortcut already exists
     if os.path.exists(shortcut_path):
-        print(f"Desktop shortcut already exists at: {shortcut_path}")
+        log.info("Desktop shortcut already exists at: %s", shortcut_path)
         return
 
     # Get the path to our compiled .exe
@@ -114,7 +118,7 @@ def create_desktop_shortcut():
     
     # Save the shortcut
     shortcut.save()
-    print(f"Desktop shortcut created at: {shortcut_path}")
+    log.info("Desktop shortcut created at: %s", shortcut_path)
 
 def run_updater_script():
     """
@@ -122,7 +126,7 @@ def run_updater_script():
     """
     updater_path = resource_path("updater.ps1")
     if not os.path.exists(updater_path):
-        print(f"[ERROR] updater.ps1 not found at: {updater_path}")
+        log.error("updater.ps1 not found at: %s", updater_path)
         # You can show a QMessageBox with an error here if needed
         return
 
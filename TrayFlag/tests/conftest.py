@@ -0,0 +1,9 @@
+# File: tests/conftest.py
+
+import os
+import sys
+
+# The application modules use flat imports (from utils import ...), so put src/ on the path.
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
@@ -0,0 +1,110 @@
+# File: tests/test_connectivity.py
+
+import socket
+
+import pytest
+
+import connectivity
+
+ROUTE_HEADER = "Iface\tDestination\tGateway \tFlags\tRefCnt\tUse\tMetric\tMask\t\tMTU\tWindow\tIRTT\n"
+DEFAULT_ROUTE = "eth0\t00000000\t0101A8C0\t0003\t0\t0\t100\t00000000\t0\t0\t0\n"
+DEFAULT_ROUTE_DOWN = "eth0\t00000000\t0101A8C0\t0002\t0\t0\t100\t00000000\t0\t0\t0\n"
+LAN_ROUTE = "eth0\t0001A8C0\t00000000\t0001\t0\t0\t100\t00FFFFFF\t0\t0\t0\n"
+IPV6_DEFAULT = "0" * 32 + " 00 " + "0" * 32 + " 00 fe800000000000000000000000000001 00000400 00000001 00000000 00000003 eth0\n"
+IPV6_LOOPBACK_DEFAULT = "0" * 32 + " 00 " + "0" * 32 + " 00 " + "0" * 32 + " ffffffff 00000001 00000000 00200201 lo\n"
+
+@pytest.fixture
+def tables(tmp_path):
+    """Writes fake /proc/net/route and /proc/net/ipv6_route files; returns their paths."""
+    def write(ipv4=(), ipv6=()):
+        route, ipv6_route = tmp_path / "route", tmp_path / "ipv6_route"
+        route.write_text(ROUTE_HEADER + "".join(ipv4))
+        ipv6_route.write_text("".join(ipv6))
+        return str(route), str(ipv6_route)
+    return write
+
+@pytest.fixture
+def listener():
+    """A local TCP listener; yields its port."""
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    yield server.getsockname()[1]
+    server.close()
+
+def closed_port():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+def test_ipv4_default_route(tables):
+    assert connectivity.has_default_route(*tables(ipv4=[LAN_ROUTE, DEFAULT_ROUTE]))
+
+def test_no_default_route(tables):
+    assert not connectivity.has_default_route(*tables(ipv4=[LAN_ROUTE]))
+
+def test_default_route_that_is_down(tables):
+    assert not connectivity.has_default_route(*tables(ipv4=[DEFAULT_ROUTE_DOWN]))
+
+def test_ipv6_default_route(tables):
+    assert connectivity.has_default_route(*tables(ipv6=[IPV6_DEFAULT]))
+
+def test_ipv6_loopback_is_not_a_default_route(tables):
+    assert not connectivity.has_default_route(*tables(ipv6=[IPV6_LOOPBACK_DEFAULT]))
+
+def test_tcp_probe_reaches_listener(listener):
+    assert connectivity.tcp_probe("127.0.0.1", listener, timeout=1.0)
+
+def test_tcp_probe_refused():
+    assert not connectivity.tcp_probe("127.0.0.1", closed_port(), timeout=1.0)
+
+def test_offline_without_default_route(tables, listener):
+    online, reason = connectivity.check_connectivity("127.0.0.1", listener, 1.0, *tables(ipv4=[LAN_ROUTE]))
+    assert (online, reason) == (False, "no default route")
+
+def test_route_only_by_default(tables):
+    assert connectivity.check_connectivity(route_table=tables(ipv4=[DEFAULT_ROUTE])[0],
+                                           ipv6_route_table="/nonexistent") == (True, "")
+
+def test_probe_success(tables, listener):
+    assert connectivity.check_connectivity("127.0.0.1", listener, 1.0, *tables(ipv4=[DEFAULT_ROUTE])) == (True, "")
+
+def test_failed_probe_stays_online(tables):
+    """The providers are still tried when only the probe host is unreachable."""
+    port = closed_port()
+    online, reason = connectivity.check_connectivity("127.0.0.1", port, 1.0, *tables(ipv4=[DEFAULT_ROUTE]))
+    assert online
+    assert reason == f"127.0.0.1:{port} unreachable"
+
+class FakeProvider:
+    name = "fake"
+    def __init__(self):
+        self.calls = 0
+    def fetch_ip(self, attempts=None):
+        self.calls += 1
+        return "203.0.113.7"
+
+@pytest.fixture
+def fetcher(monkeypatch):
+    """ip_fetcher with one fake IP provider; the precheck is set by the test."""
+    import ip_fetcher
+    provider = FakeProvider()
+    monkeypatch.setattr(ip_fetcher, "_ip_providers", [provider])
+    monkeypatch.setattr(ip_fetcher, "_mode", "sequential")
+    return ip_fetcher, provider
+
+def test_providers_tried_when_probe_fails(fetcher, monkeypatch):
+    ip_fetcher, provider = fetcher
+    monkeypatch.setattr(connectivity, "has_default_route", lambda *args: True)
+    monkeypatch.setattr(ip_fetcher, "_precheck", ("127.0.0.1", closed_port(), 1.0))
+    assert ip_fetcher.get_ip_data() == "203.0.113.7"
+    assert provider.calls == 1
+
+def test_providers_skipped_without_default_route(fetcher, monkeypatch):
+    ip_fetcher, provider = fetcher
+    monkeypatch.setattr(connectivity, "has_default_route", lambda *args: False)
+    monkeypatch.setattr(ip_fetcher, "_precheck", ("", 443, 1.0))
+    assert ip_fetcher.get_ip_data() is None
+    assert provider.calls == 0
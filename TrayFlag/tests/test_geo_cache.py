@@ -0,0 +1,81 @@
+# File: tests/test_geo_cache.py
+
+import sqlite3
+from contextlib import closing
+from types import SimpleNamespace
+
+import pytest
+
+from geo_cache import GeoCache
+from history_store import HistoryStore
+from state_manager import AppState
+
+def ip_data(ip, country="NL"):
+    return {'ip': ip, 'full_data': {'ip': ip, 'country_code': country, 'city': "Amsterdam", 'isp': "Example"}}
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = GeoCache(str(tmp_path / "geo.db"), max_entries=2)
+    yield cache
+    cache.close()
+
+def stored_last_used(cache, ip):
+    with closing(sqlite3.connect(cache.path)) as conn:
+        return conn.execute("SELECT last_used FROM geo_cache WHERE ip = ?", (ip,)).fetchone()[0]
+
+def test_hits_are_written_in_batches(tmp_path):
+    cache = GeoCache(str(tmp_path / "geo.db"), max_entries=GeoCache.TOUCH_BATCH)
+    try:
+        ips = [f"198.51.100.{i}" for i in range(GeoCache.TOUCH_BATCH)]
+        for ip in ips:
+            cache.put(ip, ip_data(ip))
+        written = stored_last_used(cache, ips[0])
+        for _ in range(100):
+            assert cache.get(ips[0]) == ip_data(ips[0])
+        assert stored_last_used(cache, ips[0]) == written
+        for ip in ips[1:]:
+            cache.get(ip)
+        # The batch is full: one write for all of them
+        batch_written = stored_last_used(cache, ips[0])
+        assert batch_written > written
+        cache.get(ips[0])
+        cache.purge_expired() # hourly, writes whatever is pending
+        assert stored_last_used(cache, ips[0]) > batch_written
+    finally:
+        cache.close()
+
+def test_eviction_sees_unwritten_hits(cache):
+    cache.put("198.51.100.1", ip_data("198.51.100.1"))
+    cache.put("198.51.100.2", ip_data("198.51.100.2"))
+    cache.get("198.51.100.1") # now the most recently used, only in memory
+    cache.put("198.51.100.3", ip_data("198.51.100.3"))
+    assert cache.peek("198.51.100.1") is not None
+    assert cache.peek("198.51.100.2") is None
+    assert cache.latest()[0] == ip_data("198.51.100.3")
+
+def test_close_writes_pending_hits(tmp_path):
+    cache = GeoCache(str(tmp_path / "geo.db"))
+    try:
+        cache.put("198.51.100.1", ip_data("198.51.100.1"))
+        written = stored_last_used(cache, "198.51.100.1")
+        cache.get("198.51.100.1")
+    finally:
+        cache.close()
+    assert stored_last_used(cache, "198.51.100.1") > written
+
+def test_prewarm_only_changes_the_display(cache, tmp_path):
+    from update_handler import UpdateHandler
+    cache.put("198.51.100.1", ip_data("198.51.100.1"))
+    history = HistoryStore(str(tmp_path / "history.db"))
+    changes = []
+    state = AppState(snapshot_path=str(tmp_path / "state.json"), history=history)
+    state.on_change = lambda: changes.append(1)
+    try:
+        assert UpdateHandler.prewarm_state(SimpleNamespace(geo_cache=cache, state=state))
+        assert state.current_location_data['ip'] == "198.51.100.1"
+        assert state.is_stale
+        assert state.last_update_time > 0
+        assert history.recent(10) == []
+        assert changes == [] # no snapshot scheduled
+    finally:
+        history.close()
@@ -0,0 +1,61 @@
+# File: tests/test_history_store.py
+
+import time
+import sqlite3
+
+import pytest
+
+import history_store
+from history_store import HistoryStore
+
+def location(ip, country="NL"):
+    return {'ip': ip, 'country_code': country, 'city': "Amsterdam", 'isp': "Example"}
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"))
+    yield store
+    store.close()
+
+def test_records_transitions_only(store):
+    assert store.record(location("198.51.100.1"))
+    assert not store.record(location("198.51.100.1"))
+    assert store.record(location("198.51.100.2"))
+    assert [entry['ip'] for entry in store.recent(10)] == ["198.51.100.1", "198.51.100.2"]
+
+def test_record_is_queued_while_the_file_is_locked(store):
+    """What record() sees while compact() runs VACUUM on its own connection."""
+    store.record(location("198.51.100.1"))
+    other = sqlite3.connect(store.path)
+    other.execute("BEGIN EXCLUSIVE")
+    started = time.monotonic()
+    assert not store.record(location("198.51.100.2"))
+    assert not store.record(location("198.51.100.3", "DE"))
+    assert time.monotonic() - started < 2 * history_store.BUSY_TIMEOUT + 1
+    other.rollback()
+    other.close()
+    assert store.record(location("198.51.100.4"))
+    assert [entry['ip'] for entry in store.recent(10)] == [
+        "198.51.100.1", "198.51.100.2", "198.51.100.3", "198.51.100.4"]
+    assert store.recent(10)[2]['country_code'] == "DE"
+
+def test_maintain_compacts_without_the_lock(store, monkeypatch):
+    now = time.time()
+    store.append_many([(now - 400 * 86400 + i, f"198.51.100.{i}", "NL", "Amsterdam", "Example") for i in range(50)])
+    store.record(location("203.0.113.7"), ts=now)
+    locked_during_vacuum = []
+    connect = sqlite3.connect
+    class Connection:
+        """Wraps the compaction connection and notes whether the store's lock is held during VACUUM."""
+        def __init__(self, *args, **kwargs):
+            self.conn = connect(*args, **kwargs)
+        def execute(self, sql, *args):
+            if sql == "VACUUM":
+                locked_during_vacuum.append(store._lock.locked())
+            return self.conn.execute(sql, *args)
+        def close(self):
+            self.conn.close()
+    monkeypatch.setattr(history_store.sqlite3, "connect", Connection)
+    assert store.maintain() == 50
+    assert locked_during_vacuum == [False]
+    assert [entry['ip'] for entry in store.recent(10)] == ["203.0.113.7"]
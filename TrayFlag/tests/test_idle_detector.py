@@ -0,0 +1,65 @@
+# File: tests/test_idle_detector.py
+
+import os
+import errno
+import threading
+
+import pytest
+
+from idle_detector import InputEventsBackend
+
+pytestmark = pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="lists descriptors in /proc")
+
+def open_fds():
+    """Descriptors open in this process (the garbage collector may close others' meanwhile, never open)."""
+    return {int(fd) for fd in os.listdir("/proc/self/fd")}
+
+def is_closed(fd):
+    try:
+        os.fstat(fd)
+    except OSError as e:
+        return e.errno == errno.EBADF
+    return False
+
+@pytest.fixture
+def devices(tmp_path):
+    """Two FIFOs standing in for /dev/input/event* (readable, never at EOF)."""
+    paths = [str(tmp_path / f"event{i}") for i in range(2)]
+    for path in paths:
+        os.mkfifo(path)
+    return paths
+
+def test_unavailable_backend_holds_no_descriptors(tmp_path):
+    before = open_fds()
+    backend = InputEventsBackend([str(tmp_path / "missing")])
+    assert not backend.available
+    backend.stop()
+    assert open_fds() <= before
+
+def test_available_backend_opens_nothing_until_started(devices):
+    before = open_fds()
+    backend = InputEventsBackend(devices)
+    assert backend.available
+    assert open_fds() <= before
+    backend.stop() # never started
+    assert open_fds() <= before
+
+def test_stop_closes_the_descriptors(devices, monkeypatch):
+    monkeypatch.setattr(InputEventsBackend, "COALESCE_SECONDS", 0.01)
+    activity = threading.Event()
+    backend = InputEventsBackend(devices)
+    opened = []
+    open_device = InputEventsBackend._open
+    monkeypatch.setattr(backend, "_open", lambda path: opened.append(open_device(path)) or opened[-1])
+    backend.start(activity.set)
+    thread = backend._thread
+    opened += [backend._stop_r, backend._stop_w]
+    assert len(opened) == 4 and None not in opened # two devices and the stop pipe
+    writer = os.open(devices[0], os.O_WRONLY | os.O_NONBLOCK)
+    os.write(writer, b"event")
+    assert activity.wait(2)
+    backend.stop()
+    thread.join(2)
+    os.close(writer)
+    assert not thread.is_alive()
+    assert all(is_closed(fd) for fd in opened)
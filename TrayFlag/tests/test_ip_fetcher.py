@@ -0,0 +1,71 @@
+# File: tests/test_ip_fetcher.py
+
+import time
+import threading
+
+import pytest
+
+import ip_fetcher
+
+class BlockingProvider:
+    """Answers once `release` is set; records the attempts it was asked for."""
+    def __init__(self, name, ip, release=None, timeout=10):
+        self.name = name
+        self.ip = ip
+        self.timeout = timeout
+        self.release = release
+        self.attempts = []
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def fetch_ip(self, attempts=None):
+        with self._lock:
+            self.attempts.append(attempts)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            if self.release is not None:
+                self.release.wait(5)
+            return self.ip
+        finally:
+            with self._lock:
+                self.running -= 1
+
+@pytest.fixture
+def race(monkeypatch):
+    """ip_fetcher in race mode with a stuck provider and a fast one."""
+    release = threading.Event()
+    slow = BlockingProvider("slow", "203.0.113.1", release)
+    fast = BlockingProvider("fast", "203.0.113.7")
+    monkeypatch.setattr(ip_fetcher, "_ip_providers", [slow, fast])
+    monkeypatch.setattr(ip_fetcher, "_mode", "race")
+    monkeypatch.setattr(ip_fetcher, "_quorum", 1)
+    monkeypatch.setattr(ip_fetcher, "_precheck", None)
+    monkeypatch.setattr(ip_fetcher, "_race_calls", {})
+    yield slow, fast
+    release.set()
+
+def test_race_makes_single_attempts(race):
+    slow, fast = race
+    assert ip_fetcher.get_ip_data() == "203.0.113.7"
+    assert fast.attempts == [1]
+    assert slow.attempts == [1]
+
+def test_stuck_provider_is_not_raced_again(race):
+    slow, fast = race
+    for _ in range(10):
+        started = time.monotonic()
+        assert ip_fetcher.get_ip_data() == "203.0.113.7"
+        assert time.monotonic() - started < 1
+    assert len(fast.attempts) == 10
+    assert len(slow.attempts) == 1 # skipped while its first call is still running
+    assert slow.max_running == 1
+
+def test_provider_rejoins_once_its_call_ended(race):
+    slow, fast = race
+    ip_fetcher.get_ip_data()
+    slow.release.set()
+    ip_fetcher._race_calls[slow].result(2)
+    ip_fetcher.get_ip_data()
+    assert len(slow.attempts) == 2
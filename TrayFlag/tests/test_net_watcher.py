@@ -0,0 +1,108 @@
+# File: tests/test_net_watcher.py
+
+import socket
+import struct
+import threading
+
+import pytest
+
+from net_watcher import NetlinkWatcher
+
+W = NetlinkWatcher
+
+def rtattr(attr_type, payload):
+    data = W._RTATTR.pack(W._RTATTR.size + len(payload), attr_type) + payload
+    return data + bytes(-len(data) % 4)
+
+def message(msg_type, body=b""):
+    return W._NLMSGHDR.pack(W._NLMSGHDR.size + len(body), msg_type, 0, 0, 0) + body
+
+def route(msg_type, gateway, oif=2, flags=0):
+    body = W._RTMSG.pack(socket.AF_INET6, 0, 0, 0, 254, 9, 0, 1, flags)
+    body += rtattr(W.RTA_GATEWAY, socket.inet_pton(socket.AF_INET6, gateway)) + rtattr(W.RTA_OIF, struct.pack("=I", oif))
+    return message(msg_type, body)
+
+def address(msg_type, ip, index=2):
+    body = W._IFADDRMSG.pack(socket.AF_INET, 24, 0, 0, index) + rtattr(W.IFA_LOCAL, socket.inet_aton(ip))
+    return message(msg_type, body)
+
+def link(msg_type, flags, index=2):
+    return message(msg_type, W._IFINFOMSG.pack(socket.AF_UNSPEC, 1, index, flags, 0))
+
+DONE = message(W.NLMSG_DONE, struct.pack("=i", 0))
+
+@pytest.fixture
+def sockets():
+    """A datagram pair standing in for the netlink socket: (the watcher's end, the kernel's end)."""
+    ours, kernel = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+    yield ours, kernel
+    kernel.close()
+
+@pytest.fixture
+def watcher(sockets, tmp_path):
+    reasons = []
+    w = NetlinkWatcher(reasons.append, debounce=1.0, resolv_conf=str(tmp_path / "resolv.conf"), sock=sockets[0])
+    w.reasons = reasons
+    yield w
+    w._sock.close()
+    w._wake_r.close()
+    w._wake_w.close()
+
+def test_route_refresh_changes_nothing(watcher):
+    assert watcher._apply(route(W.RTM_NEWROUTE, "fe80::1"))[0] == ["route added"]
+    # Every router advertisement re-announces the same default route
+    assert watcher._apply(route(W.RTM_NEWROUTE, "fe80::1"))[0] == []
+    assert watcher._apply(route(W.RTM_NEWROUTE, "fe80::2"))[0] == ["route added"]
+    assert watcher._apply(route(W.RTM_DELROUTE, "fe80::1"))[0] == ["route removed"]
+
+def test_cloned_routes_are_ignored(watcher):
+    assert watcher._apply(route(W.RTM_NEWROUTE, "fe80::1", flags=W.RTM_F_CLONED))[0] == []
+
+def test_address_and_link_changes(watcher):
+    batch = address(W.RTM_NEWADDR, "192.0.2.10") + link(W.RTM_NEWLINK, W.IFF_UP | W.IFF_RUNNING)
+    assert watcher._apply(batch)[0] == ["address added", "link up/changed"]
+    assert watcher._apply(batch)[0] == []
+    # Flags the watcher does not care about (promiscuous mode) change nothing
+    assert watcher._apply(link(W.RTM_NEWLINK, W.IFF_UP | W.IFF_RUNNING | 0x100))[0] == []
+    assert watcher._apply(link(W.RTM_NEWLINK, W.IFF_UP))[0] == ["link up/changed"]
+    assert watcher._apply(address(W.RTM_DELADDR, "192.0.2.10"))[0] == ["address removed"]
+
+def test_burst_is_reported_once_after_it_settles(watcher):
+    watcher._note_change("route added", now=10.0)
+    watcher._note_change("address added", now=10.5)
+    watcher._note_change("route added", now=10.9)
+    watcher._flush_if_due(now=11.5)
+    assert watcher.reasons == []
+    watcher._flush_if_due(now=11.9)
+    assert watcher.reasons == ["route added, address added"]
+    watcher._flush_if_due(now=20.0)
+    assert watcher.reasons == ["route added, address added"]
+
+def test_endless_burst_is_reported_after_max_delay(watcher):
+    for tick in range(12):
+        watcher._note_change("route added", now=10.0 + tick * 0.5)
+        watcher._flush_if_due(now=10.0 + tick * 0.5)
+    assert watcher.reasons == ["route added"] # at 15.0, 5 x debounce after the first event
+
+def test_thread_loads_the_state_then_reports_only_changes(sockets, tmp_path):
+    ours, kernel = sockets
+    reported = threading.Event()
+    reasons = []
+    def callback(reason):
+        reasons.append(reason)
+        reported.set()
+    # Replies to the link, address and route dumps
+    kernel.send(route(W.RTM_NEWROUTE, "fe80::1") + DONE)
+    kernel.send(DONE)
+    kernel.send(DONE)
+    w = NetlinkWatcher(callback, debounce=0.05, resolv_conf=str(tmp_path / "resolv.conf"), sock=ours)
+    w.start()
+    kernel.send(route(W.RTM_NEWROUTE, "fe80::1"))
+    assert not reported.wait(0.3)
+    kernel.send(route(W.RTM_NEWROUTE, "fe80::2"))
+    assert reported.wait(2)
+    assert reasons == ["route added"]
+    w.stop()
+    w._thread.join(2)
+    assert not w._thread.is_alive()
+    assert ours.fileno() == -1
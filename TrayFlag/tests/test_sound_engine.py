@@ -0,0 +1,62 @@
+# File: tests/test_sound_engine.py
+
+import threading
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from sound_manager import PlaybackEngine
+
+class FakeStream:
+    """Records start/stop; the tests drive the callback themselves."""
+    created = 0
+    def __init__(self, callback, **kwargs):
+        FakeStream.created += 1
+        self.callback = callback
+        self.active = False
+        self.starts = 0
+    def start(self):
+        self.starts += 1
+        self.active = True
+    def stop(self):
+        self.active = False
+    def close(self):
+        self.active = False
+
+@pytest.fixture
+def engine():
+    FakeStream.created = 0
+    engine = PlaybackEngine(samplerate=1000, channels=1, max_voices=64, dedupe_seconds=0, idle_seconds=0.02,
+                            stream_factory=FakeStream, callback_stop=StopIteration)
+    yield engine
+    engine.close()
+
+def cue():
+    return np.ones((10, 1), dtype="float32")
+
+def test_concurrent_plays_create_one_stream(engine):
+    barrier = threading.Barrier(16)
+    def play(i):
+        barrier.wait()
+        engine.play(f"cue{i}", cue())
+    threads = [threading.Thread(target=play, args=(i,)) for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert FakeStream.created == 1
+    assert engine._stream.starts == 1
+    assert engine.played == 16
+
+def test_cue_after_callback_stop_restarts_the_stream(engine):
+    engine.play("a", cue())
+    stream = engine._stream
+    out = np.zeros((10, 1), dtype="float32")
+    stream.callback(out, 10, None, None) # plays the cue (10 frames)
+    with pytest.raises(StopIteration):
+        stream.callback(out, 10, None, None) # 20 silent frames: the callback asks to stop
+    # The stream has not wound down yet and still reports active
+    assert stream.active
+    engine.play("b", cue())
+    assert stream.starts == 2
@@ -0,0 +1,64 @@
+# File: tests/test_status_server.py
+
+import json
+import time
+import http.client
+
+import pytest
+
+import status_server
+from history_store import HistoryStore
+from status_server import StatusServer
+
+TOKEN = "secret"
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    """A status server on a free port with 20 transitions, one a minute, ending now."""
+    monkeypatch.setattr(status_server, "MAX_HISTORY_LIMIT", 5)
+    history = HistoryStore(str(tmp_path / "history.db"))
+    now = time.time()
+    for i in range(20):
+        history.record({'ip': f"198.51.100.{i}", 'country_code': "NL", 'city': "Amsterdam", 'isp': "Example"},
+                       ts=now - (19 - i) * 60)
+    server = StatusServer(TOKEN, port=0, history=history).start()
+    yield server
+    server.stop()
+    history.close()
+
+def get(server, path):
+    conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+    try:
+        conn.request("GET", path, headers={"Authorization": f"Bearer {TOKEN}"})
+        response = conn.getresponse()
+        return response.status, response.read()
+    finally:
+        conn.close()
+
+def ips(body):
+    return [entry['ip'] for entry in json.loads(body)]
+
+def test_limit(server):
+    status, body = get(server, "/history?limit=3")
+    assert status == 200
+    assert ips(body) == ["198.51.100.17", "198.51.100.18", "198.51.100.19"]
+
+@pytest.mark.parametrize("limit, count", [("0", 1), ("-7", 1), ("1000000", 5)])
+def test_limit_is_clamped(server, limit, count):
+    status, body = get(server, f"/history?limit={limit}")
+    assert status == 200
+    assert len(json.loads(body)) == count
+
+def test_since_is_capped_to_the_newest(server):
+    status, body = get(server, "/history?since=86400")
+    assert status == 200
+    assert ips(body) == [f"198.51.100.{i}" for i in range(15, 20)]
+
+def test_since_with_limit(server):
+    status, body = get(server, "/history?since=86400&limit=2")
+    assert ips(body) == ["198.51.100.18", "198.51.100.19"]
+
+@pytest.mark.parametrize("query", ["limit=abc", "since=abc", "since=-5", "since=nan", "since=inf"])
+def test_bad_query(server, query):
+    status, _ = get(server, f"/history?{query}")
+    assert status == 400
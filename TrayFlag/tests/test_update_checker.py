@@ -0,0 +1,72 @@
+# File: tests/test_update_checker.py
+
+import json
+
+import pytest
+
+import ip_providers
+from update_checker import UpdateChecker, is_newer
+
+class FakeResponse:
+    def __init__(self, text, status_code=200, headers=None):
+        self.text = text
+        self.status_code = status_code
+        self.headers = headers or {}
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise OSError(f"HTTP {self.status_code}")
+
+class FakeSession:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = 0
+    def get(self, url, headers=None, timeout=None):
+        self.requests += 1
+        return self.responses.pop(0)
+
+@pytest.fixture
+def session(monkeypatch):
+    def install(*responses):
+        fake = FakeSession(*responses)
+        monkeypatch.setattr(ip_providers, "get_session", lambda: fake)
+        return fake
+    return install
+
+@pytest.mark.parametrize("latest, current, expected", [
+    ("1.10.0", "1.9.0", True),
+    ("1.9.0", "1.10.0", False),
+    ("1.16.0", "1.16.0", False),
+    ("1.17", "1.16.0", True),
+])
+def test_is_newer(latest, current, expected):
+    assert is_newer(latest, current) is expected
+
+@pytest.mark.parametrize("latest", ["1.17.0-beta", "v1.17.0", "", "1..0", None])
+def test_is_newer_rejects_unparseable(latest):
+    assert is_newer(latest, "1.16.0") is False
+
+def test_valid_answer_is_cached(tmp_path, session):
+    fake = session(FakeResponse("VER: 1.17.0\nLINK: https://example.org/dl\n", headers={"Cache-Control": "max-age=600"}))
+    checker = UpdateChecker(url="https://example.org/ver", state_path=str(tmp_path / "update.json"))
+    assert checker.check() == ("1.17.0", "https://example.org/dl")
+    assert checker.check() == ("1.17.0", "https://example.org/dl")
+    assert fake.requests == 1
+
+def test_unparseable_version_is_not_cached(tmp_path, session):
+    state_path = tmp_path / "update.json"
+    fake = session(FakeResponse("VER: 1.17.0-beta\nLINK: https://example.org/dl\n", headers={"Cache-Control": "max-age=600"}),
+                   FakeResponse("VER: 1.17.0\nLINK: https://example.org/dl\n"))
+    checker = UpdateChecker(url="https://example.org/ver", state_path=str(state_path))
+    assert checker.check() == (None, None)
+    assert not state_path.exists()
+    assert checker.check() == ("1.17.0", "https://example.org/dl")
+    assert fake.requests == 2
+
+def test_unparseable_cached_version_is_ignored(tmp_path, session):
+    state_path = tmp_path / "update.json"
+    state_path.write_text(json.dumps({"url": "https://example.org/ver", "version": "garbage", "link": "x",
+                                      "fetched_at": 9e12, "max_age": 3600}))
+    fake = session(FakeResponse("VER: 1.17.0\nLINK: https://example.org/dl\n"))
+    checker = UpdateChecker(url="https://example.org/ver", state_path=str(state_path))
+    assert checker.check() == ("1.17.0", "https://example.org/dl")
+    assert fake.requests == 1